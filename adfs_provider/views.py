@@ -1,16 +1,20 @@
-import base64
-
-import jwt
 from allauth.socialaccount.providers.oauth2.views import OAuth2Adapter, OAuth2CallbackView, OAuth2LoginView
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
 
-from .provider import EspooADFSProvider, HelsinkiADFSProvider
+from auth_backends.adfs.attribute_mapping import ESPOO_ATTRIBUTE_MAPPING, HELSINKI_ATTRIBUTE_MAPPING
+from auth_backends.adfs.certificates import decode_token
+from auth_backends.key_discovery import get_discovered_certs
 
-x509_backend = default_backend()
+from .provider import EspooADFSProvider, HelsinkiADFSProvider
 
 
 class ADFSOAuth2Adapter(OAuth2Adapter):
+    cert = None
+    # Additional certificates that are valid at the same time, e.g. during a certificate rollover
+    extra_certs = ()
+    # JWKS endpoint of the IdP for discovering rotated signing certificates
+    jwks_url = None
+    attribute_mapping = None
+
     @classmethod
     def get_login_view(cls):
         return OAuth2LoginView.adapter_view(cls)
@@ -20,17 +24,25 @@ class ADFSOAuth2Adapter(OAuth2Adapter):
         return OAuth2CallbackView.adapter_view(cls)
 
     def complete_login(self, request, app, token, **kwargs):
-        cert_der = base64.b64decode(self.cert)
-        x509_cert = x509.load_der_x509_certificate(cert_der, backend=x509_backend)
-        jwt_token = jwt.decode(token.token, key=x509_cert.public_key(),
-                               leeway=10, options={'verify_aud': False})
+        jwt_token = decode_token(token.token, self.get_certs(), leeway=10)
         data = self.clean_attributes(jwt_token)
         return self.get_provider().sociallogin_from_response(request, data)
 
+    @classmethod
+    def get_certs(cls):
+        certs = (cls.cert,) + tuple(cls.extra_certs)
+        return certs + tuple(cert for cert in get_discovered_certs(cls.jwks_url) if cert not in certs)
+
+    def clean_attributes(self, attrs_in):
+        """Map AD attributes to suitable extra_data attributes"""
+        return self.attribute_mapping.map(attrs_in)
+
 
 class HelsinkiADFSOAuth2Adapter(ADFSOAuth2Adapter):
     provider_id = HelsinkiADFSProvider.id
     realm = 'helsinki'
+    attribute_mapping = HELSINKI_ATTRIBUTE_MAPPING
+    jwks_url = 'https://fs.hel.fi/adfs/discovery/keys'
     access_token_url = 'https://fs.hel.fi/adfs/oauth2/token'
     authorize_url = 'https://fs.hel.fi/adfs/oauth2/authorize'
     profile_url = 'https://api.hel.fi/sso/user/'
@@ -55,44 +67,12 @@ class HelsinkiADFSOAuth2Adapter(ADFSOAuth2Adapter):
         '+k6Wu6d3LzhpU2QICWJnFpj1yJTAb94pWRUKNoBhpxQlWvNzRgFgJesIfkZ4C'
         'qqhmHqnV/BO+7MMv/g+WXRD09fo/YIXozpWzmO9LBzEvFe7Itz6C1R4Ng==')
 
-    def clean_attributes(self, attrs_in):
-        attr_map = {
-            'primarysid': 'primary_sid',
-            'company': 'department_name',
-            'email': 'email',
-            'winaccountname': 'username',
-            'group': 'ad_groups',
-            'unique_name': 'last_first_name',
-            'given_name': 'first_name',
-            'family_name': 'last_name',
-        }
-
-        # Convert attribute names to lowercase
-        attrs_in = {k.lower(): v for k, v in attrs_in.items()}
-
-        attrs = {}
-        for in_name, out_name in attr_map.items():
-            val = attrs_in.get(in_name, None)
-            if val is not None:
-                if out_name in ('department_name', 'email', 'username'):
-                    val = val.lower()
-                attrs[out_name] = val
-            attrs[out_name] = val
-
-        if 'last_first_name' in attrs:
-            names = attrs['last_first_name'].split(' ')
-            if 'first_name' not in attrs:
-                attrs['first_name'] = [names[0]]
-            if 'last_name' not in attrs:
-                attrs['last_name'] = [' '.join(names[1:])]
-            del attrs['last_first_name']
-
-        return attrs
-
 
 class EspooADFSOAuth2Adapter(ADFSOAuth2Adapter):
     provider_id = EspooADFSProvider.id
     realm = 'espoo'
+    attribute_mapping = ESPOO_ATTRIBUTE_MAPPING
+    jwks_url = 'https://fs.espoo.fi/adfs/discovery/keys'
     access_token_url = 'https://fs.espoo.fi/adfs/oauth2/token'
     authorize_url = 'https://fs.espoo.fi/adfs/oauth2/authorize'
     profile_url = 'https://api.hel.fi/sso/user/'
@@ -136,20 +116,3 @@ class EspooADFSOAuth2Adapter(ADFSOAuth2Adapter):
         'DNQhLHEL0mYumZUawi+EaNQOtTE8SN1tbKicI09WR0jdvNs7lvePrB/K1q19hz5m'
         'U+rbNk9+8Jgpzd5ielj37oqQOJazbSxNt+xF'
     )
-
-    def clean_attributes(self, attrs_in):
-        attr_map = {
-            'primarysid': 'primary_sid',
-            'given_name': 'first_name',
-            'family_name': 'last_name',
-            'email': 'email',
-        }
-        attrs = {}
-        for in_name, out_name in attr_map.items():
-            val = attrs_in.get(in_name, None)
-            if val is not None:
-                if out_name in ('department_name', 'email', 'username'):
-                    val = val.lower()
-                attrs[out_name] = val
-            attrs[out_name] = val
-        return attrs
@@ -0,0 +1,68 @@
+def lowercase(value):
+    return value.lower()
+
+
+class AttributeMapping:
+    """
+    Maps ADFS token claims to user details.
+
+    The mapping is given as a dict of claim name -> target name, or claim name ->
+    (target name, transform function). It is compiled once into a flat list of
+    (source, target, transform) operations. Every target is present in the result,
+    with None if the claim is missing.
+
+    With case_insensitive=True claim names are matched regardless of their case.
+    The claims are then looked up in a single pass over the token without copying
+    it, so large values such as hundreds of AD groups are passed through as is.
+    """
+    def __init__(self, mapping, case_insensitive=False):
+        self.case_insensitive = case_insensitive
+        self.ops = []
+
+        for source, target in mapping.items():
+            transform = None
+            if isinstance(target, tuple):
+                target, transform = target
+            if case_insensitive:
+                source = source.lower()
+            self.ops.append((source, target, transform))
+
+        self._ops_by_source = {source: (target, transform) for source, target, transform in self.ops}
+        self._targets = [target for source, target, transform in self.ops]
+
+    def map(self, attrs_in):
+        attrs = dict.fromkeys(self._targets)
+
+        if self.case_insensitive:
+            ops_by_source = self._ops_by_source
+            for source, value in attrs_in.items():
+                op = ops_by_source.get(source.lower())
+                if op is None or value is None:
+                    continue
+                target, transform = op
+                attrs[target] = transform(value) if transform else value
+        else:
+            for source, target, transform in self.ops:
+                value = attrs_in.get(source)
+                if value is not None:
+                    attrs[target] = transform(value) if transform else value
+
+        return attrs
+
+
+HELSINKI_ATTRIBUTE_MAPPING = AttributeMapping({
+    'primarysid': 'primary_sid',
+    'company': ('department_name', lowercase),
+    'email': ('email', lowercase),
+    'winaccountname': ('username', lowercase),
+    'group': 'ad_groups',
+    'given_name': 'first_name',
+    'family_name': 'last_name',
+}, case_insensitive=True)
+
+ESPOO_ATTRIBUTE_MAPPING = AttributeMapping({
+    'primarysid': 'primary_sid',
+    'given_name': 'first_name',
+    'family_name': 'last_name',
+    'email': ('email', lowercase),
+})
@@ -1,14 +1,11 @@
-import base64
 import uuid
 
-import jwt
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
 from django.urls import NoReverseMatch, reverse
 from social_core.backends.oauth import BaseOAuth2
 from social_core.utils import url_add_parameters
 
-x509_backend = default_backend()
+from auth_backends.adfs.certificates import decode_token
+from auth_backends.key_discovery import get_discovered_certs
 
 
 class BaseADFS(BaseOAuth2):
@@ -25,6 +22,12 @@ class BaseADFS(BaseOAuth2):
     domain_uuid = None
     realm = None
     cert = None
+    # Additional certificates that are valid at the same time, e.g. during a certificate rollover
+    extra_certs = ()
+    # JWKS endpoint of the IdP for discovering rotated signing certificates
+    jwks_url = None
+    # auth_backends.adfs.attribute_mapping.AttributeMapping for the realm's claims
+    attribute_mapping = None
 
     def get_redirect_uri(self, state=None):
         # TODO: Temporary solution to keep the same redirect uris as with the old allauth system
@@ -77,14 +80,17 @@ class BaseADFS(BaseOAuth2):
     def get_user_details(self, response):
         leeway = self.setting('LEEWAY', self.LEEWAY)
 
-        cert_der = base64.b64decode(self.cert)
-        x509_cert = x509.load_der_x509_certificate(cert_der, backend=x509_backend)
-        jwt_token = jwt.decode(response['access_token'], key=x509_cert.public_key(), leeway=leeway, options={
-            'verify_aud': False
-        })
+        jwt_token = decode_token(response['access_token'], self.get_certs(), leeway=leeway)
 
         return self.clean_attributes(jwt_token)
 
+    @classmethod
+    def get_certs(cls):
+        certs = (cls.cert,) + tuple(cls.extra_certs)
+        return certs + tuple(cert for cert in get_discovered_certs(cls.jwks_url) if cert not in certs)
+
     def clean_attributes(self, attrs_in):
         """Map AD attributes to suitable extra_data attributes"""
-        return attrs_in
+        if self.attribute_mapping is None:
+            return attrs_in
+        return self.attribute_mapping.map(attrs_in)
@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import logging
+from functools import lru_cache
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+
+logger = logging.getLogger(__name__)
+
+x509_backend = default_backend()
+
+
+@lru_cache(maxsize=None)
+def load_signing_key(cert):
+    """Parse a base64 encoded DER certificate.
+
+    Returns a tuple of the certificate's x5t thumbprint and its public key.
+    The result is memoized, so each certificate is parsed only once per process.
+    """
+    cert_der = base64.b64decode(cert)
+    x509_cert = x509.load_der_x509_certificate(cert_der, backend=x509_backend)
+    thumbprint = base64.urlsafe_b64encode(hashlib.sha1(cert_der).digest()).rstrip(b'=').decode('ascii')
+    return thumbprint, x509_cert.public_key()
+
+
+def get_signing_keys_for_token(token, certs):
+    """Return the public keys that should be tried when verifying the token.
+
+    If the token header has an x5t or kid matching one of the certificates, only
+    that certificate's key is returned. Otherwise all the keys are returned.
+    Certificates which cannot be parsed, e.g. malformed ones from a JWKS
+    endpoint, are skipped.
+    """
+    keys = []
+    for cert in certs:
+        try:
+            keys.append(load_signing_key(cert))
+        except ValueError as e:
+            logger.warning('Skipping a signing certificate which cannot be parsed: {}'.format(e))
+    if not keys:
+        raise jwt.DecodeError('No valid signing certificates')
+
+    header = jwt.get_unverified_header(token)
+    key_ids = {header.get('x5t'), header.get('kid')} - {None}
+    matching_keys = [public_key for thumbprint, public_key in keys if thumbprint in key_ids]
+
+    return matching_keys or [public_key for thumbprint, public_key in keys]
+
+
+def decode_token(token, certs, leeway=0):
+    """Decode and verify a JWT signed with one of the given certificates."""
+    keys = get_signing_keys_for_token(token, certs)
+    options = {'verify_aud': False}
+
+    for public_key in keys[:-1]:
+        try:
+            return jwt.decode(token, key=public_key, leeway=leeway, options=options)
+        except jwt.DecodeError:
+            continue
+
+    return jwt.decode(token, key=keys[-1], leeway=leeway, options=options)
@@ -1,5 +1,6 @@
 import uuid
 
+from auth_backends.adfs.attribute_mapping import ESPOO_ATTRIBUTE_MAPPING
 from auth_backends.adfs.base import BaseADFS
 
 
@@ -12,6 +13,8 @@ class EspooADFS(BaseADFS):
     resource = 'https://varaamo.hel.fi/tuotanto_new'
     domain_uuid = uuid.UUID('5b2401e0-7bbc-485b-8502-18920813a7d0')
     realm = 'espoo'
+    attribute_mapping = ESPOO_ATTRIBUTE_MAPPING
+    jwks_url = 'https://fs.espoo.fi/adfs/discovery/keys'
     cert = (
         'MIIG1zCCBL+gAwIBAgITGgAAfQoAbggMFZQDYAAAAAB9CjANBgkqhkiG9w0BAQsF'
         'ADBaMRQwEgYKCZImiZPyLGQBGRYEY2l0eTESMBAGCgmSJomT8ixkARkWAmFkMRUw'
@@ -51,20 +54,3 @@ class EspooADFS(BaseADFS):
         'DNQhLHEL0mYumZUawi+EaNQOtTE8SN1tbKicI09WR0jdvNs7lvePrB/K1q19hz5m'
         'U+rbNk9+8Jgpzd5ielj37oqQOJazbSxNt+xF'
     )
-
-    def clean_attributes(self, attrs_in):
-        attr_map = {
-            'primarysid': 'primary_sid',
-            'given_name': 'first_name',
-            'family_name': 'last_name',
-            'email': 'email',
-        }
-        attrs = {}
-        for in_name, out_name in attr_map.items():
-            val = attrs_in.get(in_name, None)
-            if val is not None:
-                if out_name in ('department_name', 'email', 'username'):
-                    val = val.lower()
-                attrs[out_name] = val
-            attrs[out_name] = val
-        return attrs
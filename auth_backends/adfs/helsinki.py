@@ -1,5 +1,6 @@
 import uuid
 
+from auth_backends.adfs.attribute_mapping import HELSINKI_ATTRIBUTE_MAPPING
 from auth_backends.adfs.base import BaseADFS
 
 
@@ -12,6 +13,8 @@ class HelsinkiADFS(BaseADFS):
     resource = 'https://api.hel.fi/sso/adfs'
     domain_uuid = uuid.UUID('1c8974a1-1f86-41a0-85dd-94a643370621')
     realm = 'helsinki'
+    attribute_mapping = HELSINKI_ATTRIBUTE_MAPPING
+    jwks_url = 'https://fs.hel.fi/adfs/discovery/keys'
     cert = ('MIIDMDCCAhigAwIBAgIBATANBgkqhkiG9w0BAQsFADAjMSEwHwYDVQQDExhBR'
             'EZTIFNpZ25pbmcgLSBmcy5oZWwuZmkwHhcNMTYwNDAzMjIxMTAwWhcNMjEwND'
             'AzMjIxMTAwWjAjMSEwHwYDVQQDExhBREZTIFNpZ25pbmcgLSBmcy5oZWwuZmk'
@@ -30,37 +33,3 @@ class HelsinkiADFS(BaseADFS):
             'fi46TJCKqxE0zTArQQROocfKS+7JM+JU5dLMNOOC+6tCUOP3GEjuE3PMetpbH'
             '+k6Wu6d3LzhpU2QICWJnFpj1yJTAb94pWRUKNoBhpxQlWvNzRgFgJesIfkZ4C'
             'qqhmHqnV/BO+7MMv/g+WXRD09fo/YIXozpWzmO9LBzEvFe7Itz6C1R4Ng==')
-
-    def clean_attributes(self, attrs_in):
-        attr_map = {
-            'primarysid': 'primary_sid',
-            'company': 'department_name',
-            'email': 'email',
-            'winaccountname': 'username',
-            'group': 'ad_groups',
-            'unique_name': 'last_first_name',
-            'given_name': 'first_name',
-            'family_name': 'last_name',
-        }
-
-        # Convert attribute names to lowercase
-        attrs_in = {k.lower(): v for k, v in attrs_in.items()}
-
-        attrs = {}
-        for in_name, out_name in attr_map.items():
-            val = attrs_in.get(in_name, None)
-            if val is not None:
-                if out_name in ('department_name', 'email', 'username'):
-                    val = val.lower()
-                attrs[out_name] = val
-            attrs[out_name] = val
-
-        if 'last_first_name' in attrs:
-            names = attrs['last_first_name'].split(' ')
-            if 'first_name' not in attrs:
-                attrs['first_name'] = [names[0]]
-            if 'last_name' not in attrs:
-                attrs['last_name'] = [' '.join(names[1:])]
-            del attrs['last_first_name']
-
-        return attrs
@@ -1,5 +1,6 @@
 import uuid
 
+from auth_backends.adfs.attribute_mapping import HELSINKI_ATTRIBUTE_MAPPING
 from auth_backends.adfs.base import BaseADFS
 
 
@@ -12,6 +13,8 @@ class HelsinkiLibraryAskoADFS(BaseADFS):
     resource = 'https://api.hel.fi/sso/asko_adfs'
     domain_uuid = uuid.UUID('5bf9cda1-7a62-47ca-92c1-824650f58467')
     realm = 'helsinki_asko'
+    attribute_mapping = HELSINKI_ATTRIBUTE_MAPPING
+    jwks_url = 'https://askofs.lib.hel.fi/adfs/discovery/keys'
     cert = ('MIIC2jCCAcKgAwIBAgIQJ9GFZkQxN7BE/s9i5wpdmDANBgkqhkiG9w0BAQsFAD'
             'ApMScwJQYDVQQDEx5BREZTIFNpZ25pbmcgLSBhZGZzLmFza28ubG9jYWwwHhcN'
             'MTgwOTI4MDc1MzExWhcNMTkwOTI4MDc1MzExWjApMScwJQYDVQQDEx5BREZTIF'
@@ -33,39 +36,3 @@ class HelsinkiLibraryAskoADFS(BaseADFS):
         params = super().auth_params(*args, **kwargs)
         params['prompt'] = 'login'
         return params
-
-    def clean_attributes(self, attrs_in):
-        attr_map = {
-            'primarysid': 'primary_sid',
-            'company': 'department_name',
-            'email': 'email',
-            'winaccountname': 'username',
-            'group': 'ad_groups',
-            'unique_name': 'last_first_name',
-            'given_name': 'first_name',
-            'family_name': 'last_name',
-        }
-
-        # Convert attribute names to lowercase
-        attrs_in = {k.lower(): v for k, v in attrs_in.items()}
-
-        attrs = {}
-        for in_name, out_name in attr_map.items():
-            val = attrs_in.get(in_name, None)
-            if val is not None:
-                if out_name in ('department_name', 'email', 'username'):
-                    val = val.lower()
-                attrs[out_name] = val
-            else:
-                print(in_name, 'not found in data')
-            attrs[out_name] = val
-
-        if 'last_first_name' in attrs:
-            names = attrs['last_first_name'].split(' ')
-            if 'first_name' not in attrs:
-                attrs['first_name'] = [names[0]]
-            if 'last_name' not in attrs:
-                attrs['last_name'] = [' '.join(names[1:])]
-            del attrs['last_first_name']
-
-        return attrs
@@ -0,0 +1,51 @@
+from auth_backends.adfs.attribute_mapping import (
+    ESPOO_ATTRIBUTE_MAPPING, HELSINKI_ATTRIBUTE_MAPPING, AttributeMapping, lowercase
+)
+
+
+def test_attribute_mapping_compiles_ops():
+    mapping = AttributeMapping({'Foo': 'foo', 'bar': ('baz', lowercase)}, case_insensitive=True)
+
+    assert mapping.ops == [('foo', 'foo', None), ('bar', 'baz', lowercase)]
+
+
+def test_helsinki_attribute_mapping():
+    groups = ['helsinki1\\Domain Users'] * 500
+    attrs = HELSINKI_ATTRIBUTE_MAPPING.map({
+        'primarysid': 'S-1-5-21',
+        'Company': 'KANSLIA',
+        'email': 'Mikko.Keskinen@hel.fi',
+        'winaccountname': 'ext-keskimi',
+        'unique_name': 'Keskinen Mikko',
+        'group': groups,
+        'family_name': 'Keskinen',
+        'role': ['ignored'],
+    })
+
+    assert attrs == {
+        'primary_sid': 'S-1-5-21',
+        'department_name': 'kanslia',
+        'email': 'mikko.keskinen@hel.fi',
+        'username': 'ext-keskimi',
+        'ad_groups': groups,
+        'first_name': None,
+        'last_name': 'Keskinen',
+    }
+    # the group list is passed through without copying
+    assert attrs['ad_groups'] is groups
+
+
+def test_espoo_attribute_mapping_is_case_sensitive():
+    attrs = ESPOO_ATTRIBUTE_MAPPING.map({
+        'primarysid': 'S-1-5-21',
+        'Given_Name': 'Mikko',
+        'family_name': 'Keskinen',
+        'email': 'Mikko.Keskinen@espoo.fi',
+    })
+
+    assert attrs == {
+        'primary_sid': 'S-1-5-21',
+        'first_name': None,
+        'last_name': 'Keskinen',
+        'email': 'mikko.keskinen@espoo.fi',
+    }
@@ -0,0 +1,66 @@
+import pytest
+from freezegun import freeze_time
+from jwt import DecodeError
+from social_django.utils import load_strategy
+
+from auth_backends.adfs.certificates import decode_token, get_signing_keys_for_token, load_signing_key
+from auth_backends.adfs.espoo import EspooADFS
+from auth_backends.adfs.helsinki import HelsinkiADFS
+
+from .test_helsinki_adfs_backend import ACCESS_TOKEN
+
+HELSINKI_CERT_THUMBPRINT = 'zfSYCe8XNzMbBKNlo-aTbgC9J5s'
+
+
+def test_load_signing_key():
+    thumbprint, public_key = load_signing_key(HelsinkiADFS.cert)
+
+    assert thumbprint == HELSINKI_CERT_THUMBPRINT
+    assert load_signing_key(HelsinkiADFS.cert)[1] is public_key
+
+
+def test_get_signing_keys_for_token_selects_by_x5t():
+    keys = get_signing_keys_for_token(ACCESS_TOKEN, (EspooADFS.cert, HelsinkiADFS.cert))
+
+    assert keys == [load_signing_key(HelsinkiADFS.cert)[1]]
+
+
+def test_get_signing_keys_for_token_skips_malformed_certs():
+    keys = get_signing_keys_for_token(ACCESS_TOKEN, ('bm90IGEgY2VydGlmaWNhdGU=', 'not base64', HelsinkiADFS.cert))
+
+    assert keys == [load_signing_key(HelsinkiADFS.cert)[1]]
+
+
+def test_get_signing_keys_for_token_unknown_x5t():
+    keys = get_signing_keys_for_token(ACCESS_TOKEN, (EspooADFS.cert,))
+
+    assert keys == [load_signing_key(EspooADFS.cert)[1]]
+
+
+@freeze_time('2017-12-15 12:25:55', tz_offset=2)
+@pytest.mark.parametrize('certs', (
+    (HelsinkiADFS.cert,),
+    (EspooADFS.cert, HelsinkiADFS.cert),
+    (HelsinkiADFS.cert, EspooADFS.cert),
+))
+def test_decode_token(certs):
+    payload = decode_token(ACCESS_TOKEN, certs, leeway=10)
+
+    assert payload['winaccountname'] == 'ext-keskimi'
+
+
+@freeze_time('2017-12-15 12:25:55', tz_offset=2)
+def test_decode_token_invalid_cert():
+    with pytest.raises(DecodeError):
+        decode_token(ACCESS_TOKEN, (EspooADFS.cert,), leeway=10)
+
+
+@freeze_time('2017-12-15 12:25:55', tz_offset=2)
+def test_backend_certificate_rollover(monkeypatch):
+    monkeypatch.setattr(HelsinkiADFS, 'extra_certs', (HelsinkiADFS.cert,))
+    monkeypatch.setattr(HelsinkiADFS, 'cert', EspooADFS.cert)
+
+    backend = HelsinkiADFS(load_strategy())
+    details = backend.get_user_details({'access_token': ACCESS_TOKEN})
+
+    assert details['username'] == 'ext-keskimi'
@@ -0,0 +1,143 @@
+import json
+import os
+import time
+
+import pytest
+from freezegun import freeze_time
+from social_django.utils import load_strategy
+
+from auth_backends.adfs.espoo import EspooADFS
+from auth_backends.adfs.helsinki import HelsinkiADFS
+from auth_backends.key_discovery import JWKSKeySet, get_discovered_certs, get_key_set, parse_jwks
+
+from .test_helsinki_adfs_backend import ACCESS_TOKEN
+
+JWKS_URL = 'https://idp.example.com/adfs/discovery/keys'
+
+
+def create_jwks(*certs):
+    return {
+        'keys': [
+            {'kty': 'RSA', 'use': 'sig', 'alg': 'RS256', 'x5c': [cert]} for cert in certs
+        ] + [
+            {'kty': 'RSA', 'use': 'enc', 'alg': 'RSA-OAEP', 'x5c': ['ignored']},
+        ]
+    }
+
+
+@pytest.fixture(autouse=True)
+def override_settings(settings, tmpdir):
+    settings.KEY_DISCOVERY_ENABLED = True
+    settings.KEY_DISCOVERY_CACHE_DIR = str(tmpdir)
+    settings.KEY_DISCOVERY_TTL = 60
+    settings.KEY_DISCOVERY_MAX_STALE = 60
+
+
+@pytest.fixture
+def jwks_server(httpretty):
+    httpretty.register_uri(httpretty.GET, JWKS_URL, body=json.dumps(create_jwks(HelsinkiADFS.cert)))
+    return httpretty
+
+
+def wait_for_refresh(key_set):
+    assert key_set._refresh_lock.acquire(timeout=5)
+    key_set._refresh_lock.release()
+
+
+def test_parse_jwks():
+    assert parse_jwks(create_jwks('cert1', 'cert2')) == ['cert1', 'cert2']
+
+
+def test_get_certs_cold_start_does_not_wait(jwks_server, tmpdir):
+    key_set = JWKSKeySet(JWKS_URL)
+
+    assert key_set.get_certs() == []
+
+    wait_for_refresh(key_set)
+    assert key_set.get_certs() == [HelsinkiADFS.cert]
+    assert len(tmpdir.listdir()) == 1
+
+
+def test_get_certs_from_disk_cache(jwks_server):
+    key_set = JWKSKeySet(JWKS_URL)
+    key_set.refresh()
+
+    jwks_server.reset()
+    jwks_server.enable()
+    jwks_server.allow_net_connect = False
+
+    assert JWKSKeySet(JWKS_URL).get_certs() == [HelsinkiADFS.cert]
+
+
+def test_get_certs_stale_while_revalidate(jwks_server):
+    key_set = JWKSKeySet(JWKS_URL)
+    key_set._set_certs([EspooADFS.cert], time.time() - 90)
+
+    assert key_set.get_certs() == [EspooADFS.cert]
+
+    wait_for_refresh(key_set)
+    assert key_set.get_certs() == [HelsinkiADFS.cert]
+
+
+def test_get_certs_too_stale(httpretty):
+    httpretty.register_uri(httpretty.GET, JWKS_URL, status=500)
+    key_set = JWKSKeySet(JWKS_URL)
+    key_set._set_certs([EspooADFS.cert], time.time() - 150)
+
+    assert key_set.get_certs() == []
+
+    wait_for_refresh(key_set)
+    assert key_set.get_certs() == []
+
+
+def test_refresh_failure_keeps_old_certs(httpretty):
+    httpretty.register_uri(httpretty.GET, JWKS_URL, status=500)
+    key_set = JWKSKeySet(JWKS_URL)
+    key_set._set_certs([EspooADFS.cert], time.time())
+
+    key_set.refresh()
+
+    assert key_set.get_certs() == [EspooADFS.cert]
+
+
+def test_refresh_failure_delays_retry(httpretty, settings):
+    settings.KEY_DISCOVERY_RETRY_INTERVAL = 60
+    httpretty.register_uri(httpretty.GET, JWKS_URL, status=500)
+    key_set = JWKSKeySet(JWKS_URL)
+
+    key_set.get_certs()
+    wait_for_refresh(key_set)
+    key_set.get_certs()
+    wait_for_refresh(key_set)
+    assert len(httpretty.latest_requests) == 1
+
+    key_set._failed_at -= 60
+    key_set.get_certs()
+    wait_for_refresh(key_set)
+    assert len(httpretty.latest_requests) == 2
+
+
+def test_disk_cache_disabled(jwks_server, settings, tmpdir):
+    settings.KEY_DISCOVERY_CACHE_DIR = None
+
+    JWKSKeySet(JWKS_URL).refresh()
+
+    assert not os.listdir(str(tmpdir))
+
+
+def test_key_discovery_disabled(settings):
+    settings.KEY_DISCOVERY_ENABLED = False
+
+    assert get_discovered_certs(JWKS_URL) == []
+
+
+@freeze_time('2017-12-15 12:25:55', tz_offset=2)
+def test_backend_uses_discovered_certs(monkeypatch):
+    monkeypatch.setattr(HelsinkiADFS, 'jwks_url', JWKS_URL)
+    get_key_set(JWKS_URL)._set_certs([HelsinkiADFS.cert], time.time())
+    monkeypatch.setattr(HelsinkiADFS, 'cert', EspooADFS.cert)
+
+    backend = HelsinkiADFS(load_strategy())
+    details = backend.get_user_details({'access_token': ACCESS_TOKEN})
+
+    assert details['username'] == 'ext-keskimi'
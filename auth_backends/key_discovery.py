@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_STALE = 7 * 24 * 60 * 60
+DEFAULT_RETRY_INTERVAL = 5 * 60
+FETCH_TIMEOUT = 10
+
+_key_sets = {}
+_key_sets_lock = threading.Lock()
+
+
+class JWKSKeySet:
+    """
+    Signing certificates of an identity provider, discovered from its JWKS endpoint.
+
+    The certificates are kept in memory and, if KEY_DISCOVERY_CACHE_DIR is set, on
+    disk so that they survive restarts. get_certs() never waits for the network:
+    stale certificates are returned while a background thread fetches new ones
+    (stale-while-revalidate), and when nothing is cached yet an empty list is
+    returned and the first fetch is started in the background. After a failed
+    fetch, the next one is started only after KEY_DISCOVERY_RETRY_INTERVAL
+    seconds.
+    """
+    def __init__(self, url):
+        self.url = url
+        self._certs = None
+        self._fetched_at = None
+        self._failed_at = None
+        self._refresh_lock = threading.Lock()
+
+    def get_certs(self):
+        if self._certs is None:
+            self._load_from_disk()
+
+        age = time.time() - self._fetched_at if self._fetched_at is not None else None
+
+        if (age is None or age >= self.ttl) and not self._is_retry_delayed():
+            self.refresh_in_background()
+
+        if age is None or age >= self.ttl + self.max_stale:
+            return []
+
+        return self._certs
+
+    def _is_retry_delayed(self):
+        return self._failed_at is not None and time.time() - self._failed_at < self.retry_interval
+
+    def refresh_in_background(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def refresh(self):
+        try:
+            response = requests.get(self.url, timeout=FETCH_TIMEOUT)
+            response.raise_for_status()
+            certs = parse_jwks(response.json())
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logger.warning('Cannot fetch signing keys from {}: {}'.format(self.url, e))
+            self._failed_at = time.time()
+            return
+
+        self._failed_at = None
+        self._set_certs(certs, time.time())
+        self._save_to_disk()
+
+    def _set_certs(self, certs, fetched_at):
+        self._certs = certs
+        self._fetched_at = fetched_at
+
+    def _get_cache_file_path(self):
+        cache_dir = getattr(settings, 'KEY_DISCOVERY_CACHE_DIR', None)
+        if not cache_dir:
+            return None
+        file_name = 'jwks-{}.json'.format(hashlib.sha1(self.url.encode('utf-8')).hexdigest())
+        return os.path.join(cache_dir, file_name)
+
+    def _load_from_disk(self):
+        path = self._get_cache_file_path()
+        if not path or not os.path.exists(path):
+            return
+
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            self._set_certs(data['certs'], data['fetched_at'])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning('Cannot read cached signing keys from {}: {}'.format(path, e))
+
+    def _save_to_disk(self):
+        path = self._get_cache_file_path()
+        if not path:
+            return
+
+        data = {'url': self.url, 'fetched_at': self._fetched_at, 'certs': self._certs}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), delete=False) as f:
+                json.dump(data, f)
+            os.replace(f.name, path)
+        except OSError as e:
+            logger.warning('Cannot write cached signing keys to {}: {}'.format(path, e))
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'KEY_DISCOVERY_TTL', DEFAULT_TTL)
+
+    @property
+    def max_stale(self):
+        return getattr(settings, 'KEY_DISCOVERY_MAX_STALE', DEFAULT_MAX_STALE)
+
+    @property
+    def retry_interval(self):
+        return getattr(settings, 'KEY_DISCOVERY_RETRY_INTERVAL', DEFAULT_RETRY_INTERVAL)
+
+
+def parse_jwks(jwks):
+    """Return the base64 encoded DER certificates of the signing keys in a JWKS document."""
+    return [
+        key['x5c'][0] for key in jwks['keys']
+        if key.get('use', 'sig') == 'sig' and key.get('x5c')
+    ]
+
+
+def get_key_set(url):
+    with _key_sets_lock:
+        if url not in _key_sets:
+            _key_sets[url] = JWKSKeySet(url)
+        return _key_sets[url]
+
+
+def get_discovered_certs(url):
+    """Return the currently known signing certificates from the given JWKS URL.
+
+    Returns an empty list when key discovery is disabled with the KEY_DISCOVERY_ENABLED setting.
+    """
+    if not url or not getattr(settings, 'KEY_DISCOVERY_ENABLED', False):
+        return []
+    return get_key_set(url).get_certs()
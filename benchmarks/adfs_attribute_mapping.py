@@ -0,0 +1,42 @@
+"""
+Benchmark ADFS claim mapping with large AD group claims.
+
+Usage: python -m benchmarks.adfs_attribute_mapping [--groups N] [--number N]
+"""
+import argparse
+import timeit
+
+from auth_backends.adfs.attribute_mapping import ESPOO_ATTRIBUTE_MAPPING, HELSINKI_ATTRIBUTE_MAPPING
+
+
+def create_claims(group_count):
+    return {
+        'aud': 'https://api.hel.fi/sso/adfs',
+        'iss': 'http://fs.hel.fi/adfs/services/trust',
+        'primarysid': 'S-1-5-21-21656339-4055342465-2016908541-352157',
+        'Company': 'KANSLIA',
+        'email': 'Firstname.Lastname@hel.fi',
+        'winaccountname': 'ext-lastnafi',
+        'unique_name': 'Lastname Firstname',
+        'given_name': 'Firstname',
+        'family_name': 'Lastname',
+        'group': ['helsinki1\\Group {}'.format(i) for i in range(group_count)],
+        'role': ['CN=Group {},OU=Groups,DC=helsinki1,DC=hki,DC=local'.format(i) for i in range(group_count)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--groups', type=int, default=500, help='number of AD groups in the claims')
+    parser.add_argument('--number', type=int, default=10000, help='number of mappings per measurement')
+    args = parser.parse_args()
+
+    claims = create_claims(args.groups)
+
+    for name, mapping in (('helsinki', HELSINKI_ATTRIBUTE_MAPPING), ('espoo', ESPOO_ATTRIBUTE_MAPPING)):
+        best = min(timeit.repeat(lambda: mapping.map(claims), number=args.number, repeat=5))
+        print('{:<10} {} groups: {:.2f} us per login'.format(name, args.groups, best / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+"""
+Seed a database with realistic data volumes for the benchmarks.
+
+The large tables (users, tokens, login entries, consents) are filled with
+bulk inserts in batches, so that millions of rows can be created without
+keeping them in memory. Use a dedicated database, as the data is never
+removed.
+"""
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import timedelta
+from itertools import islice
+
+from allauth.account.models import EmailAddress
+from django.db import connection, transaction
+from django.utils import timezone
+from helusers.models import ADGroup
+from jwcrypto import jwe, jwk, jws
+from jwcrypto.common import json_encode
+from oauth2_provider.models import AccessToken
+from oidc_provider.models import Client, Token, UserConsent
+
+from devices.models import InterfaceDevice, UserDevice
+from identities.models import UserIdentity
+from oidc_apis.models import Api, ApiDomain, ApiScope
+from services.models import Service
+from users.models import Application, ApplicationAuthorization, User, UserLoginEntry
+
+BATCH_SIZE = 10000
+LANGUAGES = ('fi', 'sv', 'en')
+OIDC_SCOPES = ['openid', 'profile', 'email', 'login_entries', 'consents', 'identities']
+
+
+def log(message):
+    sys.stderr.write(message + '\n')
+
+
+def bulk_create_in_batches(model, objects, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Create the objects of the iterable in batches and return the created objects' ids.
+
+    on_batch is called with each created batch, e.g. for creating related objects.
+    """
+    objects = iter(objects)
+    ids = []
+    for batch in iter(lambda: list(islice(objects, batch_size)), []):
+        with transaction.atomic():
+            batch = model.objects.bulk_create(batch)
+            if on_batch:
+                on_batch(batch)
+        ids.extend(obj.pk for obj in batch)
+        log('{}: {} rows created'.format(model._meta.label, len(ids)))
+    return ids
+
+
+def create_service(index, **kwargs):
+    service = Service(**kwargs)
+    for language in LANGUAGES:
+        service.set_current_language(language)
+        service.name = 'Benchmark service {} ({})'.format(index, language)
+        service.description = 'Description of benchmark service {}'.format(index)
+        service.url = 'https://service{}.example.com/'.format(index)
+    service.save()
+    return service
+
+
+def create_clients(count):
+    clients = []
+    for i in range(count):
+        client = Client.objects.create(
+            name='Benchmark client {}'.format(i),
+            client_id=str(uuid.uuid4()),
+            client_secret=str(uuid.uuid4()),
+            client_type='confidential',
+            response_type='code',
+            redirect_uris=['https://client{}.example.com/callback'.format(i)],
+            require_consent=False,
+        )
+        create_service(i, client=client)
+        clients.append(client)
+    return clients
+
+
+def create_applications(count):
+    applications = []
+    for i in range(count):
+        application = Application.objects.create(
+            name='Benchmark application {}'.format(i),
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_AUTHORIZATION_CODE,
+            redirect_uris='https://application{}.example.com/callback'.format(i),
+            skip_authorization=True,
+            include_ad_groups=True,
+        )
+        create_service(i, application=application)
+        applications.append(application)
+    return applications
+
+
+def create_api_scopes(api_count, scopes_per_api, allowed_clients):
+    domain, _ = ApiDomain.objects.get_or_create(identifier='https://api.example.com/')
+    api_scopes = []
+    for i in range(api_count):
+        api = Api.objects.create(domain=domain, name='benchmark{}{}'.format(i, uuid.uuid4().hex[:8]),
+                                 required_scopes=['email', 'profile'])
+        for j in range(scopes_per_api):
+            api_scope = ApiScope(api=api, specifier='scope{}'.format(j) if j else '')
+            api_scope.identifier = api_scope._generate_identifier()
+            for language in LANGUAGES:
+                api_scope.set_current_language(language)
+                api_scope.name = 'Scope {} of API {} ({})'.format(j, i, language)
+                api_scope.description = 'Gives access to the data of API {}'.format(i)
+            api_scope.save()
+            api_scope.allowed_apps.set(allowed_clients)
+            api_scopes.append(api_scope)
+    return api_scopes
+
+
+def create_users(count):
+    def users():
+        for i in range(count):
+            user_uuid = uuid.uuid4()
+            yield User(
+                username='benchmark-{}'.format(user_uuid.hex),
+                uuid=user_uuid,
+                # Bulk inserts skip User.save(), which fills in the unique primary SID
+                primary_sid=str(user_uuid),
+                email='user-{}@example.com'.format(user_uuid.hex),
+                first_name='First{}'.format(i),
+                last_name='Last{}'.format(i),
+                password='!',
+            )
+
+    def create_email_addresses(users):
+        EmailAddress.objects.bulk_create(
+            EmailAddress(user=user, email=user.email, primary=True, verified=True) for user in users
+        )
+
+    return bulk_create_in_batches(User, users(), on_batch=create_email_addresses)
+
+
+def create_oidc_tokens(count, user_ids, clients, scope=OIDC_SCOPES):
+    expires_at = timezone.now() + timedelta(days=1)
+    return bulk_create_in_batches(Token, (
+        Token(
+            user_id=random.choice(user_ids),
+            client=random.choice(clients),
+            access_token=uuid.uuid4().hex,
+            refresh_token=uuid.uuid4().hex,
+            _id_token='{}',
+            _scope=' '.join(scope),
+            expires_at=expires_at,
+        )
+        for i in range(count)
+    ))
+
+
+def create_access_tokens(count, user_ids, applications):
+    expires = timezone.now() + timedelta(days=1)
+    pairs = set()
+
+    def access_tokens():
+        for i in range(count):
+            user_id = random.choice(user_ids)
+            application = random.choice(applications)
+            pairs.add((user_id, application.id))
+            yield AccessToken(
+                user_id=user_id, application=application, token=uuid.uuid4().hex, expires=expires, scope='read write'
+            )
+
+    ids = bulk_create_in_batches(AccessToken, access_tokens())
+    # Bulk inserts don't send the signals which track the authorizations
+    existing_pairs = set(ApplicationAuthorization.objects.values_list('user_id', 'application_id'))
+    bulk_create_in_batches(ApplicationAuthorization, (
+        ApplicationAuthorization(user_id=user_id, application_id=application_id)
+        for user_id, application_id in pairs - existing_pairs
+    ))
+    return ids
+
+
+def create_login_entries(count, user_ids, services):
+    now = timezone.now()
+    return bulk_create_in_batches(UserLoginEntry, (
+        UserLoginEntry(
+            user_id=random.choice(user_ids),
+            service=random.choice(services),
+            timestamp=now - timedelta(seconds=random.randint(0, 365 * 24 * 3600)),
+            ip_address='10.{}.{}.{}'.format(random.randint(0, 255), random.randint(0, 255), random.randint(1, 254)),
+            geo_location={'country': 'FI', 'city': 'Helsinki'},
+        )
+        for i in range(count)
+    ))
+
+
+def create_consents(consents_per_user, user_ids, clients):
+    date_given = timezone.now()
+
+    def consents():
+        for user_id in user_ids:
+            for client in random.sample(clients, min(consents_per_user, len(clients))):
+                yield UserConsent(
+                    user_id=user_id, client=client, date_given=date_given,
+                    expires_at=date_given + timedelta(days=365), _scope=' '.join(OIDC_SCOPES),
+                )
+
+    return bulk_create_in_batches(UserConsent, consents())
+
+
+def analyze(models):
+    """Update the table statistics, which the estimated row counts are read from."""
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute('ANALYZE {}'.format(connection.ops.quote_name(model._meta.db_table)))
+
+
+def seed(users, clients, applications, apis, scopes_per_api, tokens, access_tokens, login_entries, consents_per_user):
+    start = time.perf_counter()
+
+    client_objects = create_clients(clients)
+    application_objects = create_applications(applications)
+    create_api_scopes(apis, scopes_per_api, client_objects)
+    user_ids = create_users(users)
+    create_oidc_tokens(tokens, user_ids, client_objects)
+    create_access_tokens(access_tokens, user_ids, application_objects)
+    services = list(Service.objects.all())
+    create_login_entries(login_entries, user_ids, services)
+    create_consents(consents_per_user, user_ids, client_objects)
+    analyze((Client, Application, ApiScope, User, EmailAddress, Token, AccessToken, ApplicationAuthorization,
+             UserLoginEntry, UserConsent))
+
+    log('Seeded in {:.0f} s'.format(time.perf_counter() - start))
+
+
+class BenchmarkUser(object):
+    """
+    A user with the tokens needed for calling each benchmarked endpoint.
+
+    The user has login entries, consents and AD groups like a heavy real
+    user, and the OIDC token has every API scope allowed for its client.
+    """
+    def __init__(self, login_entries=1000, consents=20, ad_groups=50):
+        self.user = User.objects.create(
+            username='benchmark-{}'.format(uuid.uuid4().hex), email='benchmark@example.com',
+            first_name='Benchmark', last_name='User',
+        )
+        EmailAddress.objects.create(user=self.user, email=self.user.email, primary=True, verified=True)
+        self.user.ad_groups.set([
+            ADGroup.objects.get_or_create(name='benchmark\\group {}'.format(i), defaults={
+                'display_name': 'Group {}'.format(i),
+            })[0]
+            for i in range(ad_groups)
+        ])
+
+        clients = list(Client.objects.filter(service__isnull=False)[:consents])
+        if not clients:
+            clients = create_clients(consents)
+        self.client = clients[0]
+        api_scopes = list(ApiScope.objects.filter(allowed_apps=self.client).values_list('identifier', flat=True))
+        self.oidc_scope = OIDC_SCOPES + api_scopes
+        self.oidc_token = Token.objects.get(pk=self._create_oidc_token_ids(1)[0])
+        create_consents(consents, [self.user.id], clients)
+        create_login_entries(login_entries, [self.user.id], [self.client.service])
+
+        self.application = Application.objects.filter(include_ad_groups=True).first() or create_applications(1)[0]
+        self.access_token = AccessToken.objects.get(pk=self._create_access_token_ids(1)[0])
+
+        # A user can have only one identity of each service
+        UserIdentity.objects.create(user=self.user, service=UserIdentity.SERVICE_HELMET, identifier='1')
+        self._create_devices()
+
+    def _create_oidc_token_ids(self, count):
+        return create_oidc_tokens(count, [self.user.id], [self.client], scope=self.oidc_scope)
+
+    def _create_access_token_ids(self, count):
+        return create_access_tokens(count, [self.user.id], [self.application])
+
+    def _create_devices(self):
+        self.enc_key = jwk.JWK.generate(kty='oct', size=256)
+        self.sign_key = jwk.JWK.generate(kty='EC', crv='P-256')
+        self.user_device = UserDevice.objects.create(
+            user=self.user,
+            secret_key=json.loads(self.enc_key.export()),
+            public_key=json.loads(self.sign_key.export_public()),
+            app_version='1.0.0',
+            os=UserDevice.OS_ANDROID,
+            os_version='9',
+        )
+        self.interface_device = InterfaceDevice.objects.create(
+            secret_key=str(uuid.uuid4()), scopes='read:identities:helmet'
+        )
+
+    def get_oidc_headers(self):
+        return {'HTTP_AUTHORIZATION': 'Bearer {}'.format(self.oidc_token.access_token)}
+
+    def get_access_token_headers(self):
+        return {'HTTP_AUTHORIZATION': 'Bearer {}'.format(self.access_token.token)}
+
+    def create_oidc_headers(self, count):
+        """Return the headers of count new OIDC tokens, for requests which miss the per-token caches."""
+        tokens = Token.objects.filter(pk__in=self._create_oidc_token_ids(count)).values_list('access_token', flat=True)
+        return [{'HTTP_AUTHORIZATION': 'Bearer {}'.format(token)} for token in tokens]
+
+    def create_access_token_headers(self, count):
+        """Return the headers of count new OAuth2 tokens, for requests which miss the per-token caches."""
+        tokens = AccessToken.objects.filter(pk__in=self._create_access_token_ids(count)).values_list('token', flat=True)
+        return [{'HTTP_AUTHORIZATION': 'Bearer {}'.format(token)} for token in tokens]
+
+    def get_device_jwt_headers(self, auth_counter):
+        """Return the headers with a device-generated JWT, which is valid for a single request."""
+        payload = {
+            'iss': str(self.user_device.id),
+            'cnt': auth_counter,
+            'azp': str(self.interface_device.id),
+            'sub': str(self.user.uuid),
+            'iat': int(time.time()),
+            'nonce': uuid.uuid4().int % 10 ** 15,
+        }
+        jws_token = jws.JWS(json_encode(payload))
+        jws_token.add_signature(self.sign_key, None, json_encode({'alg': 'ES256'}))
+        header = {'alg': 'A256KW', 'enc': 'A128CBC-HS256', 'iss': str(self.user_device.id)}
+        jwe_token = jwe.JWE(jws_token.serialize(compact=True), json_encode(header))
+        jwe_token.add_recipient(self.enc_key)
+        return {
+            'HTTP_AUTHORIZATION': 'Bearer {}'.format(jwe_token.serialize(compact=True)),
+            'HTTP_X_INTERFACE_DEVICE_SECRET': self.interface_device.secret_key,
+        }
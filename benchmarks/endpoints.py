@@ -0,0 +1,203 @@
+"""
+Benchmark the token and API endpoints.
+
+Measures the throughput and the p50/p99 latencies of the endpoints by
+calling them in-process with the Django test client, against the database
+of the given settings. Use a dedicated database, as the benchmark creates
+data, and seed it first with realistic volumes with --seed.
+
+Usage: python -m benchmarks.endpoints [--seed] [--requests N] [--output FILE] [--compare FILE]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import django
+
+ENDPOINTS = (
+    # name, path, headers
+    ('user_login_entry', '/v1/user_login_entry/', 'oidc'),
+    ('user_consent', '/v1/user_consent/?include=scope', 'oidc'),
+    ('service', '/v1/service/', 'oidc'),
+    ('scope', '/v1/scope/', None),
+    ('api_tokens', '/api-tokens/', 'oidc'),
+    ('userinfo', '/openid/userinfo', 'oidc'),
+    ('userinfo_cached', '/openid/userinfo', 'oidc_cached'),
+    ('jwt_token', '/jwt-token/', 'access_token'),
+    ('jwt_token_cached', '/jwt-token/', 'access_token_cached'),
+    ('user_identity_device_jwt', '/v1/user_identity/', 'device_jwt'),
+)
+
+
+def percentile(sorted_values, percent):
+    """Return the nearest-rank percentile of the sorted values."""
+    index = max(int(math.ceil(percent / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[index]
+
+
+def get_headers(benchmark_user, kind, count):
+    """
+    Return a function which returns the request headers for the nth request.
+
+    The userinfo and JWT responses are cached per token, so each request
+    gets a new token, except with the _cached kinds which reuse one token
+    to measure the cache hits.
+    """
+    if kind == 'oidc':
+        headers = benchmark_user.create_oidc_headers(count)
+        return lambda n: headers[n - 1]
+    if kind == 'oidc_cached':
+        headers = benchmark_user.get_oidc_headers()
+        return lambda n: headers
+    if kind == 'access_token':
+        headers = benchmark_user.create_access_token_headers(count)
+        return lambda n: headers[n - 1]
+    if kind == 'access_token_cached':
+        headers = benchmark_user.get_access_token_headers()
+        return lambda n: headers
+    if kind == 'device_jwt':
+        return benchmark_user.get_device_jwt_headers
+    return lambda n: {}
+
+
+def measure(client, path, get_request_headers, requests, warmup):
+    # Device-generated JWTs are valid for a single request, so they are
+    # created before the measurement with increasing auth counters.
+    headers = [get_request_headers(n) for n in range(1, warmup + requests + 1)]
+    for n in range(warmup):
+        client.get(path, **headers[n])
+
+    durations = []
+    status_codes = Counter()
+    start = time.perf_counter()
+    for n in range(warmup, warmup + requests):
+        request_start = time.perf_counter()
+        response = client.get(path, **headers[n])
+        durations.append(time.perf_counter() - request_start)
+        status_codes[str(response.status_code)] += 1
+    total = time.perf_counter() - start
+
+    durations.sort()
+    return {
+        'requests': requests,
+        'throughput': requests / total,
+        'mean_ms': sum(durations) / requests * 1000,
+        'p50_ms': percentile(durations, 50) * 1000,
+        'p99_ms': percentile(durations, 99) * 1000,
+        'status_codes': dict(status_codes),
+    }
+
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_data_volumes():
+    from oauth2_provider.models import AccessToken
+    from oidc_provider.models import Client, Token, UserConsent
+
+    from oidc_apis.models import ApiScope
+    from tunnistamo.admin_search import get_estimated_count
+    from users.models import User, UserLoginEntry
+
+    # The large tables are counted from the table statistics, as counting them would take long
+    return {
+        model._meta.label: get_estimated_count(model, 'default')
+        for model in (User, Client, ApiScope, Token, AccessToken, UserLoginEntry, UserConsent)
+    }
+
+
+def print_results(results, previous_results=None):
+    print('{:<26} {:>10} {:>10} {:>10}  {}'.format('endpoint', 'req/s', 'p50 ms', 'p99 ms', 'status codes'))
+    for name, result in results['results'].items():
+        line = '{:<26} {:>10.1f} {:>10.2f} {:>10.2f}  {}'.format(
+            name, result['throughput'], result['p50_ms'], result['p99_ms'], result['status_codes']
+        )
+        previous = (previous_results or {}).get('results', {}).get(name)
+        if previous:
+            line += '  (p50 {:+.0%}, p99 {:+.0%} vs. {})'.format(
+                result['p50_ms'] / previous['p50_ms'] - 1, result['p99_ms'] / previous['p99_ms'] - 1,
+                previous_results.get('git_commit') or previous_results['timestamp'],
+            )
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', action='store_true', help='seed the database before the benchmark')
+    parser.add_argument('--users', type=int, default=100000, help='number of users to seed')
+    parser.add_argument('--clients', type=int, default=50, help='number of OIDC clients to seed')
+    parser.add_argument('--applications', type=int, default=10, help='number of OAuth2 applications to seed')
+    parser.add_argument('--apis', type=int, default=20, help='number of APIs to seed')
+    parser.add_argument('--scopes-per-api', type=int, default=5, help='number of scopes per API to seed')
+    parser.add_argument('--tokens', type=int, default=1000000, help='number of OIDC tokens to seed')
+    parser.add_argument('--access-tokens', type=int, default=1000000, help='number of OAuth2 tokens to seed')
+    parser.add_argument('--login-entries', type=int, default=2000000, help='number of login entries to seed')
+    parser.add_argument('--consents-per-user', type=int, default=3, help='number of consents per user to seed')
+    parser.add_argument('--requests', type=int, default=500, help='number of measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=20, help='number of unmeasured requests per endpoint')
+    parser.add_argument('--endpoint', action='append', choices=[name for name, path, headers in ENDPOINTS],
+                        help='benchmark only the given endpoint, can be repeated')
+    parser.add_argument('--output', help='write the results as JSON to the file')
+    parser.add_argument('--compare', help='compare the results to an earlier JSON results file')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tunnistamo.settings')
+    django.setup()
+
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    from benchmarks.data import BenchmarkUser, seed
+
+    # Allow the test client's host name, without recording the queries as with DEBUG
+    setup_test_environment(debug=False)
+
+    if args.seed:
+        seed(
+            users=args.users, clients=args.clients, applications=args.applications, apis=args.apis,
+            scopes_per_api=args.scopes_per_api, tokens=args.tokens, access_tokens=args.access_tokens,
+            login_entries=args.login_entries, consents_per_user=args.consents_per_user,
+        )
+
+    benchmark_user = BenchmarkUser()
+    client = Client()
+
+    results = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'git_commit': get_git_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'data': get_data_volumes(),
+        'results': {},
+    }
+    for name, path, headers in ENDPOINTS:
+        if args.endpoint and name not in args.endpoint:
+            continue
+        sys.stderr.write('Benchmarking {}\n'.format(path))
+        get_request_headers = get_headers(benchmark_user, headers, args.warmup + args.requests)
+        results['results'][name] = measure(client, path, get_request_headers, args.requests, args.warmup)
+
+    previous_results = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous_results = json.load(f)
+    print_results(results, previous_results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
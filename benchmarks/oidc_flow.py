@@ -0,0 +1,218 @@
+"""
+Load test the OIDC authorization code flow.
+
+Runs complete logins concurrently: authorize, the login page, a social
+login with a stub backend through the social auth pipeline, consent,
+token, api-tokens and userinfo. Reports the latency and the number of
+SQL queries of each stage. Like a morning login peak, the logins are
+spread over a pool of users, so that the first login of each user
+creates it and the later ones log in an existing user.
+
+Use a dedicated database, as users, tokens and login entries are created.
+
+Usage: python -m benchmarks.oidc_flow [--logins N] [--concurrency N] [--users N] [--output FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import django
+
+from benchmarks.endpoints import get_git_commit, percentile
+
+STUB_BACKEND = 'benchmarks.stub_backend.StubBackend'
+REDIRECT_URI = 'https://loadtest.example.com/callback'
+
+
+class StageFailed(Exception):
+    pass
+
+
+class FlowRunner(object):
+    def __init__(self, client, api_scope, users):
+        self.client = client
+        self.api_scope = api_scope
+        self.users = users
+        self.uid_prefix = uuid.uuid4().hex[:8]
+        self.stages = defaultdict(lambda: {'durations': [], 'queries': []})
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def run_stage(self, name, expected_status, request):
+        from tunnistamo.query_budget import count_queries
+
+        start = time.perf_counter()
+        with count_queries() as counter:
+            response = request()
+        duration = time.perf_counter() - start
+
+        with self.lock:
+            if response.status_code not in expected_status:
+                self.errors[name] += 1
+                raise StageFailed('{}: unexpected status {}'.format(name, response.status_code))
+            self.stages[name]['durations'].append(duration)
+            self.stages[name]['queries'].append(counter.count)
+        return response
+
+    def run(self, index):
+        from django.db import connections
+        from django.test import Client
+
+        client = Client()
+        params = {
+            'client_id': self.client.client_id,
+            'redirect_uri': REDIRECT_URI,
+            'response_type': 'code',
+            'scope': 'openid profile email {}'.format(self.api_scope.identifier),
+            'state': uuid.uuid4().hex,
+            'nonce': uuid.uuid4().hex,
+        }
+        authorize_url = '/openid/authorize?' + urlencode(params)
+        uid = '{}-{}'.format(self.uid_prefix, index % self.users)
+
+        try:
+            response = self.run_stage('authorize', {302}, lambda: client.get(authorize_url))
+            self.run_stage('login_page', {200, 302}, lambda: client.get(response['Location']))
+            begin_url = '/accounts/login/{}/?{}'.format('benchmark_stub', urlencode({
+                'next': authorize_url, 'uid': uid,
+            }))
+            response = self.run_stage('login_begin', {302}, lambda: client.get(begin_url))
+            self.run_stage('login_complete', {302}, lambda: client.get(response['Location']))
+            self.run_stage('consent_page', {200}, lambda: client.get(authorize_url))
+            response = self.run_stage(
+                'consent', {302}, lambda: client.post('/openid/authorize', dict(params, allow='Accept'))
+            )
+            code = parse_qs(urlparse(response['Location']).query)['code'][0]
+            response = self.run_stage('token', {200}, lambda: client.post('/openid/token', {
+                'grant_type': 'authorization_code',
+                'code': code,
+                'redirect_uri': REDIRECT_URI,
+                'client_id': self.client.client_id,
+                'client_secret': self.client.client_secret,
+            }))
+            headers = {'HTTP_AUTHORIZATION': 'Bearer {}'.format(response.json()['access_token'])}
+            self.run_stage('api_tokens', {200}, lambda: client.get('/api-tokens/', **headers))
+            self.run_stage('userinfo', {200}, lambda: client.get('/openid/userinfo', **headers))
+        except StageFailed as e:
+            sys.stderr.write('Login {} failed at {}\n'.format(index, e))
+        finally:
+            connections.close_all()
+
+    def get_results(self):
+        results = {}
+        for name, stage in self.stages.items():
+            durations = sorted(stage['durations'])
+            queries = stage['queries']
+            results[name] = {
+                'requests': len(durations),
+                'errors': self.errors[name],
+                'mean_ms': sum(durations) / len(durations) * 1000,
+                'p50_ms': percentile(durations, 50) * 1000,
+                'p99_ms': percentile(durations, 99) * 1000,
+                'mean_queries': sum(queries) / len(queries),
+                'max_queries': max(queries),
+            }
+        return results
+
+
+def create_client():
+    from oidc_provider.models import Client
+
+    from oidc_apis.models import Api, ApiDomain, ApiScope
+    from services.models import Service
+
+    client = Client.objects.create(
+        name='Load test client',
+        client_id=str(uuid.uuid4()),
+        client_secret=uuid.uuid4().hex,
+        client_type='confidential',
+        response_type='code',
+        redirect_uris=[REDIRECT_URI],
+        require_consent=True,
+        reuse_consent=False,
+    )
+    # The login entries are written for the service of the client
+    service = Service(client=client)
+    service.set_current_language('fi')
+    service.name = 'Load test service'
+    service.save()
+
+    domain, _ = ApiDomain.objects.get_or_create(identifier='https://api.example.com/')
+    api = Api.objects.create(domain=domain, name='loadtest{}'.format(uuid.uuid4().hex[:8]),
+                             required_scopes=['email', 'profile'])
+    api_scope = ApiScope(api=api, specifier='')
+    api_scope.identifier = api_scope._generate_identifier()
+    api_scope.set_current_language('fi')
+    api_scope.name = 'Load test API'
+    api_scope.description = 'Load test API scope'
+    api_scope.save()
+    api_scope.allowed_apps.add(client)
+
+    return client, api_scope
+
+
+def print_results(results):
+    print('{:<16} {:>8} {:>7} {:>9} {:>9} {:>9}'.format('stage', 'requests', 'errors', 'p50 ms', 'p99 ms', 'queries'))
+    for name, stage in results['stages'].items():
+        print('{:<16} {:>8} {:>7} {:>9.2f} {:>9.2f} {:>9.1f}'.format(
+            name, stage['requests'], stage['errors'], stage['p50_ms'], stage['p99_ms'], stage['mean_queries']
+        ))
+    print('{:.1f} logins/s'.format(results['logins_per_second']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=200, help='number of logins')
+    parser.add_argument('--concurrency', type=int, default=8, help='number of concurrent logins')
+    parser.add_argument('--users', type=int, default=100, help='number of distinct users logging in')
+    parser.add_argument('--output', help='write the results as JSON to the file')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tunnistamo.settings')
+    from django.conf import settings
+
+    # social_django reads the backends when it is imported, so they are set before the setup
+    settings.AUTHENTICATION_BACKENDS = (STUB_BACKEND,) + tuple(settings.AUTHENTICATION_BACKENDS)
+    django.setup()
+
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment(debug=False)
+
+    client, api_scope = create_client()
+    runner = FlowRunner(client, api_scope, args.users)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(runner.run, range(args.logins)))
+    total = time.perf_counter() - start
+
+    results = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'git_commit': get_git_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'logins': args.logins,
+        'concurrency': args.concurrency,
+        'users': args.users,
+        'logins_per_second': len(runner.stages['userinfo']['durations']) / total,
+        'stages': runner.get_results(),
+    }
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
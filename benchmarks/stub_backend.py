@@ -0,0 +1,33 @@
+from urllib.parse import urlencode
+
+from social_core.backends.base import BaseAuth
+
+
+class StubBackend(BaseAuth):
+    """
+    Social auth backend which logs in without an external identity provider.
+
+    The login redirects straight to the complete view, which runs the
+    social auth pipeline for the user given with the uid parameter. Only
+    for load testing, never add it to the authentication backends of a
+    real deployment.
+    """
+    name = 'benchmark_stub'
+    ID_KEY = 'uid'
+
+    def auth_url(self):
+        return '{}?{}'.format(self.redirect_uri, urlencode({'uid': self.data['uid']}))
+
+    def auth_complete(self, *args, **kwargs):
+        response = {'uid': self.data['uid']}
+        kwargs.update({'response': response, 'backend': self})
+        return self.strategy.authenticate(*args, **kwargs)
+
+    def get_user_details(self, response):
+        uid = response['uid']
+        return {
+            'username': uid,
+            'email': '{}@example.com'.format(uid),
+            'first_name': 'Load',
+            'last_name': 'Test {}'.format(uid),
+        }
@@ -0,0 +1 @@
+pytest_plugins = ['tunnistamo.pytest_plugin']
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class HkiJwtConfig(AppConfig):
+    name = 'hkijwt'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa
@@ -0,0 +1,67 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from hkijwt.models import AppToAppPermission
+
+APP_TO_APP_PERMISSIONS_VERSION_CACHE_KEY = 'app_to_app_permissions_version'
+
+# Without a cache shared by the processes, a change is noticed by the other
+# processes only when the version expires
+DEFAULT_APP_TO_APP_PERMISSIONS_VERSION_TIMEOUT = 60
+
+# The latest permission map loaded by this process
+_permission_map = None
+
+
+class AppToAppPermissionMap:
+    """
+    All app-to-app permissions as a set of (requester application id, target client id) pairs.
+    """
+    def __init__(self, version):
+        self.version = version
+        self.permissions = set(AppToAppPermission.objects.values_list('requester_id', 'target__client_id'))
+
+    def is_permitted(self, requester_id, target_client_id):
+        return (requester_id, target_client_id) in self.permissions
+
+
+def get_version_timeout():
+    return getattr(
+        settings, 'APP_TO_APP_PERMISSIONS_VERSION_TIMEOUT', DEFAULT_APP_TO_APP_PERMISSIONS_VERSION_TIMEOUT
+    )
+
+
+def get_app_to_app_permissions_version():
+    """
+    Return the version of the app-to-app permissions and the applications.
+
+    The version changes when either changes, and at the latest after
+    APP_TO_APP_PERMISSIONS_VERSION_TIMEOUT seconds.
+    """
+    version = cache.get(APP_TO_APP_PERMISSIONS_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(APP_TO_APP_PERMISSIONS_VERSION_CACHE_KEY, uuid.uuid4().hex, get_version_timeout())
+        version = cache.get(APP_TO_APP_PERMISSIONS_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_app_to_app_permissions():
+    cache.set(APP_TO_APP_PERMISSIONS_VERSION_CACHE_KEY, uuid.uuid4().hex, get_version_timeout())
+
+
+def get_app_to_app_permission_map():
+    """
+    Return the current AppToAppPermissionMap.
+
+    The map is kept in memory and reloaded when the version in the cache
+    has been changed by a signal, possibly in another process, or has
+    expired.
+    """
+    global _permission_map
+
+    version = get_app_to_app_permissions_version()
+    if _permission_map is None or _permission_map.version != version:
+        _permission_map = AppToAppPermissionMap(version)
+    return _permission_map
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from hkijwt.models import AppToAppPermission
+from hkijwt.permissions import invalidate_app_to_app_permissions
+from users.models import Application
+
+
+@receiver(post_save, sender=AppToAppPermission)
+@receiver(post_delete, sender=AppToAppPermission)
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def handle_app_to_app_permission_change(sender, **kwargs):
+    invalidate_app_to_app_permissions()
@@ -11,8 +11,9 @@ from tunnistamo.api_common import (
     DeviceGeneratedJWTAuthentication, OidcTokenAuthentication, ScopePermission, get_scope_specifiers
 )
 
-from .helmet_requests import (
-    HelmetConnectionException, HelmetGeneralException, HelmetImproperlyConfiguredException, validate_patron
+from .backends import (
+    IdentityValidationError, IdentityValidationImproperlyConfigured, IdentityValidationUnavailable,
+    validate_credentials
 )
 from .models import UserIdentity
 
@@ -30,20 +31,21 @@ class ThirdPartyAuthenticationFailed(APIException):
     status_code = 401
 
 
-def validate_credentials_helmet(identifier, secret):
+def check_credentials(service, identifier, secret):
+    """Validate the credentials, raising an API exception if they are invalid or cannot be validated."""
     try:
-        result = validate_patron(identifier, secret)
-    except HelmetImproperlyConfiguredException as e:
+        result = validate_credentials(service, identifier, secret)
+    except IdentityValidationImproperlyConfigured as e:
         logger.error(e)
         raise NotImplementedResponse()
-    except HelmetConnectionException as e:
-        logger.warning('Cannot validate patron from helmet, got connection exception: {}'.format(e))
+    except IdentityValidationUnavailable as e:
+        logger.warning('Cannot validate {} credentials, got connection exception: {}'.format(service, e))
         raise ThirdPartyAuthenticationFailed({
             'code': 'authentication_service_unavailable',
             'detail': 'Connection to authentication service timed out',
         })
-    except HelmetGeneralException as e:
-        logger.warning('Cannot validate patron from helmet, got general exception: {}'.format(e))
+    except IdentityValidationError as e:
+        logger.warning('Cannot validate {} credentials, got general exception: {}'.format(service, e))
         raise ThirdPartyAuthenticationFailed({
             'code': 'unidentified_error',
             'detail': 'Unidentified error',
@@ -107,7 +109,7 @@ class UserIdentityViewSet(ListModelMixin, CreateModelMixin, DestroyModelMixin, G
         if scope_specifiers and data['service'] not in scope_specifiers:
             raise PermissionDenied()
 
-        validate_credentials_helmet(data['identifier'], secret)
+        check_credentials(data['service'], data['identifier'], secret)
 
         serializer.save(user=self.request.user)
 
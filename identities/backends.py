@@ -0,0 +1,109 @@
+import asyncio
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from tunnistamo.metrics import HELMET_VALIDATION_SECONDS, timed
+
+from .circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+from .helmet_requests import (
+    HelmetConnectionException, HelmetGeneralException, HelmetImproperlyConfiguredException, validate_patron
+)
+
+DEFAULT_IDENTITY_VALIDATION_BACKENDS = {
+    'helmet': 'identities.backends.HelmetValidationBackend',
+}
+
+_backends = {}
+
+
+class IdentityValidationException(Exception):
+    pass
+
+
+class IdentityValidationImproperlyConfigured(IdentityValidationException):
+    pass
+
+
+class IdentityValidationUnavailable(IdentityValidationException):
+    pass
+
+
+class IdentityValidationError(IdentityValidationException):
+    pass
+
+
+class BaseIdentityValidationBackend:
+    """
+    Base class for backends that validate identity credentials against an external service.
+
+    Subclasses must implement validate(). Backends that have a native asynchronous client
+    (e.g. one built on httpx) should also override validate_async(), otherwise the
+    synchronous validate() is run in the event loop's default executor.
+
+    Both methods return True or False depending on whether the credentials are valid and
+    raise an IdentityValidationException subclass when the validation cannot be done.
+    """
+    def validate(self, identifier, secret):
+        raise NotImplementedError()
+
+    async def validate_async(self, identifier, secret):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.validate, identifier, secret)
+
+
+helmet_circuit_breaker = CircuitBreaker(
+    'helmet', failure_exceptions=(HelmetConnectionException,), setting_prefix='HELMET_API_CIRCUIT_BREAKER'
+)
+
+
+class HelmetValidationBackend(BaseIdentityValidationBackend):
+    def validate(self, identifier, secret):
+        with timed(HELMET_VALIDATION_SECONDS, outcome='error') as labels:
+            try:
+                valid = helmet_circuit_breaker.call(validate_patron, identifier, secret)
+            except HelmetImproperlyConfiguredException as e:
+                labels['outcome'] = 'improperly_configured'
+                raise IdentityValidationImproperlyConfigured(e)
+            except CircuitBreakerOpen as e:
+                labels['outcome'] = 'circuit_open'
+                raise IdentityValidationUnavailable(e)
+            except HelmetConnectionException as e:
+                labels['outcome'] = 'unavailable'
+                raise IdentityValidationUnavailable(e)
+            except HelmetGeneralException as e:
+                raise IdentityValidationError(e)
+            labels['outcome'] = 'valid' if valid else 'invalid'
+            return valid
+
+
+def get_validation_backend(service):
+    """
+    Return the validation backend instance for the given service.
+
+    Backends are configured with the IDENTITY_VALIDATION_BACKENDS setting, a dict of
+    import paths keyed by service.
+    """
+    backend_paths = getattr(settings, 'IDENTITY_VALIDATION_BACKENDS', DEFAULT_IDENTITY_VALIDATION_BACKENDS)
+    try:
+        backend_path = backend_paths[service]
+    except KeyError:
+        raise IdentityValidationImproperlyConfigured('No validation backend for service "{}".'.format(service))
+
+    if backend_path not in _backends:
+        try:
+            _backends[backend_path] = import_string(backend_path)()
+        except ImportError as e:
+            raise IdentityValidationImproperlyConfigured(
+                'Cannot import identity validation backend {}: {}'.format(backend_path, e)
+            )
+
+    return _backends[backend_path]
+
+
+def validate_credentials(service, identifier, secret):
+    return get_validation_backend(service).validate(identifier, secret)
+
+
+async def validate_credentials_async(service, identifier, secret):
+    return await get_validation_backend(service).validate_async(identifier, secret)
@@ -0,0 +1,141 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# All circuit breakers by name, so that their state can be reported
+circuit_breakers = {}
+
+
+class CircuitBreakerOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker whose state is shared between workers through the Django cache.
+
+    Calls and failures are counted in fixed time windows. When the failure rate of a
+    window exceeds the threshold, the circuit opens and calls fail fast with
+    CircuitBreakerOpen. After the recovery timeout the circuit is half-open: a single
+    probe call is let through, and depending on its result the circuit closes or
+    opens again.
+
+    The defaults can be overridden with settings named <setting_prefix>_FAILURE_RATE,
+    <setting_prefix>_MINIMUM_CALLS, <setting_prefix>_WINDOW and
+    <setting_prefix>_RECOVERY_TIMEOUT.
+    """
+    STATE_CLOSED = 'closed'
+    STATE_OPEN = 'open'
+    STATE_HALF_OPEN = 'half_open'
+
+    DEFAULT_FAILURE_RATE = 0.5
+    DEFAULT_MINIMUM_CALLS = 10
+    DEFAULT_WINDOW = 60
+    DEFAULT_RECOVERY_TIMEOUT = 30
+
+    def __init__(self, name, failure_exceptions, setting_prefix=None):
+        self.name = name
+        self.failure_exceptions = failure_exceptions
+        self.setting_prefix = setting_prefix
+        circuit_breakers[name] = self
+
+    def call(self, func, *args, **kwargs):
+        if not self.allow_request():
+            raise CircuitBreakerOpen('Circuit breaker "{}" is open'.format(self.name))
+
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_exceptions:
+            self.record_failure()
+            raise
+
+        self.record_success()
+        return result
+
+    @property
+    def state(self):
+        opened_at = cache.get(self._get_cache_key('opened_at'))
+        if opened_at is None:
+            return self.STATE_CLOSED
+        if time.time() < opened_at + self.recovery_timeout:
+            return self.STATE_OPEN
+        return self.STATE_HALF_OPEN
+
+    def allow_request(self):
+        state = self.state
+        if state == self.STATE_CLOSED:
+            return True
+        if state == self.STATE_HALF_OPEN:
+            # let only one probe request through at a time
+            return cache.add(self._get_cache_key('probe'), True, self.recovery_timeout)
+        return False
+
+    def record_success(self):
+        self._increment(self._get_window_cache_key('calls'))
+
+        if cache.get(self._get_cache_key('opened_at')) is not None:
+            logger.info('Circuit breaker "{}" closed'.format(self.name))
+            self.reset()
+
+    def record_failure(self):
+        calls = self._increment(self._get_window_cache_key('calls'))
+        failures = self._increment(self._get_window_cache_key('failures'))
+
+        if self.state == self.STATE_HALF_OPEN:
+            self._open()
+        elif calls >= self.minimum_calls and failures / calls >= self.failure_rate:
+            self._open()
+
+    def reset(self):
+        cache.delete_many([
+            self._get_cache_key('opened_at'),
+            self._get_cache_key('probe'),
+            self._get_window_cache_key('calls'),
+            self._get_window_cache_key('failures'),
+        ])
+
+    def _open(self):
+        logger.warning('Circuit breaker "{}" opened'.format(self.name))
+        cache.set(self._get_cache_key('opened_at'), time.time(), None)
+        cache.delete(self._get_cache_key('probe'))
+
+    def _increment(self, key):
+        cache.add(key, 0, self.window * 2)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # the key expired between add() and incr()
+            cache.set(key, 1, self.window * 2)
+            return 1
+
+    def _get_cache_key(self, name):
+        return 'CIRCUIT_BREAKER_{}_{}'.format(self.name, name).upper()
+
+    def _get_window_cache_key(self, name):
+        window_number = int(time.time() // self.window)
+        return '{}_{}'.format(self._get_cache_key(name), window_number)
+
+    def _get_setting(self, name, default):
+        if not self.setting_prefix:
+            return default
+        return getattr(settings, '{}_{}'.format(self.setting_prefix, name), default)
+
+    @property
+    def failure_rate(self):
+        return self._get_setting('FAILURE_RATE', self.DEFAULT_FAILURE_RATE)
+
+    @property
+    def minimum_calls(self):
+        return self._get_setting('MINIMUM_CALLS', self.DEFAULT_MINIMUM_CALLS)
+
+    @property
+    def window(self):
+        return self._get_setting('WINDOW', self.DEFAULT_WINDOW)
+
+    @property
+    def recovery_timeout(self):
+        return self._get_setting('RECOVERY_TIMEOUT', self.DEFAULT_RECOVERY_TIMEOUT)
@@ -1,11 +1,24 @@
 import json
+import logging
+import threading
+import time
 from urllib.parse import urljoin
 
 import requests
 from django.conf import settings
 from django.core.cache import cache
 
+logger = logging.getLogger(__name__)
+
 ACCESS_TOKEN_CACHE_KEY = 'HELMET_API_ACCESS_TOKEN'
+ACCESS_TOKEN_RENEW_AT_CACHE_KEY = 'HELMET_API_ACCESS_TOKEN_RENEW_AT'
+ACCESS_TOKEN_LOCK_CACHE_KEY = 'HELMET_API_ACCESS_TOKEN_LOCK'
+
+# Renew the token in the background once this fraction of its cache lifetime has passed
+DEFAULT_TOKEN_RENEWAL_FRACTION = 0.75
+# Maximum time in seconds a single worker may hold the token refresh lock
+DEFAULT_TOKEN_LOCK_TIMEOUT = 10
+TOKEN_WAIT_INTERVAL = 0.1
 
 
 class HelmetException(Exception):
@@ -30,22 +43,91 @@ def validate_patron(identifier, secret):
 
 
 def _get_token():
+    """Return an access token, fetching a new one only in a single worker at a time.
+
+    When the cached token is past its renewal time, one worker renews it in a
+    background thread while everyone keeps using the current token. When there
+    is no token at all, the worker holding the refresh lock fetches it and the
+    others wait for it to appear in the cache.
+    """
     access_token = cache.get(ACCESS_TOKEN_CACHE_KEY)
 
-    if not access_token:
-        access_token, expires_in = _get_token_request()
+    if access_token:
+        if _token_needs_renewal() and _acquire_token_lock():
+            threading.Thread(target=_renew_token_in_background, daemon=True).start()
+        return access_token
+
+    if _acquire_token_lock():
+        try:
+            return _refresh_token()
+        finally:
+            _release_token_lock()
+
+    access_token = _wait_for_token()
+    if access_token:
+        return access_token
+
+    # The worker holding the lock failed or is too slow, so fetch the token ourselves
+    return _refresh_token()
 
-        # use 1 min shorter time for the cache to make sure it is invalidated before the token
-        expires_in = max(expires_in - 60, 0)
 
-        default_timeout = settings.CACHES['default'].get('TIMEOUT', 300)
-        timeout = expires_in if default_timeout is None else min(expires_in, default_timeout)
+def _refresh_token():
+    access_token, expires_in = _get_token_request()
 
-        cache.set(ACCESS_TOKEN_CACHE_KEY, access_token, timeout)
+    # use 1 min shorter time for the cache to make sure it is invalidated before the token
+    expires_in = max(expires_in - 60, 0)
+
+    default_timeout = settings.CACHES['default'].get('TIMEOUT', 300)
+    timeout = expires_in if default_timeout is None else min(expires_in, default_timeout)
+
+    renewal_fraction = getattr(settings, 'HELMET_API_TOKEN_RENEWAL_FRACTION', DEFAULT_TOKEN_RENEWAL_FRACTION)
+    cache.set(ACCESS_TOKEN_RENEW_AT_CACHE_KEY, time.time() + timeout * renewal_fraction, timeout)
+    cache.set(ACCESS_TOKEN_CACHE_KEY, access_token, timeout)
 
     return access_token
 
 
+def _renew_token_in_background():
+    try:
+        _refresh_token()
+    except HelmetException as e:
+        logger.warning('Cannot renew Helmet API access token in the background: {}'.format(e))
+    finally:
+        _release_token_lock()
+
+
+def _token_needs_renewal():
+    renew_at = cache.get(ACCESS_TOKEN_RENEW_AT_CACHE_KEY)
+    return renew_at is not None and time.time() >= renew_at
+
+
+def _get_token_lock_timeout():
+    return getattr(settings, 'HELMET_API_TOKEN_LOCK_TIMEOUT', DEFAULT_TOKEN_LOCK_TIMEOUT)
+
+
+def _acquire_token_lock():
+    # cache.add() is atomic, so only one worker at a time can succeed in adding the key
+    return cache.add(ACCESS_TOKEN_LOCK_CACHE_KEY, True, _get_token_lock_timeout())
+
+
+def _release_token_lock():
+    cache.delete(ACCESS_TOKEN_LOCK_CACHE_KEY)
+
+
+def _wait_for_token():
+    deadline = time.time() + _get_token_lock_timeout()
+
+    while time.time() < deadline:
+        time.sleep(TOKEN_WAIT_INTERVAL)
+        access_token = cache.get(ACCESS_TOKEN_CACHE_KEY)
+        if access_token:
+            return access_token
+        if cache.get(ACCESS_TOKEN_LOCK_CACHE_KEY) is None:
+            break
+
+    return None
+
+
 def _get_token_request():
     username = _get_setting('HELMET_API_USERNAME')
     password = _get_setting('HELMET_API_PASSWORD')
@@ -73,7 +155,10 @@ def _validate_patron(identifier, secret, token):
     data = {'barcode': identifier, 'pin': secret}
     url = _create_api_url('patrons/validate')
 
-    response = requests.post(url, headers=headers, json=data)
+    try:
+        response = requests.post(url, headers=headers, json=data)
+    except requests.RequestException as e:
+        raise HelmetConnectionException(e)
 
     if response.status_code == 204:
         return True
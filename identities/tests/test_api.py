@@ -12,6 +12,7 @@ from jwcrypto.common import json_encode
 from rest_framework.test import APIClient
 
 from devices.factories import InterfaceDeviceFactory, UserDeviceFactory
+from identities.backends import helmet_circuit_breaker
 from identities.factories import UserIdentityFactory
 from identities.helmet_requests import HelmetConnectionException
 from identities.models import UserIdentity
@@ -188,7 +189,7 @@ def test_interface_device_authentication_wrong_client_secret(interface_device_ap
 
 
 @pytest.mark.django_db
-@mock.patch('identities.api.validate_patron', return_value=True)
+@mock.patch('identities.backends.validate_patron', return_value=True)
 def test_post_user_identity(validate_patron, user_api_client, post_data):
     response = user_api_client.post(list_url, post_data)
     assert response.status_code == 201
@@ -207,7 +208,7 @@ def test_post_user_identity(validate_patron, user_api_client, post_data):
 
 
 @pytest.mark.django_db
-@mock.patch('identities.api.validate_patron', return_value=True)
+@mock.patch('identities.backends.validate_patron', return_value=True)
 def test_post_user_identity_interface_device(validate_patron, interface_device_api_client, post_data):
     response = interface_device_api_client.post(list_url, post_data)
     assert response.status_code == 403
@@ -216,7 +217,7 @@ def test_post_user_identity_interface_device(validate_patron, interface_device_a
 
 
 @pytest.mark.django_db
-@mock.patch('identities.api.validate_patron')
+@mock.patch('identities.backends.validate_patron')
 def test_post_user_identity_check_required_fields(validate_patron, user_api_client):
     response = user_api_client.post(list_url, {})
     assert response.status_code == 400
@@ -225,7 +226,7 @@ def test_post_user_identity_check_required_fields(validate_patron, user_api_clie
 
 
 @pytest.mark.django_db
-@mock.patch('identities.api.validate_patron')
+@mock.patch('identities.backends.validate_patron')
 def test_post_user_identity_invalid_service(validate_patron, user_api_client, post_data):
     post_data['service'] = 'methel'
 
@@ -237,7 +238,7 @@ def test_post_user_identity_invalid_service(validate_patron, user_api_client, po
 
 
 @pytest.mark.django_db
-@mock.patch('identities.api.validate_patron', return_value=False)
+@mock.patch('identities.backends.validate_patron', return_value=False)
 def test_post_user_identity_invalid_secret(validate_patron, user_api_client, post_data):
     response = user_api_client.post(list_url, post_data)
     assert response.status_code == 401
@@ -248,7 +249,7 @@ def test_post_user_identity_invalid_secret(validate_patron, user_api_client, pos
 
 
 @pytest.mark.django_db
-@mock.patch('identities.api.validate_patron', side_effect=HelmetConnectionException)
+@mock.patch('identities.backends.validate_patron', side_effect=HelmetConnectionException)
 def test_post_user_identity_connection_error(validate_patron, user_api_client, post_data):
     response = user_api_client.post(list_url, post_data)
     assert response.status_code == 401
@@ -258,6 +259,24 @@ def test_post_user_identity_connection_error(validate_patron, user_api_client, p
     assert response.data['detail']
 
 
+@pytest.mark.django_db
+@mock.patch('identities.backends.validate_patron', side_effect=HelmetConnectionException)
+def test_post_user_identity_circuit_breaker_open(validate_patron, user_api_client, post_data, settings):
+    settings.HELMET_API_CIRCUIT_BREAKER_MINIMUM_CALLS = 2
+    helmet_circuit_breaker.reset()
+
+    for _ in range(2):
+        user_api_client.post(list_url, post_data)
+    assert validate_patron.call_count == 2
+
+    response = user_api_client.post(list_url, post_data)
+    assert response.status_code == 401
+    assert response.data['code'] == 'authentication_service_unavailable'
+    assert validate_patron.call_count == 2
+
+    helmet_circuit_breaker.reset()
+
+
 @pytest.mark.django_db
 def test_delete_user_identity(user_api_client):
     user_identity = UserIdentityFactory(user=user_api_client.user)
@@ -308,7 +327,7 @@ def test_delete_user_identity_interface_device_with_write_scope(interface_device
     ('write:identities:foo', 403),
 ))
 @pytest.mark.django_db
-@mock.patch('identities.api.validate_patron', return_value=True)
+@mock.patch('identities.backends.validate_patron', return_value=True)
 def test_post_user_identity_interface_device_with_scope_specifier(validate_patron, interface_device_api_client, scopes,
                                                                   post_data, expected_status_code):
     interface_device_api_client.interface_device.scopes = scopes
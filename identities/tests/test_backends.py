@@ -0,0 +1,85 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from identities.backends import (
+    BaseIdentityValidationBackend, HelmetValidationBackend, IdentityValidationError,
+    IdentityValidationImproperlyConfigured, IdentityValidationUnavailable, get_validation_backend,
+    helmet_circuit_breaker, validate_credentials, validate_credentials_async
+)
+from identities.helmet_requests import HelmetConnectionException, HelmetGeneralException
+
+
+class DummyValidationBackend(BaseIdentityValidationBackend):
+    def validate(self, identifier, secret):
+        return secret == 'correct'
+
+
+@pytest.fixture(autouse=True)
+def override_settings(settings):
+    settings.IDENTITY_VALIDATION_BACKENDS = {
+        'helmet': 'identities.backends.HelmetValidationBackend',
+        'dummy': 'identities.tests.test_backends.DummyValidationBackend',
+    }
+    helmet_circuit_breaker.reset()
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_get_validation_backend():
+    assert isinstance(get_validation_backend('helmet'), HelmetValidationBackend)
+    assert isinstance(get_validation_backend('dummy'), DummyValidationBackend)
+
+
+def test_get_validation_backend_unknown_service():
+    with pytest.raises(IdentityValidationImproperlyConfigured):
+        get_validation_backend('unknown')
+
+
+def test_get_validation_backend_import_error(settings):
+    settings.IDENTITY_VALIDATION_BACKENDS = {'typo': 'identities.backends.TypoValidationBackend'}
+
+    with pytest.raises(IdentityValidationImproperlyConfigured):
+        get_validation_backend('typo')
+
+
+def test_validate_credentials():
+    assert validate_credentials('dummy', '1234567', 'correct')
+    assert not validate_credentials('dummy', '1234567', 'wrong')
+
+
+def test_validate_credentials_async_with_sync_backend():
+    assert run(validate_credentials_async('dummy', '1234567', 'correct'))
+
+
+def test_validate_credentials_async_concurrently():
+    async def validate_all():
+        return await asyncio.gather(
+            validate_credentials_async('dummy', '1', 'correct'),
+            validate_credentials_async('dummy', '2', 'wrong'),
+        )
+
+    assert run(validate_all()) == [True, False]
+
+
+@mock.patch('identities.backends.validate_patron', return_value=True)
+def test_helmet_backend(validate_patron):
+    assert validate_credentials('helmet', '1234567', '1234')
+    validate_patron.assert_called_with('1234567', '1234')
+
+
+@pytest.mark.parametrize('helmet_exception, expected_exception', (
+    (HelmetConnectionException, IdentityValidationUnavailable),
+    (HelmetGeneralException, IdentityValidationError),
+))
+def test_helmet_backend_exceptions(helmet_exception, expected_exception):
+    with mock.patch('identities.backends.validate_patron', side_effect=helmet_exception):
+        with pytest.raises(expected_exception):
+            validate_credentials('helmet', '1234567', '1234')
@@ -0,0 +1,99 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from freezegun import freeze_time
+
+from identities.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+
+
+class DummyConnectionError(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def override_settings(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    settings.TEST_CIRCUIT_BREAKER_MINIMUM_CALLS = 4
+    settings.TEST_CIRCUIT_BREAKER_FAILURE_RATE = 0.5
+    settings.TEST_CIRCUIT_BREAKER_RECOVERY_TIMEOUT = 30
+    cache.clear()
+
+
+@pytest.fixture
+def circuit_breaker():
+    return CircuitBreaker('test', failure_exceptions=(DummyConnectionError,), setting_prefix='TEST_CIRCUIT_BREAKER')
+
+
+def fail():
+    raise DummyConnectionError()
+
+
+def call_failing(circuit_breaker, times):
+    for _ in range(times):
+        with pytest.raises(DummyConnectionError):
+            circuit_breaker.call(fail)
+
+
+@freeze_time('2019-01-01 12:00:00')
+def test_circuit_breaker_stays_closed_below_minimum_calls(circuit_breaker):
+    call_failing(circuit_breaker, 3)
+    assert circuit_breaker.state == CircuitBreaker.STATE_CLOSED
+
+
+@freeze_time('2019-01-01 12:00:00')
+def test_circuit_breaker_stays_closed_below_failure_rate(circuit_breaker):
+    for _ in range(3):
+        circuit_breaker.call(lambda: True)
+    call_failing(circuit_breaker, 2)
+
+    assert circuit_breaker.state == CircuitBreaker.STATE_CLOSED
+
+
+def test_circuit_breaker_opens_and_fails_fast(circuit_breaker):
+    func = mock.Mock()
+
+    with freeze_time('2019-01-01 12:00:00'):
+        call_failing(circuit_breaker, 4)
+        assert circuit_breaker.state == CircuitBreaker.STATE_OPEN
+
+    with freeze_time('2019-01-01 12:00:29'):
+        with pytest.raises(CircuitBreakerOpen):
+            circuit_breaker.call(func)
+
+    assert not func.called
+
+
+def test_circuit_breaker_half_open_probe_success_closes(circuit_breaker):
+    with freeze_time('2019-01-01 12:00:00'):
+        call_failing(circuit_breaker, 4)
+
+    with freeze_time('2019-01-01 12:00:31'):
+        assert circuit_breaker.state == CircuitBreaker.STATE_HALF_OPEN
+        assert circuit_breaker.call(lambda: 'ok') == 'ok'
+        assert circuit_breaker.state == CircuitBreaker.STATE_CLOSED
+
+
+def test_circuit_breaker_half_open_allows_single_probe(circuit_breaker):
+    with freeze_time('2019-01-01 12:00:00'):
+        call_failing(circuit_breaker, 4)
+
+    with freeze_time('2019-01-01 12:00:31'):
+        assert circuit_breaker.allow_request()
+        assert not circuit_breaker.allow_request()
+
+
+def test_circuit_breaker_half_open_probe_failure_reopens(circuit_breaker):
+    with freeze_time('2019-01-01 12:00:00'):
+        call_failing(circuit_breaker, 4)
+
+    with freeze_time('2019-01-01 12:00:31'):
+        call_failing(circuit_breaker, 1)
+        assert circuit_breaker.state == CircuitBreaker.STATE_OPEN
+
+    with freeze_time('2019-01-01 12:01:00'):
+        assert circuit_breaker.state == CircuitBreaker.STATE_OPEN
@@ -0,0 +1 @@
+default_app_config = 'oidc_apis.apps.OidcApisConfig'
@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.contrib.admin.sites import site as admin_site
 from parler.admin import TranslatableAdmin
 
+from tunnistamo.admin_search import LargeTableAdminMixin
 from users.models import OidcClientOptions
 
 from .models import Api, ApiDomain, ApiScope, ApiScopeTranslation
@@ -26,6 +27,7 @@ class ApiDomainAdmin(admin.ModelAdmin):
 @admin.register(Api)
 class ApiAdmin(admin.ModelAdmin):
     list_display = ['identifier', 'name', 'required_scopes_string']
+    list_select_related = ['domain']
 
     def formfield_for_dbfield(self, db_field, request, **kwargs):
         field = super(ApiAdmin, self).formfield_for_dbfield(
@@ -36,10 +38,12 @@ class ApiAdmin(admin.ModelAdmin):
 
 
 @admin.register(ApiScope)
-class ApiScopeAdmin(DontRequireIdentifier, TranslatableAdmin):
+class ApiScopeAdmin(LargeTableAdminMixin, DontRequireIdentifier, TranslatableAdmin):
     list_display = ['identifier', 'api', 'specifier', 'name', 'description']
-    search_fields = ['identifier', 'api__identifier', 'specifier',
+    # The identifier starts with the identifier of the API, so the API is searched too
+    search_fields = ['identifier', 'specifier',
                      'translations__name', 'translations__description']
+    list_select_related = ['api__domain']
     readonly_fields = ['identifier']
     fieldsets = (
          (None, {
@@ -48,11 +52,17 @@ class ApiScopeAdmin(DontRequireIdentifier, TranslatableAdmin):
          }),
     )
 
+    def get_queryset(self, request):
+        # Translated fields of the listing are read from the prefetched
+        # translations instead of querying them row by row
+        return super(ApiScopeAdmin, self).get_queryset(request).prefetch_related('translations')
+
 
 @admin.register(ApiScopeTranslation)
 class ApiScopeTranslationAdmin(admin.ModelAdmin):
     list_filter = ['master', 'language_code']
     list_display = ['master', 'language_code', 'name', 'description']
+    list_select_related = ['master']
 
 
 class OidcClientForm(oidc_provider.admin.ClientForm):
@@ -76,6 +86,7 @@ admin_site.unregister(oidc_provider.models.Client)
 
 
 @admin.register(oidc_provider.models.Client)
-class ClientAdmin(oidc_provider.admin.ClientAdmin):
+class ClientAdmin(LargeTableAdminMixin, oidc_provider.admin.ClientAdmin):
     form = OidcClientForm
+    search_fields = ['name', 'client_id']
     inlines = [OidcClientOptionsInlineAdmin]
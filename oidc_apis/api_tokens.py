@@ -4,8 +4,14 @@ from collections import defaultdict
 from django.utils import timezone
 from oidc_provider.lib.utils.token import create_id_token, encode_id_token
 
+from tunnistamo.metrics import API_TOKEN_MINT_SECONDS, timed
+from tunnistamo.query_budget import increase_query_budget
+
 from .models import ApiScope
 
+# Queries made for the claims of the ID token and for the signing key of each API token
+QUERIES_PER_API_TOKEN = 5
+
 
 def get_api_tokens_by_access_token(token, request=None):
     """
@@ -22,17 +28,22 @@ def get_api_tokens_by_access_token(token, request=None):
     """
     # Limit scopes to known and allowed API scopes
     known_api_scopes = ApiScope.objects.by_identifiers(token.scope)
-    allowed_api_scopes = known_api_scopes.allowed_for_client(token.client)
+    allowed_api_scopes = known_api_scopes.allowed_for_client(token.client).select_related(
+        'api__domain', 'api__oidc_client')
 
     # Group API scopes by the API identifiers
     scopes_by_api = defaultdict(list)
     for api_scope in allowed_api_scopes:
         scopes_by_api[api_scope.api.identifier].append(api_scope)
 
-    return {
-        api_identifier: generate_api_token(scopes, token, request)
-        for (api_identifier, scopes) in scopes_by_api.items()
-    }
+    if request is not None:
+        increase_query_budget(request, len(scopes_by_api) * QUERIES_PER_API_TOKEN)
+
+    api_tokens = {}
+    for (api_identifier, scopes) in scopes_by_api.items():
+        with timed(API_TOKEN_MINT_SECONDS, api=api_identifier):
+            api_tokens[api_identifier] = generate_api_token(scopes, token, request)
+    return api_tokens
 
 
 def generate_api_token(api_scopes, token, request=None):
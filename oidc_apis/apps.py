@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class OidcApisConfig(AppConfig):
+    name = 'oidc_apis'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('oidc_apis_apiscope', 'identifier'),
+    ('oidc_apis_apiscope', 'specifier'),
+    ('oidc_apis_apiscopetranslation', 'name'),
+    ('oidc_apis_apiscopetranslation', 'description'),
+    # Searched in the client admin of this app
+    ('oidc_provider_client', 'name'),
+    ('oidc_provider_client', 'client_id'),
+]
+
+
+def create_trigram_index(table, column):
+    # The expression of the index is the one of Django's icontains lookup
+    return migrations.RunSQL(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_{column}_trgm_idx '
+        'ON {table} USING gin (UPPER({column}::text) gin_trgm_ops);'.format(table=table, column=column),
+        'DROP INDEX CONCURRENTLY IF EXISTS {table}_{column}_trgm_idx;'.format(table=table, column=column),
+    )
+
+
+class Migration(migrations.Migration):
+    # Indexes are created concurrently to avoid locking the tables
+    atomic = False
+
+    dependencies = [
+        ('oidc_apis', '0002_add_multiselect_field_ad_groups_option'),
+        ('oidc_provider', '0025_user_field_codetoken'),
+    ]
+
+    operations = [
+        # The extension may be used by the indexes of other apps, so it is not dropped
+        migrations.RunSQL('CREATE EXTENSION IF NOT EXISTS pg_trgm;', migrations.RunSQL.noop),
+    ] + [
+        create_trigram_index(table, column) for (table, column) in TRIGRAM_INDEXES
+    ]
@@ -1,8 +1,56 @@
+import copy
+from functools import lru_cache
+
+from django.db.models import prefetch_related_objects
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
-from oidc_provider.lib.claims import ScopeClaims, StandardScopeClaims
+from oidc_provider import settings
+from oidc_provider.lib.claims import STANDARD_CLAIMS, ScopeClaims, StandardScopeClaims
 
 from .models import ApiScope
 
+# Related objects of the user which are always needed, and by scope
+USER_PREFETCHES = ['emailaddress_set']
+USER_PREFETCHES_BY_SCOPE = {
+    'github_username': ['socialaccount_set'],
+    'ad_groups': ['ad_groups'],
+}
+
+
+class ClaimsContext(object):
+    """
+    User data shared by the claim classes combined in CombinedScopeClaims.
+
+    The related objects of the user needed by the requested scopes are
+    prefetched once and the userinfo is generated once, instead of every
+    claim class querying them separately.
+    """
+    def __init__(self, token):
+        self.user = token.user
+        lookups = list(USER_PREFETCHES)
+        for scope in token.scope:
+            lookups.extend(USER_PREFETCHES_BY_SCOPE.get(scope, []))
+        prefetch_related_objects([self.user], *lookups)
+
+    @cached_property
+    def userinfo(self):
+        claims = copy.deepcopy(STANDARD_CLAIMS)
+        return settings.get('OIDC_USERINFO', import_str=True)(claims, self.user)
+
+
+class SharedClaimsContextMixin(object):
+    def __init__(self, token, context=None):
+        self.context = context or ClaimsContext(token)
+        self.user = self.context.user
+        self.userinfo = self.context.userinfo
+        self.scopes = token.scope
+        self.client = token.client
+
+
+@lru_cache()
+def get_registered_scopes(claim_cls):
+    return frozenset(name[len('scope_'):] for name in dir(claim_cls) if name.startswith('scope_'))
+
 
 class ApiScopeClaims(ScopeClaims):
     @classmethod
@@ -22,13 +70,13 @@ class ApiScopeClaims(ScopeClaims):
         ]
 
 
-class GithubUsernameScopeClaims(ScopeClaims):
+class GithubUsernameScopeClaims(SharedClaimsContextMixin, ScopeClaims):
     info_github_username = (
         _("GitHub username"), _("Access to your GitHub username."))
 
     def scope_github_username(self):
-        social_accounts = self.user.socialaccount_set
-        github_account = social_accounts.filter(provider='github').first()
+        social_accounts = self.user.socialaccount_set.all()
+        github_account = next((x for x in social_accounts if x.provider == 'github'), None)
         if not github_account:
             return {}
         github_data = github_account.extra_data
@@ -57,16 +105,16 @@ class UserConsentsScopeClaims(ScopeClaims):
         _('Consents'), _('Permission to view and delete your consents for services.'))
 
 
-class AdGroupsScopeClaims(ScopeClaims):
+class AdGroupsScopeClaims(SharedClaimsContextMixin, ScopeClaims):
     info_ad_groups = (_("AD Groups"), _("Access to your AD Group memberships."))
 
     def scope_ad_groups(self):
         return {
-            'ad_groups': list(self.user.ad_groups.all().values_list('name', flat=True)),
+            'ad_groups': [x.name for x in self.user.ad_groups.all()],
         }
 
 
-class CustomInfoTextStandardScopeClaims(StandardScopeClaims):
+class CustomInfoTextStandardScopeClaims(SharedClaimsContextMixin, StandardScopeClaims):
     info_profile = (
         _('Basic profile'),
         _('Access to your basic information. Includes names, gender, birthdate and other information.'),
@@ -97,7 +145,7 @@ class CustomInfoTextStandardScopeClaims(StandardScopeClaims):
         return super().scope_address()
 
 
-class CombinedScopeClaims(ScopeClaims):
+class CombinedScopeClaims(SharedClaimsContextMixin, ScopeClaims):
     combined_scope_claims = [
         CustomInfoTextStandardScopeClaims,
         GithubUsernameScopeClaims,
@@ -127,7 +175,14 @@ class CombinedScopeClaims(ScopeClaims):
 
     def create_response_dic(self):
         result = super(CombinedScopeClaims, self).create_response_dic()
+        requested_scopes = set(self.scopes)
         for claim_cls in self.combined_scope_claims:
-            claim = claim_cls(self._token)
+            # Skip the claim classes which don't provide any of the requested scopes
+            if not get_registered_scopes(claim_cls) & requested_scopes:
+                continue
+            if issubclass(claim_cls, SharedClaimsContextMixin):
+                claim = claim_cls(self._token, context=self.context)
+            else:
+                claim = claim_cls(self._token)
             result.update(claim.create_response_dic())
         return result
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from oidc_apis.models import ApiScope, ApiScopeTranslation
+from scopes.api import invalidate_scope_catalogue
+
+
+@receiver(post_save, sender=ApiScope)
+@receiver(post_delete, sender=ApiScope)
+@receiver(post_save, sender=ApiScopeTranslation)
+@receiver(post_delete, sender=ApiScopeTranslation)
+def handle_api_scope_change(sender, **kwargs):
+    invalidate_scope_catalogue()
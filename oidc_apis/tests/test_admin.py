@@ -0,0 +1,49 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from oidc_apis.factories import ApiDomainFactory, ApiFactory, ApiScopeFactory
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+def create_apis(count):
+    domain = ApiDomainFactory()
+    for i in range(count):
+        ApiFactory(domain=domain, name='api{}'.format(i))
+
+
+def create_api_scopes(count):
+    apis = ApiFactory.create_batch(5)
+    for i in range(count):
+        ApiScopeFactory(api=apis[i % len(apis)], specifier='scope{}'.format(i))
+
+
+def get_changelist_query_count(client, url):
+    # Make sure that the translations are not read from the cache
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.parametrize('url_name, create_objects', [
+    ('admin:oidc_apis_apiscope_changelist', create_api_scopes),
+    ('admin:oidc_apis_api_changelist', create_apis),
+])
+def test_changelist_query_count_does_not_depend_on_row_count(admin_client, url_name, create_objects):
+    url = reverse(url_name)
+    create_objects(5)
+    # Warm up the caches which are not in the Django cache, e.g. the site cache
+    admin_client.get(url)
+    query_count = get_changelist_query_count(admin_client, url)
+
+    create_objects(500)
+
+    assert get_changelist_query_count(admin_client, url) == query_count
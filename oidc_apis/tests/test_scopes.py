@@ -0,0 +1,66 @@
+import pytest
+from allauth.account.models import EmailAddress
+from allauth.socialaccount.models import SocialAccount
+from helusers.models import ADGroup
+from oidc_provider.lib.claims import ScopeClaims
+from oidc_provider.models import Token
+
+from oidc_apis.scopes import CombinedScopeClaims
+from users.factories import UserFactory, access_token_factory
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+@pytest.fixture
+def user():
+    user = UserFactory(email='test@example.com')
+    EmailAddress.objects.create(user=user, email='primary@example.com', primary=True, verified=True)
+    SocialAccount.objects.create(user=user, provider='github', uid='1', extra_data={'login': 'octocat'})
+    user.ad_groups.add(*[ADGroup.objects.create(name='group{}'.format(i), display_name='Group') for i in range(3)])
+    return user
+
+
+def get_token(user, scopes):
+    token = access_token_factory(user=user, scopes=scopes)
+    return Token.objects.select_related('user', 'client').get(id=token.id)
+
+
+def test_combined_scope_claims(user, django_assert_num_queries):
+    token = get_token(user, ['openid', 'profile', 'email', 'github_username', 'ad_groups'])
+
+    # Email addresses, social accounts and AD groups
+    with django_assert_num_queries(3):
+        claims = CombinedScopeClaims(token).create_response_dic()
+
+    assert claims['email'] == 'primary@example.com'
+    assert claims['email_verified'] is True
+    assert claims['name'] == user.get_full_name()
+    assert claims['github_username'] == 'octocat'
+    assert sorted(claims['ad_groups']) == ['group0', 'group1', 'group2']
+
+
+def test_combined_scope_claims_only_loads_requested_data(user, django_assert_num_queries):
+    token = get_token(user, ['openid', 'profile'])
+
+    with django_assert_num_queries(1):
+        claims = CombinedScopeClaims(token).create_response_dic()
+
+    assert claims['name'] == user.get_full_name()
+    assert 'github_username' not in claims
+    assert 'ad_groups' not in claims
+
+
+def test_combined_scope_claims_with_plain_claims_class(user, monkeypatch):
+    class PlainScopeClaims(ScopeClaims):
+        def scope_plain(self):
+            return {'plain': self.user.email}
+
+    monkeypatch.setattr(CombinedScopeClaims, 'combined_scope_claims', [PlainScopeClaims])
+    token = get_token(user, ['openid', 'plain'])
+
+    claims = CombinedScopeClaims(token).create_response_dic()
+
+    assert claims['plain'] == 'test@example.com'
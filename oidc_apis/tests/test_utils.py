@@ -0,0 +1,51 @@
+import pytest
+from django.contrib.sessions.backends.cache import SessionStore
+from freezegun import freeze_time
+
+from oidc_apis.utils import refresh_session
+
+
+@pytest.fixture
+def session(settings):
+    settings.SESSION_COOKIE_AGE = 3600
+    return SessionStore()
+
+
+def test_refresh_session_refreshes_new_session(session):
+    assert refresh_session(session) is True
+    assert session.modified
+
+
+def test_refresh_session_skips_fresh_session(session):
+    with freeze_time('2019-01-01 12:00:00'):
+        refresh_session(session)
+        session.save()
+
+    session = SessionStore(session.session_key)
+    with freeze_time('2019-01-01 12:29:59'):
+        assert refresh_session(session) is False
+    assert not session.modified
+
+
+def test_refresh_session_refreshes_expiring_session(session):
+    with freeze_time('2019-01-01 12:00:00'):
+        refresh_session(session)
+        session.save()
+
+    session = SessionStore(session.session_key)
+    with freeze_time('2019-01-01 12:30:01'):
+        assert refresh_session(session) is True
+    assert session.modified
+
+
+def test_refresh_session_threshold_setting(session, settings):
+    settings.SESSION_REFRESH_THRESHOLD = 600
+    with freeze_time('2019-01-01 12:00:00'):
+        refresh_session(session)
+        session.save()
+
+    session = SessionStore(session.session_key)
+    with freeze_time('2019-01-01 12:45:00'):
+        assert refresh_session(session) is False
+    with freeze_time('2019-01-01 12:50:01'):
+        assert refresh_session(session) is True
@@ -1,12 +1,19 @@
+import time
 from collections import OrderedDict
+from datetime import datetime, timezone
 
+from django.conf import settings as django_settings
 from django.contrib.auth import logout as django_user_logout
 from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
 from oidc_provider import settings
 
+from tunnistamo.metrics import AUTHORIZE_HOOK_DECISIONS
+from tunnistamo.tracing import span
 from users.models import OidcClientOptions
 
+SESSION_REFRESHED_AT_KEY = 'session_refreshed_at'
+
 
 def combine_uniquely(iterable1, iterable2):
     """
@@ -22,19 +29,62 @@ def combine_uniquely(iterable1, iterable2):
     return list(result.keys())
 
 
+def refresh_session(session):
+    """
+    Mark the session modified if its remaining lifetime is short.
+
+    The session is saved again, extending its expiry, only when less than
+    SESSION_REFRESH_THRESHOLD seconds (by default half of its lifetime)
+    remain until it expires. Otherwise every redirect through the
+    authorize endpoint would write the session.
+
+    Returns True if the session is refreshed.
+    """
+    now = int(time.time())
+    refreshed_at = session.get(SESSION_REFRESHED_AT_KEY)
+    if refreshed_at is not None:
+        modification = datetime.fromtimestamp(refreshed_at, tz=timezone.utc)
+        lifetime = session.get_expiry_age(modification=modification)
+        threshold = getattr(django_settings, 'SESSION_REFRESH_THRESHOLD', None)
+        if threshold is None:
+            threshold = lifetime // 2
+        if refreshed_at + lifetime - now > threshold:
+            return False
+
+    session[SESSION_REFRESHED_AT_KEY] = now
+    return True
+
+
 def after_userlogin_hook(request, user, client):
-    """Marks Django session modified and ensures the current
+    """Refreshes Django session and ensures the current
     session has an allowed login backend for the client.
 
     One purpose of this function is to keep the session used by the
     oidc-provider fresh. This is achieved by pointing
-    'OIDC_AFTER_USERLOGIN_HOOK' setting to this.
+    'OIDC_AFTER_USERLOGIN_HOOK' setting to this. The session is
+    rewritten only when it is about to expire, see refresh_session.
 
     The other is to prevent authorizing users with an unallowed backend
     for specific clients.
 
     """
-    request.session.modified = True
+    decision = 'error'
+    with span('authorize.after_userlogin_hook') as hook_span:
+        try:
+            response = _check_login_backend(request, user, client)
+        except PermissionDenied:
+            decision = 'denied'
+            raise
+        else:
+            decision = 'continue' if response is None else 'login_required'
+        finally:
+            AUTHORIZE_HOOK_DECISIONS.labels(decision).inc()
+            hook_span.set_attribute('decision', decision)
+    return response
+
+
+def _check_login_backend(request, user, client):
+    refresh_session(request.session)
 
     last_login_backend = request.session.get('social_auth_last_login_backend')
     try:
@@ -1,3 +1,5 @@
+from functools import wraps
+
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -6,9 +8,16 @@ from oidc_provider.lib.utils.oauth2 import protected_resource_view
 from .api_tokens import get_api_tokens_by_access_token
 
 
+def oidc_protected_resource_view(scopes):
+    """Like protected_resource_view, but keeps the name of the view, e.g. for the query budgets."""
+    def decorator(view):
+        return wraps(view)(protected_resource_view(scopes)(view))
+    return decorator
+
+
 @csrf_exempt
 @require_http_methods(['GET', 'POST'])
-@protected_resource_view(['openid'])
+@oidc_protected_resource_view(['openid'])
 def get_api_tokens_view(request, token, *args, **kwargs):
     """
     Get the authorized API Tokens.
@@ -1,4 +1,7 @@
+import uuid
+
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import translation
 from django.utils.functional import cached_property
 from django.utils.translation.trans_real import translation as trans_real_translation
@@ -8,6 +11,7 @@ from rest_framework.views import APIView
 
 from oidc_apis.models import ApiScope
 from oidc_apis.scopes import CombinedScopeClaims
+from tunnistamo.db_router import ReadReplicaMixin
 from tunnistamo.pagination import DefaultPagination
 from tunnistamo.utils import TranslatableSerializer
 
@@ -15,6 +19,17 @@ ENGLISH_LANGUAGE_CODE = 'en'
 LANGUAGE_CODES = [l[0] for l in settings.LANGUAGES]
 assert ENGLISH_LANGUAGE_CODE in LANGUAGE_CODES
 
+SCOPE_CATALOGUE_VERSION_CACHE_KEY = 'scope_catalogue_version'
+SCOPE_CATALOGUE_CACHE_KEY = 'scope_catalogue:{version}'
+
+DEFAULT_SCOPE_CATALOGUE_CACHE_TIMEOUT = 60 * 60
+# Without a cache shared by the processes, a change is noticed by the other
+# processes only when the version expires
+DEFAULT_SCOPE_CATALOGUE_VERSION_TIMEOUT = 60
+
+# The latest scope catalogue used by this process
+_scope_catalogue = None
+
 
 class ApiScopeSerializer(TranslatableSerializer):
     id = serializers.CharField(source='identifier')
@@ -29,7 +44,7 @@ class AutoSchemaWithPaginationParams(AutoSchema):
         return DefaultPagination().get_schema_fields(method)
 
 
-class ScopeListView(APIView):
+class ScopeListView(ReadReplicaMixin, APIView):
     """
     List scopes related to OIDC authentication.
     """
@@ -49,13 +64,73 @@ class ScopeListView(APIView):
         return self._paginator
 
 
+class ScopeCatalogue:
+    """
+    Data of all OIDC and API scopes, indexed by scope id.
+    """
+    def __init__(self, version, scopes_data):
+        self.version = version
+        self.scopes_data = scopes_data
+        self.scopes_by_id = {s['id']: s for s in scopes_data}
+        self._positions = {s['id']: position for position, s in enumerate(scopes_data)}
+
+    def get_scopes_data(self, only=None):
+        if not only:
+            return self.scopes_data
+
+        ids = sorted((i for i in set(only) if i in self.scopes_by_id), key=self._positions.__getitem__)
+        return [self.scopes_by_id[i] for i in ids]
+
+
+def get_scope_catalogue_version_timeout():
+    return getattr(settings, 'SCOPE_CATALOGUE_VERSION_TIMEOUT', DEFAULT_SCOPE_CATALOGUE_VERSION_TIMEOUT)
+
+
+def get_scope_catalogue_version():
+    version = cache.get(SCOPE_CATALOGUE_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(SCOPE_CATALOGUE_VERSION_CACHE_KEY, uuid.uuid4().hex, get_scope_catalogue_version_timeout())
+        version = cache.get(SCOPE_CATALOGUE_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_scope_catalogue():
+    cache.set(SCOPE_CATALOGUE_VERSION_CACHE_KEY, uuid.uuid4().hex, get_scope_catalogue_version_timeout())
+
+
+def get_scope_catalogue():
+    """
+    Return the current ScopeCatalogue.
+
+    The catalogue is shared by all requests through the cache, and
+    rebuilt when an API scope or its translations change, or at the
+    latest when the version expires after SCOPE_CATALOGUE_VERSION_TIMEOUT
+    seconds. The process keeps the latest catalogue in memory, so a
+    request costs one cache read of the catalogue version.
+    """
+    global _scope_catalogue
+
+    version = get_scope_catalogue_version()
+    if _scope_catalogue is not None and _scope_catalogue.version == version:
+        return _scope_catalogue
+
+    key = SCOPE_CATALOGUE_CACHE_KEY.format(version=version)
+    scopes_data = cache.get(key)
+    if scopes_data is None:
+        scopes_data = ScopeDataBuilder.build_scopes_data()
+        timeout = getattr(settings, 'SCOPE_CATALOGUE_CACHE_TIMEOUT', DEFAULT_SCOPE_CATALOGUE_CACHE_TIMEOUT)
+        cache.set(key, scopes_data, timeout)
+
+    _scope_catalogue = ScopeCatalogue(version, scopes_data)
+    return _scope_catalogue
+
+
 class ScopeDataBuilder:
     """
     A builder for scope data to be used in the API.
 
-    Implemented as a class to provide better control of caching. A ScopeDataBuilder instance caches
-    ApiScopes (which are in the db), so in practice there should be an own instance per request
-    to cope with possible modifications.
+    The data is read from the shared ScopeCatalogue. A ScopeDataBuilder instance keeps using
+    the catalogue it got first, so there should be an own instance per request.
     """
     def get_scopes_data(self, only=None):
         """
@@ -67,14 +142,19 @@ class ScopeDataBuilder:
         :param only: If given, include only these scopes (ids).
         :type only: List[str]
         """
-        if only:
-            return [s for s in self.scopes_data if s['id'] in only]
-        else:
-            return self.scopes_data
+        return self.catalogue.get_scopes_data(only)
 
     @cached_property
+    def catalogue(self):
+        return get_scope_catalogue()
+
+    @property
     def scopes_data(self):
-        return self._get_oidc_scopes_data() + self._get_api_scopes_data()
+        return self.catalogue.scopes_data
+
+    @classmethod
+    def build_scopes_data(cls):
+        return cls._get_oidc_scopes_data() + cls._get_api_scopes_data()
 
     @classmethod
     def _get_oidc_scopes_data(cls):
@@ -96,7 +176,8 @@ class ScopeDataBuilder:
 
     @classmethod
     def _get_api_scopes_data(cls):
-        return ApiScopeSerializer(ApiScope.objects.order_by('identifier'), many=True).data
+        api_scopes = ApiScope.objects.prefetch_related('translations').order_by('identifier')
+        return [dict(data) for data in ApiScopeSerializer(api_scopes, many=True).data]
 
     @classmethod
     def _create_translated_field_from_string(cls, field):
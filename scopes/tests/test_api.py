@@ -1,9 +1,15 @@
 import pytest
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from freezegun import freeze_time
 from parler.utils.context import switch_language
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
 from oidc_apis.factories import ApiDomainFactory, ApiFactory, ApiScopeFactory
+from scopes.api import get_scope_catalogue
+
+pytestmark = pytest.mark.query_budget
 
 LIST_URL = reverse('v1:scope-list')
 
@@ -25,6 +31,11 @@ def auto_mark_django_db(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture(autouse=True)
 def force_english(settings):
     settings.LANGUAGE_CODE = 'en'
@@ -70,3 +81,42 @@ def test_get_also_api_scopes_list(api_client):
 
     assert foo_scope_data['name'] == {'en': foo_scope.name, 'fi': 'nimi'}
     assert foo_scope_data['description'] == {'en': foo_scope.description, 'fi': 'kuvaus'}
+
+
+def test_scope_catalogue_get_scopes_data():
+    api = ApiFactory(domain=ApiDomainFactory(identifier='https://api.hel.fi/auth'), name='test')
+    ApiScopeFactory(api=api, specifier='b')
+    ApiScopeFactory(api=api, specifier='a')
+
+    scopes_data = get_scope_catalogue().get_scopes_data(
+        ['https://api.hel.fi/auth/test.b', 'unknown', 'profile', 'https://api.hel.fi/auth/test.a', 'profile']
+    )
+
+    assert [s['id'] for s in scopes_data] == [
+        'profile', 'https://api.hel.fi/auth/test.a', 'https://api.hel.fi/auth/test.b'
+    ]
+
+
+def test_scope_catalogue_is_shared_and_invalidated(django_assert_num_queries):
+    catalogue = get_scope_catalogue()
+
+    with django_assert_num_queries(0):
+        assert get_scope_catalogue() is catalogue
+
+    api_scope = ApiScopeFactory()
+
+    assert api_scope.identifier in get_scope_catalogue().scopes_by_id
+
+
+def test_scope_catalogue_version_expires_in_other_processes(monkeypatch):
+    with freeze_time('2019-01-01 12:00:00'):
+        get_scope_catalogue()
+
+    # The API scope is created in another process, which has a cache of its own
+    monkeypatch.setattr('scopes.api.cache', LocMemCache('other-process', {}))
+    with freeze_time('2019-01-01 12:00:30'):
+        api_scope = ApiScopeFactory()
+    monkeypatch.undo()
+
+    with freeze_time('2019-01-01 12:01:01'):
+        assert api_scope.identifier in get_scope_catalogue().scopes_by_id
@@ -1,16 +1,32 @@
+import hashlib
+
 from django.db.models import Exists, OuterRef
 from django.db.models.functions import Greatest
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django.utils.translation import ugettext_lazy as _
 from django_filters import rest_framework as filters
 from django_filters.widgets import BooleanWidget
-from oauth2_provider.models import AccessToken
 from oidc_provider.models import UserConsent
-from rest_framework import serializers, viewsets
+from rest_framework import serializers, status, viewsets
+from rest_framework.response import Response
 
+from services.catalogue import get_consented_service_ids, get_service_catalogue
 from services.models import Service
 from tunnistamo.api_common import OidcTokenAuthentication, TokenAuth
+from tunnistamo.db_router import ReadReplicaMixin
 from tunnistamo.pagination import DefaultPagination
 from tunnistamo.utils import TranslatableSerializer
+from users.models import ApplicationAuthorization
+
+
+def etag_matches(etag, if_none_match):
+    """Return True if the ETag matches an ETag of the If-None-Match header, with the weak comparison."""
+    etags = parse_etags(if_none_match)
+    if etags == ['*']:
+        return True
+    # The ETag of the response is always strong
+    return any((candidate[2:] if candidate.startswith('W/') else candidate) == etag for candidate in etags)
 
 
 class ServiceSerializer(TranslatableSerializer):
@@ -48,7 +64,7 @@ class ServiceFilter(filters.FilterSet):
         return queryset
 
 
-class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
+class ServiceViewSet(ReadReplicaMixin, viewsets.ReadOnlyModelViewSet):
     """
     List services.
 
@@ -70,18 +86,54 @@ class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
         if not self.request:
             return queryset
 
-        user = self.request.user
-
-        if user.is_authenticated and isinstance(self.request.auth, TokenAuth):
-            token_domains = self.request.auth.scope_domains
-            consent_perms = token_domains.get('consents', set())
-            consent_read_perm_included = any('read' in perm[0] and perm[1] is None for perm in consent_perms)
-
-            if consent_read_perm_included:
-                user_consents = UserConsent.objects.filter(client__service=OuterRef('pk'), user=user)
-                user_access_tokens = AccessToken.objects.filter(application__service=OuterRef('pk'), user=user)
-                queryset = queryset.annotate(
-                    consent_given=Greatest(Exists(user_consents), Exists(user_access_tokens))
-                )
+        if self.consent_given_visible():
+            user = self.request.user
+            user_consents = UserConsent.objects.filter(client__service=OuterRef('pk'), user=user)
+            user_authorizations = ApplicationAuthorization.objects.filter(
+                application__service=OuterRef('pk'), user=user)
+            queryset = queryset.annotate(
+                consent_given=Greatest(Exists(user_consents), Exists(user_authorizations))
+            )
 
         return queryset
+
+    def consent_given_visible(self):
+        if not (self.request.user.is_authenticated and isinstance(self.request.auth, TokenAuth)):
+            return False
+
+        token_domains = self.request.auth.scope_domains
+        consent_perms = token_domains.get('consents', set())
+        return any('read' in perm[0] and perm[1] is None for perm in consent_perms)
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the services from the cached catalogue.
+
+        The consents of the user are read with a single query and merged
+        into the catalogue, instead of annotating every service with
+        subqueries.
+        """
+        catalogue_version, services = get_service_catalogue(request, self.get_serializer_class())
+
+        consented_service_ids = None
+        if self.consent_given_visible():
+            consented_service_ids = get_consented_service_ids(request.user)
+            services = [dict(service, consent_given=service['id'] in consented_service_ids) for service in services]
+
+            consent_given = BooleanWidget().value_from_datadict(request.query_params, None, 'consent_given')
+            if consent_given is not None:
+                services = [service for service in services if service['consent_given'] is consent_given]
+
+        etag = '"{}"'.format(hashlib.md5('{}:{}:{}'.format(
+            catalogue_version, sorted(consented_service_ids or []), request.get_full_path()
+        ).encode('utf-8')).hexdigest())
+
+        if etag_matches(etag, request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            page = self.paginate_queryset(services)
+            response = self.get_paginated_response(page)
+
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Authorization'])
+        return response
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ServicesConfig(AppConfig):
     name = 'services'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa
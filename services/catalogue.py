@@ -0,0 +1,66 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from oidc_provider.models import UserConsent
+
+from services.models import Service
+from users.models import ApplicationAuthorization
+
+SERVICE_CATALOGUE_VERSION_CACHE_KEY = 'service_catalogue_version'
+SERVICE_CATALOGUE_CACHE_KEY = 'service_catalogue:{version}:{base_url}'
+
+DEFAULT_SERVICE_CATALOGUE_CACHE_TIMEOUT = 60 * 60
+# Without a cache shared by the processes, a change is noticed by the other
+# processes only when the version expires
+DEFAULT_SERVICE_CATALOGUE_VERSION_TIMEOUT = 60
+
+
+def get_service_catalogue_version_timeout():
+    return getattr(settings, 'SERVICE_CATALOGUE_VERSION_TIMEOUT', DEFAULT_SERVICE_CATALOGUE_VERSION_TIMEOUT)
+
+
+def get_service_catalogue_version():
+    version = cache.get(SERVICE_CATALOGUE_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(SERVICE_CATALOGUE_VERSION_CACHE_KEY, uuid.uuid4().hex, get_service_catalogue_version_timeout())
+        version = cache.get(SERVICE_CATALOGUE_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_service_catalogue():
+    cache.set(SERVICE_CATALOGUE_VERSION_CACHE_KEY, uuid.uuid4().hex, get_service_catalogue_version_timeout())
+
+
+def get_service_catalogue(request, serializer_class):
+    """
+    Return the version and the serialized data of all services.
+
+    The catalogue is the same for every user, so it is cached until a
+    service or its translations change, or at the latest until the
+    version expires after SERVICE_CATALOGUE_VERSION_TIMEOUT seconds. Image URLs are absolute, so
+    the catalogue is cached separately for each host.
+    """
+    version = get_service_catalogue_version()
+    key = SERVICE_CATALOGUE_CACHE_KEY.format(version=version, base_url=request.build_absolute_uri('/'))
+
+    services = cache.get(key)
+    if services is None:
+        queryset = Service.objects.prefetch_related('translations')
+        serializer = serializer_class(queryset, many=True, context={'request': request})
+        services = [dict(data) for data in serializer.data]
+        timeout = getattr(settings, 'SERVICE_CATALOGUE_CACHE_TIMEOUT', DEFAULT_SERVICE_CATALOGUE_CACHE_TIMEOUT)
+        cache.set(key, services, timeout)
+
+    return version, services
+
+
+def get_consented_service_ids(user):
+    """Return the ids of the services the user has given a consent to or has authorised."""
+    consented_services = UserConsent.objects.filter(
+        user=user, client__service__isnull=False
+    ).values_list('client__service', flat=True)
+    authorized_services = ApplicationAuthorization.objects.filter(
+        user=user, application__service__isnull=False
+    ).values_list('application__service', flat=True)
+    return set(consented_services.union(authorized_services))
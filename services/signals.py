@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from services.catalogue import invalidate_service_catalogue
+from services.models import Service
+
+ServiceTranslation = Service._parler_meta.root_model
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=ServiceTranslation)
+@receiver(post_delete, sender=ServiceTranslation)
+def handle_service_change(sender, **kwargs):
+    invalidate_service_catalogue()
@@ -1,4 +1,7 @@
 import pytest
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from freezegun import freeze_time
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
@@ -6,6 +9,8 @@ from services.factories import ServiceFactory
 from tunnistamo.utils import assert_objects_in_response
 from users.factories import OAuth2AccessTokenFactory, UserConsentFactory, UserFactory, access_token_factory
 
+pytestmark = pytest.mark.query_budget
+
 LIST_URL = reverse('v1:service-list')
 
 
@@ -27,6 +32,11 @@ def auto_mark_django_db(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -153,3 +163,81 @@ def test_oidc_authentication(service, scope, consent_given_visible):
     response = oidc_api_client.get(get_detail_url(service))
     assert response.status_code == 200
     assert bool('consent_given' in response.data) is consent_given_visible
+
+
+def test_list_is_served_from_cached_catalogue(oidc_api_client, django_assert_num_queries):
+    user = oidc_api_client.user
+    own_client_service = ServiceFactory(target='client')
+    UserConsentFactory(user=user, client=own_client_service.client)
+    ServiceFactory(target='application')
+    oidc_api_client.get(LIST_URL)
+
+    # Token authentication and the consents of the user
+    with django_assert_num_queries(3):
+        response = oidc_api_client.get(LIST_URL)
+
+    assert response.status_code == 200
+    assert [service['consent_given'] for service in response.data['results']] == [True, False]
+
+
+def test_list_catalogue_cache_is_invalidated_on_service_change(api_client, service):
+    api_client.get(LIST_URL)
+
+    service.set_current_language('fi')
+    service.name = 'Changed'
+    service.save()
+    new_service = ServiceFactory(target='client')
+
+    response = api_client.get(LIST_URL)
+    assert [s['name'] for s in response.data['results']] == [{'fi': 'Changed'}, {'fi': new_service.name}]
+
+
+def test_list_etag(oidc_api_client, service):
+    response = oidc_api_client.get(LIST_URL)
+    etag = response['ETag']
+
+    response = oidc_api_client.get(LIST_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    UserConsentFactory(user=oidc_api_client.user, client=service.client)
+
+    response = oidc_api_client.get(LIST_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+@pytest.mark.parametrize('if_none_match, status_code', [
+    ('{etag}', 304),
+    ('W/{etag}', 304),
+    ('"other", {etag}', 304),
+    ('*', 304),
+    ('"other"', 200),
+    ('{etag_prefix}"', 200),
+    ('{etag}"other"', 200),
+])
+def test_list_if_none_match(oidc_api_client, service, if_none_match, status_code):
+    etag = oidc_api_client.get(LIST_URL)['ETag']
+
+    header = if_none_match.format(etag=etag, etag_prefix=etag[:-2])
+    response = oidc_api_client.get(LIST_URL, HTTP_IF_NONE_MATCH=header)
+
+    assert response.status_code == status_code
+
+
+def test_service_catalogue_version_expires_in_other_processes(api_client, service, monkeypatch):
+    with freeze_time('2019-01-01 12:00:00'):
+        # Drop the version set by the fixtures, which expires by the real time
+        cache.clear()
+        api_client.get(LIST_URL)
+
+    # The service is changed in another process, which has a cache of its own
+    monkeypatch.setattr('services.catalogue.cache', LocMemCache('other-process', {}))
+    with freeze_time('2019-01-01 12:00:30'):
+        service.set_current_language('fi')
+        service.name = 'Changed'
+        service.save()
+    monkeypatch.undo()
+
+    with freeze_time('2019-01-01 12:01:01'):
+        response = api_client.get(LIST_URL)
+    assert [s['name'] for s in response.data['results']] == [{'fi': 'Changed'}]
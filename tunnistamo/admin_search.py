@@ -0,0 +1,46 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Tables with fewer rows than this are counted exactly
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def get_estimated_count(model, using):
+    """Return the planner's estimate of the number of rows in the model's table, or -1 if unknown."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return int(row[0]) if row else -1
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator which doesn't count the rows of large unfiltered tables.
+
+    The number of rows is taken from the table statistics instead, which
+    is precise enough for the admin changelist.
+    """
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = get_estimated_count(self.object_list.model, self.object_list.db)
+            if estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdminMixin(object):
+    """
+    Admin changelist for large tables.
+
+    The search is Django's default case-insensitive substring match on
+    search_fields, i.e. UPPER(column::text) LIKE UPPER('%term%'). Each
+    of the fields should have a pg_trgm GIN index on that expression,
+    which serves the match for terms of three or more characters instead
+    of a scan of the whole table. The rows are counted with
+    EstimatedCountPaginator and the full result count is not shown.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
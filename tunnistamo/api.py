@@ -1,41 +1,66 @@
+import hashlib
 import logging
 
 import jwt
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+from helusers.models import ADGroup
 from oauth2_provider.contrib.rest_framework import TokenHasReadWriteScope
 from oauth2_provider.models import get_application_model
 from rest_framework import generics, mixins, permissions, serializers, views
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 
-from hkijwt.models import AppToAppPermission
+from hkijwt.permissions import get_app_to_app_permission_map, get_app_to_app_permissions_version
+from users.userinfo import get_user_version
 
 logger = logging.getLogger(__name__)
 
+JWT_CACHE_KEY = 'jwt:{token_digest}:{target}:{apps_version}:{user_version}'
+
+
+USER_FIELDS = [
+    'last_login', 'username', 'email', 'date_joined',
+    'first_name', 'last_name', 'uuid', 'department_name',
+]
+
+
+def get_include_ad_groups(request):
+    app = getattr(getattr(request, 'auth', None), 'application', None)
+    return not app or app.include_ad_groups
+
 
 class UserSerializer(serializers.ModelSerializer):
+    """
+    Serializes the user for the app making the request.
+
+    The AD groups are left out altogether, without querying them, when
+    the app doesn't include them.
+    """
     ad_groups = serializers.SerializerMethodField()
 
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request', None)
+        if request and not get_include_ad_groups(request):
+            del fields['ad_groups']
+        return fields
+
     def get_ad_groups(self, obj):
+        if 'ad_groups' in getattr(obj, '_prefetched_objects_cache', {}):
+            return [x.display_name for x in obj.ad_groups.all()]
         return [x.display_name for x in obj.ad_groups.order_by('display_name')]
 
     def to_representation(self, obj):
         ret = super(UserSerializer, self).to_representation(obj)
         if obj.first_name and obj.last_name:
             ret['display_name'] = '%s %s' % (obj.first_name, obj.last_name)
-        request = self.context.get('request', None)
-        if request:
-            app = getattr(request.auth, 'application', None)
-            if app and not app.include_ad_groups and 'ad_groups' in ret:
-                del ret['ad_groups']
         return ret
 
     class Meta:
-        fields = [
-            'last_login', 'username', 'email', 'date_joined',
-            'first_name', 'last_name', 'uuid', 'department_name',
-            'ad_groups'
-        ]
+        fields = USER_FIELDS + ['ad_groups']
         model = get_user_model()
 
 
@@ -44,10 +69,17 @@ class UserView(generics.RetrieveAPIView,
                mixins.RetrieveModelMixin):
     def get_queryset(self):
         user = self.request.user
+        # Fetch only the serialized columns and, for superusers who may
+        # read any user, the AD groups in a single prefetch query.
+        queryset = self.queryset.only(*USER_FIELDS)
         if user.is_superuser:
-            return self.queryset
+            if get_include_ad_groups(self.request):
+                queryset = queryset.prefetch_related(
+                    Prefetch('ad_groups', queryset=ADGroup.objects.order_by('display_name'))
+                )
+            return queryset
         else:
-            return self.queryset.filter(pk=user.pk)
+            return queryset.filter(pk=user.pk)
 
     def get_object(self):
         username = self.kwargs.get('username', None)
@@ -63,38 +95,69 @@ class UserView(generics.RetrieveAPIView,
     serializer_class = UserSerializer
 
 
+def get_jwt_payload(user, target_app):
+    """Return the user claims of the JWT for the target app, read directly from the user's fields."""
+    payload = {
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'department_name': user.department_name,
+    }
+    if target_app.include_ad_groups:
+        payload['ad_groups'] = list(user.ad_groups.order_by('display_name').values_list('display_name', flat=True))
+    if user.first_name and user.last_name:
+        payload['display_name'] = '%s %s' % (user.first_name, user.last_name)
+    return payload
+
+
+def get_jwt_cache_key(access_token, target_client_id, user):
+    return JWT_CACHE_KEY.format(
+        token_digest=hashlib.sha256(access_token.token.encode('utf-8')).hexdigest(),
+        target=target_client_id,
+        apps_version=get_app_to_app_permissions_version(),
+        user_version=get_user_version(user.id),
+    )
+
+
 class GetJWTView(views.APIView):
     permission_classes = [permissions.IsAuthenticated, TokenHasReadWriteScope]
 
     def get(self, request, format=None):
         requester_app = request.auth.application
-        target_app = request.query_params.get('target_app', '').strip()
-        if target_app:
-            qs = get_application_model().objects.all()
-            target_app = generics.get_object_or_404(qs, client_id=target_app)
-            try:
-                AppToAppPermission.objects.get(requester=requester_app, target=target_app)
-            except AppToAppPermission.DoesNotExist:
+        target_client_id = request.query_params.get('target_app', '').strip()
+        if target_client_id:
+            if not get_app_to_app_permission_map().is_permitted(requester_app.id, target_client_id):
+                qs = get_application_model().objects.all()
+                target_app = generics.get_object_or_404(qs, client_id=target_client_id)
                 raise PermissionDenied("no permissions for app %s" % target_app)
+            target_app = None
         else:
+            target_client_id = requester_app.client_id
             target_app = requester_app
 
-        secret = target_app.client_secret
         user = request.user
+        expires = request.auth.expires
+
+        # The JWT is cached until the access token expires, or the user
+        # or the applications change
+        cache_key = get_jwt_cache_key(request.auth, target_client_id, user)
+        encoded = cache.get(cache_key)
+
+        if encoded is None:
+            if target_app is None:
+                target_app = generics.get_object_or_404(get_application_model(), client_id=target_client_id)
+
+            payload = get_jwt_payload(user, target_app)
+            payload['iss'] = 'https://api.hel.fi/sso'  # FIXME: Make configurable
+            payload['sub'] = str(user.uuid)
+            payload['aud'] = target_app.client_id
+            payload['exp'] = expires
+            encoded = jwt.encode(payload, target_app.client_secret, algorithm='HS256')
+
+            timeout = (expires - timezone.now()).total_seconds()
+            if timeout > 0:
+                cache.set(cache_key, encoded, timeout)
 
-        payload = UserSerializer(user).data
-        delete_fields = ['last_login', 'date_joined', 'uuid']
-        for field in delete_fields:
-            if field in payload:
-                del payload[field]
-        if not target_app.include_ad_groups:
-            del payload['ad_groups']
-
-        payload['iss'] = 'https://api.hel.fi/sso'  # FIXME: Make configurable
-        payload['sub'] = str(user.uuid)
-        payload['aud'] = target_app.client_id
-        payload['exp'] = request.auth.expires
-        encoded = jwt.encode(payload, secret, algorithm='HS256')
-
-        ret = dict(token=encoded, expires_at=request.auth.expires)
+        ret = dict(token=encoded, expires_at=expires)
         return Response(ret)
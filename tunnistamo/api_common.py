@@ -15,6 +15,7 @@ from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 from devices.models import InterfaceDevice, UserDevice
+from tunnistamo.metrics import instrument_authentication
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -88,6 +89,7 @@ class TokenAuth:
 class OidcTokenAuthentication(BaseAuthentication):
     scopes_needed = ['openid']
 
+    @instrument_authentication('oidc_token')
     def authenticate(self, request):
         access_token = extract_access_token(request)
 
@@ -114,6 +116,7 @@ class OidcTokenAuthentication(BaseAuthentication):
 
 
 class DeviceGeneratedJWTAuthentication(BaseAuthentication):
+    @instrument_authentication('device_generated_jwt')
     def authenticate(self, request):  # noqa  (too complex)
         token_value = extract_access_token(request)
         if not token_value:
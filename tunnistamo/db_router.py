@@ -0,0 +1,130 @@
+"""
+Routing of the reads of read-only views to a read replica.
+
+Views opt in to the replica with ReadReplicaMixin (DRF views) or the
+use_read_replica decorator (other views). Only the requests with a safe
+method are routed, and the user is authenticated from the primary before
+the replica is used, so that newly minted tokens and sessions are found.
+All writes go to the primary.
+
+After a user has written something, e.g. deleted a consent or registered
+a device, the user's requests are pinned to the primary for
+READ_REPLICA_PIN_SECONDS seconds, so that the user reads their own writes
+despite the replication lag. The pins are kept in the Django cache.
+
+The replica is the database alias given in the READ_REPLICA_DATABASE
+setting. Without it every query goes to the primary.
+"""
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+READ_REPLICA_PIN_CACHE_KEY = 'read_replica_pinned:{user_id}'
+
+DEFAULT_READ_REPLICA_PIN_SECONDS = 10
+
+_local = threading.local()
+
+
+def get_replica_alias():
+    alias = getattr(settings, 'READ_REPLICA_DATABASE', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def pin_to_primary(user):
+    timeout = getattr(settings, 'READ_REPLICA_PIN_SECONDS', DEFAULT_READ_REPLICA_PIN_SECONDS)
+    cache.set(READ_REPLICA_PIN_CACHE_KEY.format(user_id=user.id), True, timeout)
+
+
+def is_pinned_to_primary(user):
+    if not user.is_authenticated:
+        return False
+    return cache.get(READ_REPLICA_PIN_CACHE_KEY.format(user_id=user.id)) is not None
+
+
+def can_use_replica(request):
+    """Return True if the reads of the request can be served from the replica."""
+    if request.method not in SAFE_METHODS or get_replica_alias() is None:
+        return False
+    return not is_pinned_to_primary(request.user)
+
+
+def set_use_replica(use_replica):
+    _local.use_replica = use_replica
+
+
+class ReadReplicaRouter(object):
+    def db_for_read(self, model, **hints):
+        if getattr(_local, 'use_replica', False):
+            return get_replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        if get_replica_alias() is None:
+            return None
+        _local.wrote = True
+        # Objects read from the replica are saved to the primary too
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, get_replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == get_replica_alias():
+            return False
+        return None
+
+
+class ReadReplicaMiddleware(object):
+    """Pin the user to the primary if the request wrote to the database."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.wrote = False
+        set_use_replica(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            set_use_replica(False)
+
+        user = getattr(request, 'user', None)
+        if _local.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user)
+        return response
+
+
+class ReadReplicaMixin(object):
+    """Serve the safe requests of a DRF view from the read replica."""
+    def initial(self, request, *args, **kwargs):
+        # Authenticates the user and checks the permissions from the primary
+        super().initial(request, *args, **kwargs)
+        if can_use_replica(request):
+            set_use_replica(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        set_use_replica(False)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def use_read_replica(view_func):
+    """Serve the safe requests of the view from the read replica."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        # Loads the user of the session from the primary
+        if not can_use_replica(request):
+            return view_func(request, *args, **kwargs)
+
+        set_use_replica(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            set_use_replica(False)
+    return wrapper
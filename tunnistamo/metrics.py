@@ -0,0 +1,125 @@
+"""
+Prometheus metrics of the authentication and token hot paths.
+
+When Tunnistamo is run in several worker processes, e.g. with gunicorn, the
+prometheus_multiproc_dir environment variable should point to an empty
+directory shared by the workers. The metrics of all the workers are then
+aggregated from the files in the directory when they are scraped.
+"""
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from ipware import get_client_ip
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.exposition import CONTENT_TYPE_LATEST
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from identities.circuit_breaker import CircuitBreaker, circuit_breakers
+
+# The metrics are served only to localhost unless METRICS_ALLOWED_IPS is set
+DEFAULT_METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+TOKEN_AUTHENTICATION_SECONDS = Histogram(
+    'tunnistamo_token_authentication_seconds',
+    'Time spent authenticating API requests by their token, by authentication class and outcome',
+    ['authentication', 'outcome'],
+)
+API_TOKEN_MINT_SECONDS = Histogram(
+    'tunnistamo_api_token_mint_seconds',
+    'Time spent generating an API token, by API',
+    ['api'],
+)
+HELMET_VALIDATION_SECONDS = Histogram(
+    'tunnistamo_helmet_validation_seconds',
+    'Time spent validating Helmet patrons, by outcome',
+    ['outcome'],
+)
+GEOIP_LOOKUP_SECONDS = Histogram(
+    'tunnistamo_geoip_lookup_seconds',
+    'Time spent looking up the geo location of an IP address',
+)
+LOGIN_ENTRY_WRITE_SECONDS = Histogram(
+    'tunnistamo_login_entry_write_seconds',
+    'Time from the start of a user login entry creation until the entry is written',
+)
+AUTHORIZE_HOOK_DECISIONS = Counter(
+    'tunnistamo_authorize_hook_decisions_total',
+    'Decisions of the after user login hook of the OIDC authorize view',
+    ['decision'],
+)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """
+    Observe the duration of the block in the histogram.
+
+    The labels are yielded as a dict, which the block can update e.g.
+    with the outcome. The duration is observed even if the block raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        metric = histogram.labels(**labels) if labels else histogram
+        metric.observe(time.perf_counter() - start)
+
+
+def instrument_authentication(name):
+    """Decorate the authenticate() method of a DRF authentication class to record its outcomes."""
+    def decorator(authenticate):
+        @wraps(authenticate)
+        def wrapper(self, request):
+            with timed(TOKEN_AUTHENTICATION_SECONDS, authentication=name, outcome='failed') as labels:
+                result = authenticate(self, request)
+                labels['outcome'] = 'skipped' if result is None else 'authenticated'
+                return result
+        return wrapper
+    return decorator
+
+
+class CircuitBreakerCollector(object):
+    """Report the current state of the circuit breakers, which is shared by all workers through the cache."""
+    states = (CircuitBreaker.STATE_CLOSED, CircuitBreaker.STATE_OPEN, CircuitBreaker.STATE_HALF_OPEN)
+
+    def collect(self):
+        metric = GaugeMetricFamily(
+            'tunnistamo_circuit_breaker_state', 'Current state of the circuit breaker', labels=['name', 'state']
+        )
+        for name, circuit_breaker in sorted(circuit_breakers.items()):
+            current_state = circuit_breaker.state
+            for state in self.states:
+                metric.add_metric([name, state], 1 if state == current_state else 0)
+        yield metric
+
+
+def is_multiprocess():
+    # prometheus_client 0.4 reads only the lowercase variable
+    return bool(os.environ.get('prometheus_multiproc_dir'))
+
+
+def get_registry():
+    if not is_multiprocess():
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    registry.register(CircuitBreakerCollector())
+    return registry
+
+
+REGISTRY.register(CircuitBreakerCollector())
+
+
+def metrics_view(request):
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', DEFAULT_METRICS_ALLOWED_IPS)
+    if get_client_ip(request)[0] not in allowed_ips:
+        raise PermissionDenied
+
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -19,8 +19,11 @@ def get_userinfo(claims, user):
     claims['name'] = user.get_full_name()
 
     # Email
+    # Note: The email addresses are iterated instead of filtered, so
+    # that the addresses prefetched by oidc_apis.scopes.ClaimsContext
+    # are used
     email_address = (
-        user.emailaddress_set.filter(primary=True).first()
+        next((x for x in user.emailaddress_set.all() if x.primary), None)
         if hasattr(user, 'emailaddress_set') else None)
     if email_address:
         claims['email'] = email_address.email
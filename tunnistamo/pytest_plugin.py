@@ -0,0 +1,65 @@
+"""
+Pytest plugin which fails tests making a view exceed its SQL query budget.
+
+The budgets are enforced in the tests with the query_budget marker, e.g.
+the tests of the views, and single tests can opt out with the
+no_query_budget marker. With --query-budget-report the largest query
+count of each view is listed at the end of the test run.
+
+tunnistamo.query_budget is imported only when needed, as importing it
+before Django has configured logging would disable its logger.
+"""
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--query-budget-report', action='store_true', default=False,
+        help='List the largest number of SQL queries made by each view.'
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'query_budget: fail if a view exceeds its SQL query budget')
+    config.addinivalue_line('markers', 'no_query_budget: allow views to exceed their SQL query budgets')
+    if config.getoption('--query-budget-report'):
+        config.pluginmanager.register(QueryBudgetReport(), 'query_budget_report')
+
+
+class QueryBudgetReport(object):
+    def __init__(self):
+        self.query_counts = {}
+        self.connected = False
+
+    def pytest_runtest_setup(self, item):
+        if not self.connected:
+            from tunnistamo.query_budget import view_queries_recorded
+
+            view_queries_recorded.connect(self.record, weak=False)
+            self.connected = True
+
+    def record(self, sender, view, query_count, **kwargs):
+        self.query_counts[view] = max(query_count, self.query_counts.get(view, 0))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        from tunnistamo.query_budget import get_query_budgets
+
+        budgets = get_query_budgets()
+        terminalreporter.section('SQL queries per view')
+        for view, query_count in sorted(self.query_counts.items()):
+            budget = budgets.get(view)
+            terminalreporter.write_line('{:<60} {:>4} / {}'.format(view, query_count, budget if budget else '-'))
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(request):
+    node = request.node
+    if node.get_closest_marker('query_budget') is not None and node.get_closest_marker('no_query_budget') is None:
+        request.getfixturevalue('settings').QUERY_BUDGET_ACTION = 'raise'
+
+
+@pytest.fixture
+def assert_max_queries():
+    from tunnistamo.query_budget import assert_max_queries
+
+    return assert_max_queries
@@ -0,0 +1,131 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of SQL queries per request for each view, including the
+# queries made by the middleware, e.g. for authenticating the token. Views
+# whose queries depend on the amount of data, such as the API tokens view,
+# increase their budget with increase_query_budget().
+DEFAULT_QUERY_BUDGETS = {
+    'oidc_apis.views.get_api_tokens_view': 8,
+    'scopes.api.ScopeListView': 6,
+    'services.api.ServiceViewSet': 8,
+    'tunnistamo.api.GetJWTView': 6,
+    'tunnistamo.api.UserView': 6,
+    'users.api.UserConsentViewSet': 10,
+    'users.api.UserLoginEntryViewSet': 8,
+    'users.views.TunnistamoOidcAuthorizeView': 25,
+    'users.views.userinfo': 8,
+}
+
+view_queries_recorded = Signal(providing_args=['view', 'query_count', 'query_time', 'budget'])
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter(object):
+    """Database execute wrapper which counts the queries and the time spent in them."""
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time += time.perf_counter() - start
+
+
+@contextmanager
+def count_queries(using=None):
+    """Count the queries made within the block on the given database, or on all databases."""
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for alias in [using] if using else connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        yield counter
+
+
+@contextmanager
+def assert_max_queries(max_queries, using=None):
+    """Raise QueryBudgetExceeded if more than max_queries queries are made within the block."""
+    with count_queries(using) as counter:
+        yield counter
+    if counter.count > max_queries:
+        raise QueryBudgetExceeded('{} queries executed, the budget is {}'.format(counter.count, max_queries))
+
+
+def increase_query_budget(request, query_count):
+    """Allow the view of the request to make query_count more queries, e.g. for each object it processes."""
+    request._query_budget_increase = getattr(request, '_query_budget_increase', 0) + query_count
+
+
+def get_query_budgets():
+    budgets = dict(DEFAULT_QUERY_BUDGETS)
+    budgets.update(getattr(settings, 'QUERY_BUDGETS', {}))
+    return budgets
+
+
+def get_view_path(view_func):
+    """Return the dotted path of the view function, or of the view class for class-based views."""
+    view = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None) or view_func
+    return '{}.{}'.format(view.__module__, view.__qualname__)
+
+
+class QueryBudgetMiddleware(object):
+    """
+    Record the number of SQL queries and the time spent in them for each view.
+
+    The counts are logged and sent with the view_queries_recorded signal.
+    When a view exceeds its budget in QUERY_BUDGETS, a warning is logged, or
+    QueryBudgetExceeded is raised if QUERY_BUDGET_ACTION is 'raise'. The
+    budget is increased by the view's calls to increase_query_budget(). Setting
+    QUERY_BUDGET_ACTION to None disables the middleware.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        action = getattr(settings, 'QUERY_BUDGET_ACTION', 'log')
+        if not action:
+            return self.get_response(request)
+
+        with count_queries() as counter:
+            response = self.get_response(request)
+
+        view = getattr(request, '_query_budget_view', None)
+        if view is not None:
+            self.check_budget(view, counter, action, getattr(request, '_query_budget_increase', 0))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget_view = get_view_path(view_func)
+
+    def check_budget(self, view, counter, action, increase=0):
+        budget = get_query_budgets().get(view)
+        if budget is not None:
+            budget += increase
+        view_queries_recorded.send(
+            sender=self.__class__, view=view, query_count=counter.count, query_time=counter.time, budget=budget
+        )
+        logger.debug('%s: %d queries in %.1f ms', view, counter.count, counter.time * 1000)
+
+        if budget is None or counter.count <= budget:
+            return
+
+        message = '{} executed {} queries in {:.1f} ms, the budget is {}'.format(
+            view, counter.count, counter.time * 1000, budget
+        )
+        if action == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -69,10 +69,13 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE = (
+    'tunnistamo.query_budget.QueryBudgetMiddleware',
+    'tunnistamo.tracing.TracingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tunnistamo.db_router.ReadReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -123,6 +126,7 @@ DATABASES = {
         'NAME': 'tunnistamo',
     }
 }
+DATABASE_ROUTERS = ['tunnistamo.db_router.ReadReplicaRouter']
 
 #
 # Internationalization
@@ -220,6 +224,10 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': False,
         },
+        # Keeps the loggers of the tunnistamo modules imported before the configuration enabled
+        'tunnistamo': {
+            'handlers': [],
+        },
         '': {
             'handlers': ['console'],
             'level': 'DEBUG',
@@ -0,0 +1,79 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from tunnistamo.db_router import (
+    ReadReplicaMiddleware, ReadReplicaRouter, can_use_replica, is_pinned_to_primary, set_use_replica
+)
+from users.factories import UserFactory
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASES = dict(settings.DATABASES, replica=settings.DATABASES['default'])
+    settings.READ_REPLICA_DATABASE = 'replica'
+    yield 'replica'
+    set_use_replica(False)
+
+
+def get_request(method, user):
+    request = getattr(RequestFactory(), method)('/')
+    request.user = user
+    return request
+
+
+def test_router_reads_from_replica_only_when_enabled(replica):
+    router = ReadReplicaRouter()
+    assert router.db_for_read(None) is None
+
+    set_use_replica(True)
+    assert router.db_for_read(None) == 'replica'
+    assert router.db_for_write(None) == 'default'
+
+
+def test_router_without_replica(settings):
+    router = ReadReplicaRouter()
+    set_use_replica(True)
+    try:
+        assert router.db_for_read(None) is None
+        assert router.db_for_write(None) is None
+    finally:
+        set_use_replica(False)
+
+
+def test_replica_is_used_only_for_safe_methods(replica):
+    assert can_use_replica(get_request('get', AnonymousUser()))
+    assert not can_use_replica(get_request('post', AnonymousUser()))
+
+
+def test_user_is_pinned_to_primary_after_write(replica):
+    user = UserFactory()
+
+    def get_response(request):
+        ReadReplicaRouter().db_for_write(None)
+        return 'response'
+
+    ReadReplicaMiddleware(get_response)(get_request('delete', user))
+
+    assert is_pinned_to_primary(user)
+    assert not can_use_replica(get_request('get', user))
+
+
+def test_user_is_not_pinned_without_writes(replica):
+    user = UserFactory()
+
+    ReadReplicaMiddleware(lambda request: 'response')(get_request('get', user))
+
+    assert not is_pinned_to_primary(user)
+    assert can_use_replica(get_request('get', user))
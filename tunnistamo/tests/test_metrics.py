@@ -0,0 +1,93 @@
+import pytest
+from django.test import RequestFactory
+from prometheus_client import REGISTRY, CollectorRegistry, Histogram
+
+from identities.backends import helmet_circuit_breaker
+from tunnistamo.api_common import OidcTokenAuthentication
+from tunnistamo.metrics import get_registry, timed
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+def get_authentication_count(outcome):
+    labels = {'authentication': 'oidc_token', 'outcome': outcome}
+    return REGISTRY.get_sample_value('tunnistamo_token_authentication_seconds_count', labels) or 0
+
+
+def test_metrics_endpoint(client):
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    content = response.content.decode('utf-8')
+    assert 'tunnistamo_token_authentication_seconds' in content
+    assert 'tunnistamo_circuit_breaker_state{name="helmet",state="closed"} 1.0' in content
+
+
+def test_metrics_endpoint_allowed_ips(client, settings):
+    settings.METRICS_ALLOWED_IPS = ['10.0.0.1']
+    assert client.get('/metrics').status_code == 403
+
+    settings.METRICS_ALLOWED_IPS = ['127.0.0.1']
+    assert client.get('/metrics').status_code == 200
+
+
+def test_metrics_endpoint_is_limited_to_localhost_by_default(client):
+    assert client.get('/metrics', REMOTE_ADDR='10.0.0.1').status_code == 403
+    assert client.get('/metrics', REMOTE_ADDR='::1').status_code == 200
+
+
+def test_circuit_breaker_state_is_reported(client):
+    helmet_circuit_breaker._open()
+    try:
+        content = client.get('/metrics').content.decode('utf-8')
+    finally:
+        helmet_circuit_breaker.reset()
+
+    assert 'tunnistamo_circuit_breaker_state{name="helmet",state="open"} 1.0' in content
+
+
+@pytest.mark.parametrize('authorization, outcome', [
+    (None, 'skipped'),
+    ('Bearer unknown', 'skipped'),
+])
+def test_token_authentication_outcome_is_recorded(authorization, outcome):
+    headers = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+    request = RequestFactory().get('/', **headers)
+    count = get_authentication_count(outcome)
+
+    assert OidcTokenAuthentication().authenticate(request) is None
+
+    assert get_authentication_count(outcome) == count + 1
+
+
+def test_timed_observes_failing_block():
+    registry = CollectorRegistry()
+    histogram = Histogram('test_seconds', 'Test', ['outcome'], registry=registry)
+
+    with pytest.raises(ValueError):
+        with timed(histogram, outcome='failed') as labels:
+            raise ValueError()
+    with timed(histogram, outcome='failed') as labels:
+        labels['outcome'] = 'succeeded'
+
+    assert registry.get_sample_value('test_seconds_count', {'outcome': 'failed'}) == 1
+    assert registry.get_sample_value('test_seconds_count', {'outcome': 'succeeded'}) == 1
+
+
+def test_multiprocess_registry(monkeypatch, tmpdir):
+    monkeypatch.setenv('prometheus_multiproc_dir', str(tmpdir))
+
+    registry = get_registry()
+
+    assert registry is not REGISTRY
+    assert registry.get_sample_value('tunnistamo_circuit_breaker_state', {'name': 'helmet', 'state': 'closed'}) == 1
+
+
+def test_uppercase_multiprocess_variable_is_ignored(monkeypatch, tmpdir):
+    monkeypatch.delenv('prometheus_multiproc_dir', raising=False)
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmpdir))
+
+    assert get_registry() is REGISTRY
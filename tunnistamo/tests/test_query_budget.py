@@ -0,0 +1,121 @@
+import logging
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+from rest_framework.test import APIClient
+
+from oidc_apis.views import get_api_tokens_view
+from services.api import ServiceViewSet
+from tunnistamo.query_budget import (
+    DEFAULT_QUERY_BUDGETS, QueryBudgetExceeded, QueryBudgetMiddleware, assert_max_queries, get_view_path,
+    increase_query_budget, view_queries_recorded
+)
+from users.views import TunnistamoOidcAuthorizeView
+
+pytestmark = pytest.mark.query_budget
+
+SCOPE_LIST_VIEW = 'scopes.api.ScopeListView'
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def recorded_views():
+    recorded = []
+
+    def receiver(sender, **kwargs):
+        recorded.append(kwargs)
+
+    view_queries_recorded.connect(receiver)
+    yield recorded
+    view_queries_recorded.disconnect(receiver)
+
+
+@pytest.mark.parametrize('view_path', DEFAULT_QUERY_BUDGETS)
+def test_default_budgets_refer_to_views(view_path):
+    assert import_string(view_path)
+
+
+@pytest.mark.parametrize('view_func, expected', [
+    (get_api_tokens_view, 'oidc_apis.views.get_api_tokens_view'),
+    (ServiceViewSet.as_view({'get': 'list'}), 'services.api.ServiceViewSet'),
+    (TunnistamoOidcAuthorizeView.as_view(), 'users.views.TunnistamoOidcAuthorizeView'),
+])
+def test_get_view_path(view_func, expected):
+    assert get_view_path(view_func) == expected
+
+
+def test_queries_are_recorded(recorded_views):
+    response = APIClient().get('/v1/scope/')
+
+    assert response.status_code == 200
+    assert len(recorded_views) == 1
+    assert recorded_views[0]['view'] == SCOPE_LIST_VIEW
+    assert recorded_views[0]['query_count'] > 0
+    assert recorded_views[0]['budget'] == DEFAULT_QUERY_BUDGETS[SCOPE_LIST_VIEW]
+
+
+def test_exceeding_budget_raises(settings):
+    settings.QUERY_BUDGETS = {SCOPE_LIST_VIEW: 0}
+
+    with pytest.raises(QueryBudgetExceeded):
+        APIClient().get('/v1/scope/')
+
+
+@pytest.mark.no_query_budget
+def test_exceeding_budget_logs_warning(settings, caplog):
+    settings.QUERY_BUDGETS = {SCOPE_LIST_VIEW: 0}
+    settings.QUERY_BUDGET_ACTION = 'log'
+
+    with caplog.at_level(logging.WARNING, logger='tunnistamo.query_budget'):
+        response = APIClient().get('/v1/scope/')
+
+    assert response.status_code == 200
+    assert any(SCOPE_LIST_VIEW in record.getMessage() for record in caplog.records)
+
+
+def test_increased_budget(settings, recorded_views):
+    settings.QUERY_BUDGETS = {SCOPE_LIST_VIEW: 0}
+
+    def get_response(request):
+        middleware.process_view(request, import_string(SCOPE_LIST_VIEW).as_view(), (), {})
+        increase_query_budget(request, 1)
+        get_user_model().objects.count()
+        return HttpResponse()
+
+    middleware = QueryBudgetMiddleware(get_response)
+    middleware(RequestFactory().get('/'))
+
+    assert recorded_views[0]['query_count'] == 1
+    assert recorded_views[0]['budget'] == 1
+
+
+def test_disabled_middleware_records_nothing(settings, recorded_views):
+    settings.QUERY_BUDGET_ACTION = None
+
+    APIClient().get('/v1/scope/')
+
+    assert recorded_views == []
+
+
+def test_assert_max_queries():
+    with assert_max_queries(1) as counter:
+        get_user_model().objects.count()
+    assert counter.count == 1
+
+    with pytest.raises(QueryBudgetExceeded):
+        with assert_max_queries(1):
+            get_user_model().objects.count()
+            get_user_model().objects.count()
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+from tunnistamo.tracing import NOOP_SPAN, OTLPSpanExporter, span, start_trace, traced
+from users.pipeline import get_user_uuid
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+@pytest.fixture
+def spans_file(settings, tmpdir):
+    path = tmpdir.join('spans.jsonl')
+    settings.TRACING_SAMPLE_RATE = 1
+    settings.TRACING_EXPORTER = 'tunnistamo.tracing.FileSpanExporter'
+    settings.TRACING_EXPORTER_OPTIONS = {'path': str(path)}
+    return path
+
+
+def read_spans(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read().splitlines()]
+
+
+def test_span_outside_trace_does_nothing(spans_file):
+    with span('test') as current_span:
+        assert current_span is NOOP_SPAN
+
+    assert read_spans(spans_file) == []
+
+
+def test_spans_are_exported_with_parents(spans_file):
+    with start_trace('root'):
+        with span('child', attribute='value'):
+            with pytest.raises(ValueError):
+                with span('grandchild'):
+                    raise ValueError()
+
+    root, child, grandchild = read_spans(spans_file)
+    assert [root['name'], child['name'], grandchild['name']] == ['root', 'child', 'grandchild']
+    assert root['parent_id'] is None
+    assert child['parent_id'] == root['span_id']
+    assert grandchild['parent_id'] == child['span_id']
+    assert len({root['trace_id'], child['trace_id'], grandchild['trace_id']}) == 1
+    assert child['attributes'] == {'attribute': 'value'}
+    assert grandchild['error'] == 'ValueError'
+    assert root['start_time'] <= child['start_time'] <= child['end_time'] <= root['end_time']
+
+
+def test_unsampled_trace_is_not_exported(settings, spans_file):
+    settings.TRACING_SAMPLE_RATE = 0
+
+    with start_trace('root'):
+        with span('child') as current_span:
+            assert current_span is NOOP_SPAN
+
+    assert read_spans(spans_file) == []
+
+
+def test_traced_function(spans_file):
+    @traced()
+    def function():
+        return 'result'
+
+    with start_trace('root'):
+        assert function() == 'result'
+
+    assert read_spans(spans_file)[1]['name'] == '{}.{}'.format(__name__, function.__qualname__)
+
+
+def test_pipeline_steps_are_traced(spans_file):
+    class Backend:
+        pass
+
+    with start_trace('root'):
+        get_user_uuid({}, Backend(), {})
+
+    assert [s['name'] for s in read_spans(spans_file)] == ['root', 'pipeline.get_user_uuid']
+
+
+def test_requests_are_traced(spans_file):
+    response = APIClient().get('/v1/scope/?secret=value')
+
+    assert response.status_code == 200
+    root = read_spans(spans_file)[0]
+    assert root['attributes'] == {
+        'http.method': 'GET',
+        'http.path': '/v1/scope/',
+        'http.status_code': 200,
+        'view': 'scopes.api.ScopeListView',
+    }
+
+
+def test_otlp_payload(spans_file):
+    with start_trace('root', method='GET'):
+        with span('child'):
+            pass
+    root, child = read_spans(spans_file)
+
+    class ExportedSpan:
+        def __init__(self, data):
+            self.__dict__.update(data)
+
+    payload = OTLPSpanExporter().get_payload([ExportedSpan(root), ExportedSpan(child)])
+
+    otlp_root, otlp_child = payload['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert otlp_root['traceId'] == root['trace_id']
+    assert 'parentSpanId' not in otlp_root
+    assert otlp_root['attributes'] == [{'key': 'method', 'value': {'stringValue': 'GET'}}]
+    assert otlp_child['parentSpanId'] == root['span_id']
+    assert int(otlp_child['endTimeUnixNano']) >= int(otlp_child['startTimeUnixNano'])
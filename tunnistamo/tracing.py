@@ -0,0 +1,273 @@
+"""
+Lightweight tracing of the hot paths.
+
+A trace is started for a sample of the requests by TracingMiddleware.
+Within a sampled request, span() and traced() record the duration of
+the phases of the request as nested spans. Outside of a sampled trace
+they do nothing, so the instrumentation is cheap for the rest of the
+requests.
+
+The spans of a trace are exported when the request finishes, with the
+exporter given in the TRACING_EXPORTER setting. TRACING_EXPORTER_OPTIONS
+are passed to the exporter as keyword arguments, and TRACING_SAMPLE_RATE
+is the fraction of requests to trace (by default none).
+"""
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from tunnistamo.query_budget import get_view_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACING_EXPORTER = 'tunnistamo.tracing.StdoutSpanExporter'
+DEFAULT_OTLP_ENDPOINT = 'http://localhost:4318/v1/traces'
+
+_local = threading.local()
+_exporter = None
+
+
+class Span(object):
+    def __init__(self, trace_id, name, parent_id=None, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start_time = time.time()
+        self.end_time = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.end_time = time.time()
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'duration_ms': (self.end_time - self.start_time) * 1000,
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class NoopSpan(object):
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Trace(object):
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self.stack = []
+
+    def start_span(self, name, attributes):
+        parent_id = self.stack[-1].span_id if self.stack else None
+        span = Span(self.trace_id, name, parent_id=parent_id, attributes=attributes)
+        self.spans.append(span)
+        self.stack.append(span)
+        return span
+
+    def end_span(self, span):
+        span.end()
+        self.stack.remove(span)
+
+
+def get_current_trace():
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Record the block as a span of the current trace, or do nothing if the request isn't traced."""
+    trace = get_current_trace()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+
+    current_span = trace.start_span(name, attributes)
+    try:
+        yield current_span
+    except Exception as e:
+        current_span.error = type(e).__name__
+        raise
+    finally:
+        trace.end_span(current_span)
+
+
+def traced(name=None):
+    """Decorate a function to record its calls as spans, named by default after the function."""
+    def decorator(func):
+        span_name = name or '{}.{}'.format(func.__module__, func.__qualname__)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def is_sampled():
+    sample_rate = getattr(settings, 'TRACING_SAMPLE_RATE', 0)
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+@contextmanager
+def start_trace(name, **attributes):
+    """
+    Start a trace with the block as its root span, if the trace is sampled.
+
+    The spans are exported when the block exits. Within an existing trace
+    the block is recorded as a nested span instead.
+    """
+    if get_current_trace() is not None or not is_sampled():
+        with span(name, **attributes) as current_span:
+            yield current_span
+        return
+
+    trace = _local.trace = Trace()
+    try:
+        with span(name, **attributes) as root_span:
+            yield root_span
+    finally:
+        _local.trace = None
+        export_spans(trace.spans)
+
+
+def get_exporter():
+    global _exporter
+
+    exporter_path = getattr(settings, 'TRACING_EXPORTER', DEFAULT_TRACING_EXPORTER)
+    options = getattr(settings, 'TRACING_EXPORTER_OPTIONS', {})
+    if _exporter is None or _exporter[0] != (exporter_path, options):
+        _exporter = ((exporter_path, options), import_string(exporter_path)(**options))
+    return _exporter[1]
+
+
+def export_spans(spans):
+    try:
+        get_exporter().export(spans)
+    except Exception as e:
+        # Tracing must never make the request fail
+        logger.warning('Cannot export spans: {}'.format(e))
+
+
+class StdoutSpanExporter(object):
+    """Write the spans to stdout as JSON lines."""
+    def export(self, spans):
+        sys.stdout.write(''.join(json.dumps(span.to_dict()) + '\n' for span in spans))
+        sys.stdout.flush()
+
+
+class FileSpanExporter(object):
+    """Append the spans to a file as JSON lines."""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, spans):
+        lines = ''.join(json.dumps(span.to_dict()) + '\n' for span in spans)
+        with self.lock, open(self.path, 'a') as f:
+            f.write(lines)
+
+
+def _get_otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _get_otlp_attributes(attributes):
+    return [{'key': key, 'value': _get_otlp_value(value)} for key, value in attributes.items()]
+
+
+class OTLPSpanExporter(object):
+    """
+    Send the spans to an OpenTelemetry collector with OTLP over HTTP, using JSON encoding.
+
+    The spans are sent in a background thread, so that the request doesn't
+    wait for the collector.
+    """
+    def __init__(self, endpoint=DEFAULT_OTLP_ENDPOINT, service_name='tunnistamo', timeout=5):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans):
+        payload = self.get_payload(spans)
+        threading.Thread(target=self.send, args=(payload,), daemon=True).start()
+
+    def get_payload(self, spans):
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                'traceId': span.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': 1,
+                'startTimeUnixNano': str(int(span.start_time * 1e9)),
+                'endTimeUnixNano': str(int(span.end_time * 1e9)),
+                'attributes': _get_otlp_attributes(span.attributes),
+            }
+            if span.parent_id:
+                otlp_span['parentSpanId'] = span.parent_id
+            if span.error:
+                otlp_span['status'] = {'code': 2, 'message': span.error}
+            otlp_spans.append(otlp_span)
+
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _get_otlp_attributes({'service.name': self.service_name})},
+                'scopeSpans': [{'scope': {'name': 'tunnistamo'}, 'spans': otlp_spans}],
+            }],
+        }
+
+    def send(self, payload):
+        try:
+            response = requests.post(self.endpoint, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning('Cannot send spans to {}: {}'.format(self.endpoint, e))
+
+
+class TracingMiddleware(object):
+    """Trace a sample of the requests, with the whole request as the root span."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # The query string is left out, as it may contain authorization codes or tokens
+        with start_trace('request', **{'http.method': request.method, 'http.path': request.path}) as root_span:
+            request._tracing_root_span = root_span
+            response = self.get_response(request)
+            root_span.set_attribute('http.status_code', response.status_code)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._tracing_root_span.set_attribute('view', get_view_path(view_func))
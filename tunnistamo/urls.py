@@ -1,5 +1,6 @@
 import oauth2_provider.urls
 import oidc_provider.urls
+import oidc_provider.views
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
@@ -18,9 +19,11 @@ from scopes.api import ScopeListView
 from services.api import ServiceViewSet
 from tunnistamo import social_auth_urls
 from users.api import UserConsentViewSet, UserLoginEntryViewSet
-from users.views import EmailNeededView, LoginView, LogoutView, TunnistamoOidcAuthorizeView
+from users.views import EmailNeededView, LoginView, LogoutView, TunnistamoOidcAuthorizeView, userinfo
 
 from .api import GetJWTView, UserView
+from .db_router import use_read_replica
+from .metrics import metrics_view
 
 
 def show_login(request):
@@ -65,6 +68,11 @@ urlpatterns = [
     path('oauth2/applications/', permission_denied),
     path('oauth2/', include(oauth2_provider.urls, namespace='oauth2_provider')),
     re_path(r'^openid/authorize/?$', TunnistamoOidcAuthorizeView.as_view(), name='authorize'),
+    re_path(r'^openid/userinfo/?$', userinfo, name='userinfo'),
+    re_path(r'^metrics/?$', metrics_view, name='metrics'),
+    re_path(r'^openid/\.well-known/openid-configuration/?$',
+            use_read_replica(oidc_provider.views.ProviderInfoView.as_view()), name='provider-info'),
+    re_path(r'^openid/jwks/?$', use_read_replica(oidc_provider.views.JwksView.as_view()), name='jwks'),
     path('openid/', include(oidc_provider.urls, namespace='oidc_provider')),
     re_path(r'^user/(?P<username>[\w.@+-]+)/?$', UserView.as_view()),
     path('user/', UserView.as_view()),
@@ -35,7 +35,11 @@ class TranslatableSerializer(serializers.Serializer):
 
     def to_representation(self, instance):
         ret = super(TranslatableSerializer, self).to_representation(instance)
-        translations = instance.translations.filter(language_code__in=self.Meta.translation_lang)
+        # Filtered in Python, so that prefetched translations are used
+        translations = [
+            translation for translation in instance.translations.all()
+            if translation.language_code in self.Meta.translation_lang
+        ]
 
         for translation in translations:
             for field in self.Meta.translated_fields:
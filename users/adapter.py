@@ -6,9 +6,10 @@ from allauth.account.utils import user_email
 from allauth.exceptions import ImmediateHttpResponse
 from allauth.socialaccount import app_settings
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
+from allauth.socialaccount.models import SocialAccount
 from allauth.socialaccount.signals import social_account_added, social_account_updated
-from allauth.utils import email_address_exists
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django.dispatch import receiver
 from django.shortcuts import redirect
 from django.urls import reverse
@@ -16,6 +17,7 @@ from django.urls import reverse
 from adfs_provider.provider import ADFSProvider
 
 from .models import LoginMethod
+from .utils import filter_by_email
 
 
 class SocialAccountAdapter(DefaultSocialAccountAdapter):
@@ -77,19 +79,20 @@ class SocialAccountAdapter(DefaultSocialAccountAdapter):
         email = user_email(sociallogin.user)
         # If we have a user with that email already, we don't allow
         # a signup through a new provider. Revisit this in the future.
-        if email_address_exists(email):
-            User = get_user_model()
-            try:
-                user = User.objects.get(email__iexact=email)
-                social_set = user.socialaccount_set.all()
-                # If the account doesn't have any social logins yet,
-                # allow the signup.
-                if not social_set:
-                    return True
-                providers = [a.provider for a in social_set]
-                request.other_logins = LoginMethod.objects.filter(provider_id__in=providers)
-            except User.DoesNotExist:
-                request.other_logins = []
+        User = get_user_model()
+        user = filter_by_email(User.objects, email).annotate(
+            has_social_accounts=Exists(SocialAccount.objects.filter(user=OuterRef('pk')))
+        ).order_by('-date_joined').first()
+        if user:
+            # If the account doesn't have any social logins yet,
+            # allow the signup.
+            if not user.has_social_accounts:
+                return True
+            providers = user.socialaccount_set.values('provider')
+            request.other_logins = LoginMethod.objects.filter(provider_id__in=providers)
+            return False
+        elif filter_by_email(EmailAddress.objects, email).exists():
+            request.other_logins = []
             return False
         else:
             return True
@@ -146,14 +149,13 @@ def link_by_trusted_email(request, sociallogin):
     for email_address in sociallogin.email_addresses:
         if email_address.verified:
             email = email_address.email
-            # Note: get_users_for finds only verified email addresses
-            users = EmailAddress.objects.get_users_for(email=email)
-            for user in users:
-                sociallogin.connect(request, user)
-            unverified_emails = EmailAddress.objects.filter(
-                email__iexact=email, verified=False)
-            for unverified_email in unverified_emails:
-                remove_email(unverified_email)
+            existing_addresses = list(filter_by_email(EmailAddress.objects, email).select_related('user'))
+            for existing_address in existing_addresses:
+                if existing_address.verified:
+                    sociallogin.connect(request, existing_address.user)
+            for existing_address in existing_addresses:
+                if not existing_address.verified:
+                    remove_email(existing_address)
 
 
 def remove_email(email_obj):
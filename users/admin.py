@@ -2,12 +2,14 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from oauth2_provider.models import get_application_model
 
+from tunnistamo.admin_search import LargeTableAdminMixin
+
 from .models import LoginMethod, User
 
 Application = get_application_model()
 
 
-class ExtendedUserAdmin(UserAdmin):
+class ExtendedUserAdmin(LargeTableAdminMixin, UserAdmin):
     search_fields = ['username', 'uuid', 'email', 'first_name', 'last_name']
     list_display = search_fields + ['is_active', 'is_staff', 'is_superuser']
 
@@ -7,6 +7,7 @@ from rest_framework.schemas import AutoSchema
 
 from scopes.api import ScopeDataBuilder
 from tunnistamo.api_common import OidcTokenAuthentication, ScopePermission
+from tunnistamo.db_router import ReadReplicaMixin
 from tunnistamo.pagination import DefaultPagination
 from users.models import UserLoginEntry
 
@@ -17,7 +18,7 @@ class UserLoginEntrySerializer(serializers.ModelSerializer):
         fields = ('service', 'timestamp', 'ip_address', 'geo_location')
 
 
-class UserLoginEntryViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class UserLoginEntryViewSet(ReadReplicaMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     List service login entries.
 
@@ -76,8 +77,8 @@ class UserConsentViewSchema(AutoSchema):
         return fields
 
 
-class UserConsentViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
-                         viewsets.GenericViewSet):
+class UserConsentViewSet(ReadReplicaMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin, viewsets.GenericViewSet):
     """
     List consents given to services.
 
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+
+from allauth.account.models import EmailConfirmation
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+from social_django.models import Association, Code, Nonce, Partial
+
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+# OpenID providers reject nonces older than this, so the rows are no longer needed
+NONCE_MAX_AGE = 5 * 60
+
+
+def get_expired_querysets(partial_max_age, code_max_age):
+    """Return the querysets of the expired rows of each kind, in the order they are deleted."""
+    now = timezone.now()
+    timestamp = int(time.time())
+    querysets = {}
+    if settings.SESSION_ENGINE in DB_SESSION_ENGINES:
+        querysets['sessions'] = Session.objects.filter(expire_date__lt=now)
+    querysets['nonces'] = Nonce.objects.filter(timestamp__lt=timestamp - NONCE_MAX_AGE)
+    querysets['associations'] = Association.objects.filter(issued__lt=timestamp - F('lifetime'))
+    querysets['partials'] = Partial.objects.filter(timestamp__lt=now - partial_max_age)
+    querysets['codes'] = Code.objects.filter(timestamp__lt=now - code_max_age)
+    querysets['email_confirmations'] = EmailConfirmation.objects.all_expired()
+    return querysets
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions, social auth nonces, associations, partials and codes, ' \
+           'and expired email confirmations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of rows deleted in one transaction (default 1000)')
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='Seconds to sleep between the batches, to let other queries '
+                                 'take the locks (default 0.1)')
+        parser.add_argument('--partial-max-age', type=int, default=24,
+                            help='Hours after which unfinished social auth pipelines are deleted (default 24)')
+        parser.add_argument('--code-max-age', type=int, default=24 * 7,
+                            help='Hours after which social auth email validation codes are deleted '
+                                 '(default 168)')
+        parser.add_argument('--only', action='append',
+                            choices=['sessions', 'nonces', 'associations', 'partials', 'codes',
+                                     'email_confirmations'],
+                            help='Delete only the given kind of rows, can be repeated')
+
+    def delete_in_batches(self, name, queryset, batch_size, sleep):
+        """
+        Delete the rows of the queryset in batches of primary keys.
+
+        Each batch is deleted in its own short transaction, so that the
+        rows are not locked for long and a large backlog of expired rows
+        doesn't make a single huge delete.
+        """
+        model = queryset.model
+        total = 0
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            model.objects.filter(pk__in=pks).delete()
+            total += len(pks)
+            self.stdout.write('{}: {} deleted'.format(name, total))
+            if len(pks) < batch_size:
+                break
+            time.sleep(sleep)
+        return total
+
+    def handle(self, *args, **options):
+        querysets = get_expired_querysets(
+            partial_max_age=timedelta(hours=options['partial_max_age']),
+            code_max_age=timedelta(hours=options['code_max_age']),
+        )
+        for name, queryset in querysets.items():
+            if options['only'] and name not in options['only']:
+                continue
+            total = self.delete_in_batches(name, queryset, options['batch_size'], options['sleep'])
+            self.stdout.write(self.style.SUCCESS('Deleted {} expired {}'.format(total, name.replace('_', ' '))))
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_add_user_login_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='ad_groups_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Indexes are created concurrently to avoid locking the tables
+    atomic = False
+
+    dependencies = [
+        ('account', '0002_email_max_length'),
+        ('users', '0014_add_ad_groups_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS users_user_email_lower_idx ON users_user (LOWER(email));',
+            'DROP INDEX CONCURRENTLY IF EXISTS users_user_email_lower_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS account_emailaddress_email_lower_idx '
+            'ON account_emailaddress (LOWER(email));',
+            'DROP INDEX CONCURRENTLY IF EXISTS account_emailaddress_email_lower_idx;',
+        ),
+    ]
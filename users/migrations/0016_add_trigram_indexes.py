@@ -0,0 +1,34 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('users_user', 'username'),
+    ('users_user', 'uuid'),
+    ('users_user', 'email'),
+    ('users_user', 'first_name'),
+    ('users_user', 'last_name'),
+]
+
+
+def create_trigram_index(table, column):
+    # The expression of the index is the one of Django's icontains lookup
+    return migrations.RunSQL(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_{column}_trgm_idx '
+        'ON {table} USING gin (UPPER({column}::text) gin_trgm_ops);'.format(table=table, column=column),
+        'DROP INDEX CONCURRENTLY IF EXISTS {table}_{column}_trgm_idx;'.format(table=table, column=column),
+    )
+
+
+class Migration(migrations.Migration):
+    # Indexes are created concurrently to avoid locking the tables
+    atomic = False
+
+    dependencies = [
+        ('users', '0015_add_lower_email_indexes'),
+    ]
+
+    operations = [
+        # The extension may be used by the indexes of other apps, so it is not dropped
+        migrations.RunSQL('CREATE EXTENSION IF NOT EXISTS pg_trgm;', migrations.RunSQL.noop),
+    ] + [
+        create_trigram_index(table, column) for (table, column) in TRIGRAM_INDEXES
+    ]
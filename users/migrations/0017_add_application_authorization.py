@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oauth2_provider', '0006_auto_20171214_2232'),
+        ('users', '0016_add_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationAuthorization',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created at')),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='authorizations', to=settings.OAUTH2_PROVIDER_APPLICATION_MODEL, verbose_name='application')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_authorizations', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'application authorization',
+                'verbose_name_plural': 'application authorizations',
+                'unique_together': {('user', 'application')},
+            },
+        ),
+        migrations.RunSQL(
+            'INSERT INTO users_applicationauthorization (user_id, application_id, created_at) '
+            'SELECT user_id, application_id, MIN(created) FROM oauth2_provider_accesstoken '
+            'WHERE user_id IS NOT NULL AND application_id IS NOT NULL '
+            'GROUP BY user_id, application_id;',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Indexes are created concurrently to avoid locking the tables
+    atomic = False
+
+    dependencies = [
+        ('oauth2_provider', '0006_auto_20171214_2232'),
+        ('users', '0017_add_application_authorization'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS oauth2_provider_accesstoken_user_application_idx '
+            'ON oauth2_provider_accesstoken (user_id, application_id) '
+            'WHERE user_id IS NOT NULL AND application_id IS NOT NULL;',
+            'DROP INDEX CONCURRENTLY IF EXISTS oauth2_provider_accesstoken_user_application_idx;',
+        ),
+    ]
@@ -1,31 +1,87 @@
 from __future__ import unicode_literals
 
+import hashlib
 import logging
 import uuid
 
 from django.contrib.postgres.fields import JSONField
-from django.db import models
+from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
-from helusers.models import AbstractUser
+from helusers.models import AbstractUser, ADGroup
 from ipware import get_client_ip
 from oauth2_provider.models import AbstractApplication
 from oidc_provider.models import Client
 
+from tunnistamo.metrics import LOGIN_ENTRY_WRITE_SECONDS, timed
 from users.utils import get_geo_location_data_for_ip
 
 logger = logging.getLogger(__name__)
 
 
+def get_ad_groups_fingerprint(ad_group_names):
+    """Return a digest of the given AD group names, ignoring their order and case."""
+    names = sorted(set(name.lower() for name in ad_group_names))
+    return hashlib.sha256('\n'.join(names).encode('utf-8')).hexdigest()
+
+
 class User(AbstractUser):
     primary_sid = models.CharField(max_length=100, unique=True)
+    # Fingerprint of the AD group names the user had on the last synchronisation
+    ad_groups_fingerprint = models.CharField(max_length=64, null=True, blank=True, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.primary_sid:
             self.primary_sid = uuid.uuid4()
         return super(User, self).save(*args, **kwargs)
 
+    def update_ad_groups(self, ad_group_names):
+        """Synchronise the user's AD groups with the given group names.
+
+        Nothing is written when the names are the same as on the previous
+        synchronisation. Otherwise the missing ADGroups are created in bulk
+        and the memberships are updated with a single add and a single remove.
+        """
+        fingerprint = get_ad_groups_fingerprint(ad_group_names)
+        if self.ad_groups_fingerprint == fingerprint:
+            return
+
+        with transaction.atomic():
+            # Lock the User object to prevent races
+            user = type(self).objects.select_for_update().get(id=self.id)
+            if user.ad_groups_fingerprint != fingerprint:
+                user._set_ad_groups(ad_group_names)
+                type(self).objects.filter(id=self.id).update(ad_groups_fingerprint=fingerprint)
+
+        self.ad_groups_fingerprint = fingerprint
+
+    def _set_ad_groups(self, ad_group_names):
+        display_names = {}
+        for name in ad_group_names:
+            display_names.setdefault(name.lower(), name)
+
+        # Make sure there's an ADGroup object for each group
+        ad_groups = dict(ADGroup.objects.filter(name__in=display_names).values_list('name', 'id'))
+        missing_ad_groups = [
+            ADGroup(name=name, display_name=display_name)
+            for name, display_name in display_names.items() if name not in ad_groups
+        ]
+        if missing_ad_groups:
+            ad_groups.update((x.name, x.id) for x in ADGroup.objects.bulk_create(missing_ad_groups))
+
+        # Update user's groups
+        new_ad_groups = set(ad_groups.values())
+        old_ad_groups = set(self.ad_groups.values_list('id', flat=True))
+        groups_to_add = new_ad_groups - old_ad_groups
+        if groups_to_add:
+            self.ad_groups.add(*groups_to_add)
+        groups_to_remove = old_ad_groups - new_ad_groups
+        if groups_to_remove:
+            self.ad_groups.remove(*groups_to_remove)
+
+        self.sync_groups_from_ad()
+
 
 def get_provider_ids():
     from django.conf import settings
@@ -71,6 +127,28 @@ class Application(OptionsBase, AbstractApplication):
         ordering = ('site_type', 'name')
 
 
+class ApplicationAuthorization(models.Model):
+    """
+    A user has authorised an OAuth2 application at least once.
+
+    Kept up to date when access tokens are created, so that checking
+    whether the user has consented to an application doesn't need to
+    search the access tokens.
+    """
+    user = models.ForeignKey(
+        User, verbose_name=_('user'), related_name='application_authorizations', on_delete=models.CASCADE
+    )
+    application = models.ForeignKey(
+        Application, verbose_name=_('application'), related_name='authorizations', on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField(verbose_name=_('created at'), default=now)
+
+    class Meta:
+        verbose_name = _('application authorization')
+        verbose_name_plural = _('application authorizations')
+        unique_together = (('user', 'application'),)
+
+
 class OidcClientOptions(OptionsBase):
     oidc_client = models.OneToOneField(Client, related_name='+', on_delete=models.CASCADE,
                                        verbose_name=_("OIDC Client"))
@@ -85,20 +163,21 @@ class OidcClientOptions(OptionsBase):
 
 class UserLoginEntryManager(models.Manager):
     def create_from_request(self, request, service, **kwargs):
-        kwargs.setdefault('user', request.user)
+        with timed(LOGIN_ENTRY_WRITE_SECONDS):
+            kwargs.setdefault('user', request.user)
 
-        if 'ip_address' not in kwargs:
-            kwargs['ip_address'] = get_client_ip(request)[0]
+            if 'ip_address' not in kwargs:
+                kwargs['ip_address'] = get_client_ip(request)[0]
 
-        if 'geo_location' not in kwargs:
-            try:
-                kwargs['geo_location'] = get_geo_location_data_for_ip(kwargs['ip_address'])
-            except Exception as e:
-                # catch all exceptions here because we don't want any geo location related error
-                # to make the whole login entry creation fail.
-                logger.exception('Error getting geo location data for an IP: {}'.format(e))
+            if 'geo_location' not in kwargs:
+                try:
+                    kwargs['geo_location'] = get_geo_location_data_for_ip(kwargs['ip_address'])
+                except Exception as e:
+                    # catch all exceptions here because we don't want any geo location related error
+                    # to make the whole login entry creation fail.
+                    logger.exception('Error getting geo location data for an IP: {}'.format(e))
 
-        return self.create(service=service, **kwargs)
+            return self.create(service=service, **kwargs)
 
 
 class UserLoginEntry(models.Model):
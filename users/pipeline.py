@@ -2,15 +2,20 @@ import uuid
 from urllib.parse import urlencode
 
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django.shortcuts import redirect
 from django.urls import reverse
 from helusers.utils import uuid_to_username
+from social_django.models import UserSocialAuth
 
 from auth_backends.adfs.base import BaseADFS
+from tunnistamo.tracing import traced
 from users.models import LoginMethod
+from users.utils import filter_by_email
 from users.views import AuthenticationErrorView
 
 
+@traced('pipeline.get_user_uuid')
 def get_user_uuid(details, backend, response, user=None, *args, **kwargs):
     """Add `new_uuid` argument to the pipeline.
 
@@ -35,6 +40,7 @@ def get_user_uuid(details, backend, response, user=None, *args, **kwargs):
     }
 
 
+@traced('pipeline.get_username')
 def get_username(strategy, user=None, *args, **kwargs):
     """Sets the `username` argument.
 
@@ -58,6 +64,7 @@ def get_username(strategy, user=None, *args, **kwargs):
     }
 
 
+@traced('pipeline.require_email')
 def require_email(details, backend, user=None, *args, **kwargs):
     """Enforce email address.
 
@@ -79,6 +86,7 @@ def require_email(details, backend, user=None, *args, **kwargs):
         return redirect(redirect_to)
 
 
+@traced('pipeline.associate_by_email')
 def associate_by_email(strategy, details, user=None, *args, **kwargs):
     """Deny duplicate email.
 
@@ -98,12 +106,12 @@ def associate_by_email(strategy, details, user=None, *args, **kwargs):
     backend = kwargs['backend']
 
     User = get_user_model()  # noqa
-    existing_users = User.objects.filter(email__iexact=email).order_by('-date_joined')
-    if not existing_users:
+    user = filter_by_email(User.objects, email).annotate(
+        has_social_auth=Exists(UserSocialAuth.objects.filter(user=OuterRef('pk')))
+    ).order_by('-date_joined').first()
+    if not user:
         return
 
-    user = existing_users[0]
-
     trusted_email_domains = backend.setting('TRUSTED_EMAIL_DOMAINS', [])
     explicitly_trusted = False
     if trusted_email_domains:
@@ -111,21 +119,21 @@ def associate_by_email(strategy, details, user=None, *args, **kwargs):
         if email_domain in trusted_email_domains or trusted_email_domains == '*':
             explicitly_trusted = True
 
-    social_set = user.social_auth.all()
     # If the account doesn't have any social logins yet, or if we
     # explicitly trust the social media provider, allow the signup.
-    if explicitly_trusted or not social_set:
+    if explicitly_trusted or not user.has_social_auth:
         return {
             'user': user,
         }
 
-    providers = [a.provider for a in social_set]
+    providers = user.social_auth.values('provider')
     strategy.request.other_logins = LoginMethod.objects.filter(provider_id__in=providers)
 
     error_view = AuthenticationErrorView(request=strategy.request)
     return error_view.get(strategy.request)
 
 
+@traced('pipeline.update_ad_groups')
 def update_ad_groups(details, backend, user=None, *args, **kwargs):
     """Update users AD groups.
 
@@ -1,13 +1,18 @@
+from allauth.account.models import EmailAddress
 from allauth.account.signals import user_logged_in as allauth_user_logged_in
+from allauth.socialaccount.models import SocialAccount
 from crequest.middleware import CrequestMiddleware
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
+from helusers.models import ADGroup, ADGroupMapping
 from oauth2_provider.models import AccessToken
 from oidc_provider.models import Token
 
 from services.models import Service
-from users.models import UserLoginEntry
+from tunnistamo.tracing import traced
+from users.models import ApplicationAuthorization, User, UserLoginEntry
+from users.userinfo import bump_user_versions, delete_cached_userinfo
 
 
 @receiver(allauth_user_logged_in)
@@ -30,7 +35,11 @@ def handle_allauth_login(sender, request, user, **kwargs):
 
 
 @receiver(post_save, sender=AccessToken)
-def handle_oauth2_access_token_save(sender, instance, **kwargs):
+@traced('login_entry.oauth2_access_token_saved')
+def handle_oauth2_access_token_save(sender, instance, created=False, **kwargs):
+    if created and instance.user_id and instance.application_id:
+        ApplicationAuthorization.objects.get_or_create(user_id=instance.user_id, application_id=instance.application_id)
+
     request = CrequestMiddleware.get_request()
 
     if not (request and instance.application):
@@ -45,6 +54,7 @@ def handle_oauth2_access_token_save(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=Token)
+@traced('login_entry.oidc_token_saved')
 def handle_oidc_token_save(sender, instance, **kwargs):
     request = CrequestMiddleware.get_request()
 
@@ -57,3 +67,57 @@ def handle_oidc_token_save(sender, instance, **kwargs):
         return
 
     UserLoginEntry.objects.create_from_request(request, service, user=instance.user)
+
+
+def reset_ad_groups_fingerprint(users):
+    """Make the next login of the given users synchronise their AD groups in full."""
+    users.exclude(ad_groups_fingerprint=None).update(ad_groups_fingerprint=None)
+
+
+@receiver(m2m_changed, sender=User.ad_groups.through)
+def handle_user_ad_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        users = User.objects.filter(id=instance.id)
+    elif action in ('post_add', 'post_remove'):
+        users = User.objects.filter(id__in=pk_set)
+    elif action == 'pre_clear':
+        users = User.objects.filter(ad_groups=instance)
+    else:
+        return
+
+    reset_ad_groups_fingerprint(users)
+    bump_user_versions(users.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=ADGroup)
+def handle_ad_group_delete(sender, instance, **kwargs):
+    users = User.objects.filter(ad_groups=instance)
+    reset_ad_groups_fingerprint(users)
+    bump_user_versions(users.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=ADGroupMapping)
+@receiver(post_delete, sender=ADGroupMapping)
+def handle_ad_group_mapping_change(sender, instance, **kwargs):
+    reset_ad_groups_fingerprint(User.objects.filter(ad_groups=instance.ad_group_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def handle_user_change(sender, instance, **kwargs):
+    bump_user_versions([instance.id])
+
+
+@receiver(post_save, sender=EmailAddress)
+@receiver(post_delete, sender=EmailAddress)
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def handle_user_related_object_change(sender, instance, **kwargs):
+    bump_user_versions([instance.user_id])
+
+
+@receiver(post_delete, sender=Token)
+def handle_oidc_token_delete(sender, instance, **kwargs):
+    delete_cached_userinfo(instance.access_token)
@@ -0,0 +1,82 @@
+import pytest
+from django.contrib.auth.models import Group
+from helusers.models import ADGroup, ADGroupMapping
+
+from users.factories import UserFactory
+from users.models import get_ad_groups_fingerprint
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+def get_ad_group_names(user):
+    return sorted(user.ad_groups.values_list('name', flat=True))
+
+
+def test_get_ad_groups_fingerprint_ignores_order_and_case():
+    assert get_ad_groups_fingerprint(['Group1', 'group2']) == get_ad_groups_fingerprint(['GROUP2', 'group1'])
+    assert get_ad_groups_fingerprint(['group1']) != get_ad_groups_fingerprint(['group1', 'group2'])
+
+
+def test_update_ad_groups():
+    ADGroup.objects.create(name='existing', display_name='Existing')
+    user = UserFactory()
+
+    user.update_ad_groups(['Existing', 'New'])
+
+    assert get_ad_group_names(user) == ['existing', 'new']
+    assert ADGroup.objects.count() == 2
+    assert ADGroup.objects.get(name='new').display_name == 'New'
+    user.refresh_from_db()
+    assert user.ad_groups_fingerprint == get_ad_groups_fingerprint(['existing', 'new'])
+
+    user.update_ad_groups(['new', 'other'])
+
+    assert get_ad_group_names(user) == ['new', 'other']
+
+
+def test_update_ad_groups_unchanged(django_assert_num_queries):
+    user = UserFactory()
+    user.update_ad_groups(['group1', 'group2'])
+
+    with django_assert_num_queries(0):
+        user.update_ad_groups(['Group2', 'Group1'])
+
+
+def test_update_ad_groups_syncs_django_groups():
+    group = Group.objects.create(name='staff')
+    ad_group = ADGroup.objects.create(name='ad_staff', display_name='AD staff')
+    ADGroupMapping.objects.create(group=group, ad_group=ad_group)
+    user = UserFactory()
+
+    user.update_ad_groups(['AD_staff'])
+    assert list(user.groups.all()) == [group]
+
+    user.update_ad_groups([])
+    assert list(user.groups.all()) == []
+
+
+def test_ad_groups_fingerprint_is_reset_on_manual_changes():
+    user = UserFactory()
+    user.update_ad_groups(['group1'])
+
+    user.ad_groups.clear()
+    user.refresh_from_db()
+    assert user.ad_groups_fingerprint is None
+
+    user.update_ad_groups(['group1'])
+    assert get_ad_group_names(user) == ['group1']
+
+
+def test_ad_groups_fingerprint_is_reset_on_mapping_change():
+    user = UserFactory()
+    user.update_ad_groups(['ad_staff'])
+    group = Group.objects.create(name='staff')
+
+    ADGroupMapping.objects.create(group=group, ad_group=ADGroup.objects.get(name='ad_staff'))
+    user.refresh_from_db()
+    user.update_ad_groups(['ad_staff'])
+
+    assert list(user.groups.all()) == [group]
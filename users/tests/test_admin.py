@@ -0,0 +1,65 @@
+import uuid
+
+import pytest
+from django.contrib.admin.sites import site
+from django.test import RequestFactory
+
+from tunnistamo.admin_search import EstimatedCountPaginator
+from users.factories import UserFactory
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+def search_users(search_term):
+    model_admin = site._registry[User]
+    request = RequestFactory().get('/')
+    queryset, use_distinct = model_admin.get_search_results(request, User.objects.all(), search_term)
+    return list(queryset)
+
+
+def test_search_users_by_uuid():
+    user = UserFactory()
+    UserFactory()
+
+    assert search_users(str(user.uuid)) == [user]
+    assert search_users(str(uuid.uuid4())) == []
+
+
+def test_search_users_by_email():
+    user = UserFactory(email='Test.User@example.com')
+    UserFactory(email='test.user@example.org')
+
+    assert search_users(' test.user@EXAMPLE.com ') == [user]
+
+
+def test_search_users_by_name():
+    user = UserFactory(first_name='Mikko', last_name='Keskinen')
+    UserFactory(first_name='Anna', last_name='Virtanen')
+
+    assert search_users('keskinen') == [user]
+
+
+def test_search_users_by_partial_term():
+    user = UserFactory(username='mkeskinen', first_name='Mikko', last_name='Keskinen', email='mikko@example.com')
+    UserFactory(username='avirtanen', first_name='Anna', last_name='Virtanen', email='anna@example.com')
+
+    assert search_users('kes') == [user]
+    assert search_users('ik') == [user]
+    assert search_users(str(user.uuid)[:8]) == [user]
+
+
+def test_empty_search_returns_all_users():
+    users = [UserFactory(), UserFactory()]
+
+    assert sorted(search_users(''), key=lambda user: user.id) == users
+
+
+def test_estimated_count_paginator_counts_small_tables_exactly():
+    UserFactory.create_batch(3)
+
+    assert EstimatedCountPaginator(User.objects.order_by('id'), 2).count == 3
+    assert EstimatedCountPaginator(User.objects.filter(id=0).order_by('id'), 2).count == 0
@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.utils import timezone
+from social_django.models import Association, Nonce, Partial
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+def create_session(expire_date):
+    session = SessionStore()
+    session.create()
+    Session.objects.filter(session_key=session.session_key).update(expire_date=expire_date)
+    return session.session_key
+
+
+def test_cleanup_deletes_expired_sessions_in_batches(settings):
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    expired = [create_session(timezone.now() - timedelta(hours=1)) for i in range(5)]
+    valid = create_session(timezone.now() + timedelta(hours=1))
+    out = StringIO()
+
+    call_command('cleanup_expired_data', batch_size=2, sleep=0, only=['sessions'], stdout=out)
+
+    # Two full batches and one partial batch
+    assert out.getvalue().splitlines() == [
+        'sessions: 2 deleted', 'sessions: 4 deleted', 'sessions: 5 deleted', 'Deleted 5 expired sessions',
+    ]
+    assert not Session.objects.filter(session_key__in=expired).exists()
+    assert Session.objects.filter(session_key=valid).exists()
+
+
+def test_cleanup_deletes_expired_social_auth_rows():
+    now = int(time.time())
+    Nonce.objects.create(server_url='https://example.com/', timestamp=now - 3600, salt='old')
+    fresh_nonce = Nonce.objects.create(server_url='https://example.com/', timestamp=now, salt='new')
+    association_fields = dict(server_url='https://example.com/', secret='x', lifetime=3600, assoc_type='HMAC-SHA1')
+    Association.objects.create(handle='old', issued=now - 7200, **association_fields)
+    valid_association = Association.objects.create(handle='new', issued=now - 1800, **association_fields)
+    old_partial = Partial.objects.create(token='old', backend='github', data={})
+    Partial.objects.filter(pk=old_partial.pk).update(timestamp=timezone.now() - timedelta(days=2))
+    fresh_partial = Partial.objects.create(token='new', backend='github', data={})
+
+    call_command('cleanup_expired_data', sleep=0)
+
+    assert list(Nonce.objects.all()) == [fresh_nonce]
+    assert list(Association.objects.all()) == [valid_association]
+    assert list(Partial.objects.all()) == [fresh_partial]
@@ -0,0 +1,119 @@
+import jwt
+import pytest
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from freezegun import freeze_time
+from helusers.models import ADGroup
+from rest_framework.test import APIClient
+
+from hkijwt.models import AppToAppPermission
+from users.factories import ApplicationFactory, OAuth2AccessTokenFactory, UserFactory
+
+pytestmark = pytest.mark.query_budget
+
+JWT_TOKEN_URL = '/jwt-token/'
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    user = UserFactory(first_name='Test', last_name='User')
+    user.ad_groups.add(ADGroup.objects.create(name='group', display_name='Group'))
+    return user
+
+
+@pytest.fixture
+def access_token(user):
+    return OAuth2AccessTokenFactory(user=user)
+
+
+@pytest.fixture
+def api_client(access_token):
+    api_client = APIClient()
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(access_token.token))
+    return api_client
+
+
+def get_jwt_payload(api_client, app, **params):
+    response = api_client.get(JWT_TOKEN_URL, params)
+    assert response.status_code == 200
+    return jwt.decode(response.data['token'], app.client_secret, audience=app.client_id, algorithms=['HS256'])
+
+
+def test_get_jwt(api_client, access_token, user):
+    payload = get_jwt_payload(api_client, access_token.application)
+
+    assert payload == {
+        'username': user.username,
+        'email': user.email,
+        'first_name': 'Test',
+        'last_name': 'User',
+        'department_name': user.department_name,
+        'display_name': 'Test User',
+        'iss': 'https://api.hel.fi/sso',
+        'sub': str(user.uuid),
+        'aud': access_token.application.client_id,
+        'exp': payload['exp'],
+    }
+
+
+def test_get_jwt_with_ad_groups(api_client, access_token):
+    access_token.application.include_ad_groups = True
+    access_token.application.save()
+
+    assert get_jwt_payload(api_client, access_token.application)['ad_groups'] == ['Group']
+
+
+def test_get_jwt_for_target_app(api_client, access_token):
+    target_app = ApplicationFactory()
+
+    response = api_client.get(JWT_TOKEN_URL, {'target_app': target_app.client_id})
+    assert response.status_code == 403
+
+    AppToAppPermission.objects.create(requester=access_token.application, target=target_app)
+
+    assert get_jwt_payload(api_client, target_app, target_app=target_app.client_id)['aud'] == target_app.client_id
+
+
+def test_revoked_target_app_permission_expires_in_other_processes(api_client, access_token, monkeypatch):
+    with freeze_time('2019-01-01 12:00:00'):
+        # Drop the versions set by the fixtures, which expire by the real time
+        cache.clear()
+        target_app = ApplicationFactory()
+        permission = AppToAppPermission.objects.create(requester=access_token.application, target=target_app)
+        response = api_client.get(JWT_TOKEN_URL, {'target_app': target_app.client_id})
+        assert response.status_code == 200
+
+    # The permission is revoked in another process, which has a cache of its own
+    monkeypatch.setattr('hkijwt.permissions.cache', LocMemCache('other-process', {}))
+    with freeze_time('2019-01-01 12:00:30'):
+        permission.delete()
+    monkeypatch.undo()
+
+    with freeze_time('2019-01-01 12:01:01'):
+        response = api_client.get(JWT_TOKEN_URL, {'target_app': target_app.client_id})
+        assert response.status_code == 403
+
+
+def test_get_jwt_for_unknown_target_app(api_client):
+    response = api_client.get(JWT_TOKEN_URL, {'target_app': 'unknown'})
+    assert response.status_code == 404
+
+
+def test_get_jwt_is_cached(api_client, access_token, user):
+    token = api_client.get(JWT_TOKEN_URL).data['token']
+    assert api_client.get(JWT_TOKEN_URL).data['token'] == token
+
+    user.first_name = 'Changed'
+    user.save()
+
+    assert get_jwt_payload(api_client, access_token.application)['first_name'] == 'Changed'
@@ -13,8 +13,8 @@ from oauth2_provider.admin import Grant
 from oidc_provider.models import Code, RSAKey
 
 from services.models import Service
-from users.factories import ApplicationFactory, OIDCClientFactory
-from users.models import User, UserLoginEntry
+from users.factories import ApplicationFactory, OAuth2AccessTokenFactory, OIDCClientFactory
+from users.models import ApplicationAuthorization, User, UserLoginEntry
 from users.tests.utils import get_basic_auth_header
 
 
@@ -218,3 +218,11 @@ def test_authorization_code_oidc_login_user_login_entry_creation(client, oidc_cl
         assert entry.service == service
     else:
         assert UserLoginEntry.objects.count() == 0
+
+
+def test_application_authorization_is_created_from_access_token():
+    token = OAuth2AccessTokenFactory()
+    OAuth2AccessTokenFactory(user=token.user, application=token.application)
+
+    authorizations = ApplicationAuthorization.objects.all()
+    assert [(x.user, x.application) for x in authorizations] == [(token.user, token.application)]
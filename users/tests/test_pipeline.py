@@ -0,0 +1,57 @@
+from unittest.mock import Mock
+
+import pytest
+from social_django.models import UserSocialAuth
+
+from users.factories import UserFactory
+from users.models import User
+from users.pipeline import associate_by_email
+from users.utils import filter_by_email
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+@pytest.fixture
+def backend():
+    backend = Mock()
+    backend.setting.return_value = []
+    return backend
+
+
+def test_filter_by_email_ignores_case():
+    user = UserFactory(email='Test.User@Example.com')
+    UserFactory(email='other@example.com')
+
+    assert list(filter_by_email(User.objects, 'test.user@EXAMPLE.com')) == [user]
+
+
+def test_associate_by_email_no_existing_user(backend):
+    assert associate_by_email(Mock(), {'email': 'test@example.com'}, backend=backend) is None
+
+
+def test_associate_by_email_user_without_social_auth(backend):
+    user = UserFactory(email='Test@Example.com')
+
+    result = associate_by_email(Mock(), {'email': 'test@example.com'}, backend=backend)
+
+    assert result == {'user': user}
+
+
+def test_associate_by_email_trusted_domain(backend):
+    user = UserFactory(email='test@example.com')
+    UserSocialAuth.objects.create(user=user, provider='github', uid='1')
+    backend.setting.return_value = ['example.com']
+
+    result = associate_by_email(Mock(), {'email': 'test@example.com'}, backend=backend)
+
+    assert result == {'user': user}
+
+
+def test_associate_by_email_single_query(backend, django_assert_num_queries):
+    UserFactory(email='test@example.com')
+
+    with django_assert_num_queries(1):
+        associate_by_email(Mock(), {'email': 'test@example.com'}, backend=backend)
@@ -6,6 +6,8 @@ from oidc_apis.factories import ApiFactory, ApiScopeFactory
 from users.factories import OIDCClientFactory, UserFactory
 from users.views import TunnistamoOidcAuthorizeView
 
+pytestmark = pytest.mark.query_budget
+
 
 @pytest.mark.parametrize('with_trailing_slash', (True, False))
 @pytest.mark.django_db
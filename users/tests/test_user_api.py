@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from helusers.models import ADGroup
+from rest_framework.test import APIClient
+
+from users.factories import OAuth2AccessTokenFactory, UserFactory
+
+pytestmark = pytest.mark.query_budget
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+def create_user_with_ad_groups(count, **kwargs):
+    user = UserFactory(**kwargs)
+    for i in range(count):
+        user.ad_groups.add(ADGroup.objects.create(name='group{}'.format(i), display_name='Group {}'.format(i)))
+    return user
+
+
+def get_api_client(user, include_ad_groups=True):
+    access_token = OAuth2AccessTokenFactory(user=user, application__include_ad_groups=include_ad_groups)
+    api_client = APIClient()
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(access_token.token))
+    return api_client
+
+
+def get_user(api_client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(url)
+    assert response.status_code == 200
+    return response.data, len(context.captured_queries)
+
+
+@pytest.mark.parametrize('include_ad_groups', (True, False))
+def test_get_own_user(include_ad_groups):
+    user = create_user_with_ad_groups(3)
+    api_client = get_api_client(user, include_ad_groups=include_ad_groups)
+
+    data, query_count = get_user(api_client, '/user/')
+    _, query_count_without_user_queries = get_user(get_api_client(UserFactory(), include_ad_groups=False), '/user/')
+
+    assert data['username'] == user.username
+    if include_ad_groups:
+        assert data['ad_groups'] == ['Group 0', 'Group 1', 'Group 2']
+        assert query_count == query_count_without_user_queries + 1
+    else:
+        assert 'ad_groups' not in data
+        assert query_count == query_count_without_user_queries
+
+
+@pytest.mark.parametrize('include_ad_groups', (True, False))
+def test_superuser_get_user_query_count(include_ad_groups):
+    api_client = get_api_client(UserFactory(is_superuser=True), include_ad_groups=include_ad_groups)
+    few_groups_user = create_user_with_ad_groups(1)
+    many_groups_user = create_user_with_ad_groups(20)
+
+    few_groups_data, few_groups_query_count = get_user(api_client, '/user/{}/'.format(few_groups_user.username))
+    many_groups_data, many_groups_query_count = get_user(api_client, '/user/{}/'.format(many_groups_user.username))
+
+    assert few_groups_query_count == many_groups_query_count
+    if include_ad_groups:
+        assert few_groups_data['ad_groups'] == ['Group 0']
+        assert len(many_groups_data['ad_groups']) == 20
+    else:
+        assert 'ad_groups' not in many_groups_data
+
+
+def test_superuser_get_user_queries_only_serialized_columns():
+    api_client = get_api_client(UserFactory(is_superuser=True), include_ad_groups=False)
+    user = UserFactory()
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get('/user/{}/'.format(user.username))
+
+    assert response.status_code == 200
+    assert response.data['uuid'] == str(user.uuid)
+    user_query = [query['sql'] for query in context.captured_queries if 'WHERE "users_user"."username"' in query['sql']]
+    assert len(user_query) == 1
+    assert '"users_user"."password"' not in user_query[0]
+
+
+def test_user_cannot_get_other_user():
+    api_client = get_api_client(UserFactory())
+
+    response = api_client.get('/user/{}/'.format(UserFactory().username))
+
+    assert response.status_code == 404
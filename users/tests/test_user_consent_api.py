@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 from django.utils.dateparse import parse_datetime
 from oidc_provider.models import UserConsent
 from parler.utils.context import switch_language
@@ -7,6 +8,8 @@ from rest_framework.reverse import reverse
 from oidc_apis.factories import ApiDomainFactory, ApiFactory, ApiScopeFactory
 from users.factories import OIDCClientFactory, UserConsentFactory, UserFactory, access_token_factory
 
+pytestmark = pytest.mark.query_budget
+
 LIST_URL = reverse('v1:userconsent-list')
 
 
@@ -19,6 +22,11 @@ def auto_mark_django_db(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def user_consent(user, service):
     return UserConsentFactory(user=user, client=service.client)
@@ -8,6 +8,8 @@ from users.factories import UserFactory, UserLoginEntryFactory, access_token_fac
 
 from .utils import check_datetimes_somewhat_equal
 
+pytestmark = pytest.mark.query_budget
+
 LIST_URL = reverse('v1:userloginentry-list')
 
 
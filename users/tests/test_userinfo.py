@@ -0,0 +1,112 @@
+import pytest
+from allauth.account.models import EmailAddress
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+from helusers.models import ADGroup
+
+from users.factories import UserFactory, access_token_factory
+
+pytestmark = pytest.mark.query_budget
+
+USERINFO_URL = '/openid/userinfo/'
+
+
+@pytest.fixture(autouse=True)
+def auto_mark_django_db(db):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    return UserFactory(first_name='Test', last_name='User')
+
+
+@pytest.fixture
+def token(user):
+    token = access_token_factory(user=user, scopes=['openid', 'profile', 'email', 'ad_groups'])
+    token.id_token = {'sub': str(user.uuid)}
+    token.save()
+    return token
+
+
+def get_userinfo(client, token):
+    response = client.get(USERINFO_URL, HTTP_AUTHORIZATION='Bearer {}'.format(token.access_token))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_userinfo_is_cached(client, token, django_assert_num_queries):
+    userinfo = get_userinfo(client, token)
+    assert userinfo['name'] == 'Test User'
+
+    with django_assert_num_queries(0):
+        assert get_userinfo(client, token) == userinfo
+
+
+def test_userinfo_cache_is_invalidated_on_user_change(client, user, token):
+    get_userinfo(client, token)
+
+    user.first_name = 'Changed'
+    user.save()
+
+    assert get_userinfo(client, token)['given_name'] == 'Changed'
+
+
+def test_userinfo_cache_is_invalidated_on_email_address_change(client, user, token):
+    get_userinfo(client, token)
+
+    EmailAddress.objects.create(user=user, email='changed@example.com', primary=True, verified=True)
+
+    assert get_userinfo(client, token)['email'] == 'changed@example.com'
+
+
+def test_userinfo_cache_is_invalidated_on_ad_group_change(client, user, token):
+    get_userinfo(client, token)
+
+    user.ad_groups.add(ADGroup.objects.create(name='changed', display_name='Changed'))
+
+    assert get_userinfo(client, token)['ad_groups'] == ['changed']
+
+
+def test_userinfo_cache_is_invalidated_on_token_delete(client, token):
+    get_userinfo(client, token)
+
+    token.delete()
+    response = client.get(USERINFO_URL, HTTP_AUTHORIZATION='Bearer {}'.format(token.access_token))
+
+    assert response.status_code == 401
+
+
+def test_deleted_token_expires_in_other_processes(client, token, monkeypatch):
+    with freeze_time('2019-01-01 12:00:00'):
+        # The versions set by the fixtures at the real time would never expire
+        cache.clear()
+        get_userinfo(client, token)
+
+    # The token is deleted in another process, which has a cache of its own
+    monkeypatch.setattr('users.userinfo.cache', LocMemCache('other-process', {}))
+    with freeze_time('2019-01-01 12:00:30'):
+        token.delete()
+    monkeypatch.undo()
+
+    with freeze_time('2019-01-01 12:01:01'):
+        response = client.get(USERINFO_URL, HTTP_AUTHORIZATION='Bearer {}'.format(token.access_token))
+    assert response.status_code == 401
+
+
+def test_userinfo_cache_disabled(client, token, settings):
+    settings.USERINFO_CACHE_TIMEOUT = 0
+    get_userinfo(client, token)
+
+    with CaptureQueriesContext(connection) as context:
+        get_userinfo(client, token)
+
+    assert len(context.captured_queries) > 0
@@ -0,0 +1,81 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+USERINFO_CACHE_KEY = 'userinfo:{}'
+USER_VERSION_CACHE_KEY = 'userinfo_user_version:{}'
+
+DEFAULT_USERINFO_CACHE_TIMEOUT = 5 * 60
+# Without a cache shared by the processes, a change or a deleted token is
+# noticed by the other processes only when the user's version expires
+DEFAULT_USERINFO_USER_VERSION_TIMEOUT = 60
+
+
+def get_userinfo_cache_timeout():
+    return getattr(settings, 'USERINFO_CACHE_TIMEOUT', DEFAULT_USERINFO_CACHE_TIMEOUT)
+
+
+def get_user_version_timeout():
+    return getattr(settings, 'USERINFO_USER_VERSION_TIMEOUT', DEFAULT_USERINFO_USER_VERSION_TIMEOUT)
+
+
+def get_userinfo_cache_key(access_token):
+    return USERINFO_CACHE_KEY.format(hashlib.sha256(access_token.encode('utf-8')).hexdigest())
+
+
+def get_user_version(user_id):
+    """Return the version of the user's data, which changes whenever the data included in userinfo changes.
+
+    A new version is generated if the cache doesn't have one, so that
+    responses cached with an evicted or expired version are never used.
+    """
+    key = USER_VERSION_CACHE_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, get_user_version_timeout())
+        version = cache.get(key)
+    return version
+
+
+def bump_user_versions(user_ids):
+    versions = {USER_VERSION_CACHE_KEY.format(user_id): uuid.uuid4().hex for user_id in user_ids}
+    cache.set_many(versions, get_user_version_timeout())
+
+
+def get_cached_userinfo(access_token):
+    """Return the cached userinfo response content for the access token, or None.
+
+    The cached content is used only if the token hasn't expired and the
+    user's data hasn't changed after it was cached.
+    """
+    entry = cache.get(get_userinfo_cache_key(access_token))
+    if entry is None:
+        return None
+
+    if entry['expires_at'] <= timezone.now():
+        return None
+    if entry['user_version'] != get_user_version(entry['user_id']):
+        return None
+
+    return entry['content']
+
+
+def cache_userinfo(access_token, token, user_version, content):
+    timeout = min(get_userinfo_cache_timeout(), (token.expires_at - timezone.now()).total_seconds())
+    if timeout <= 0:
+        return
+
+    entry = {
+        'user_id': token.user_id,
+        'user_version': user_version,
+        'expires_at': token.expires_at,
+        'content': content,
+    }
+    cache.set(get_userinfo_cache_key(access_token), entry, timeout)
+
+
+def delete_cached_userinfo(access_token):
+    cache.delete(get_userinfo_cache_key(access_token))
@@ -1,16 +1,30 @@
 from django.conf import settings
 from django.contrib.gis.geoip2 import GeoIP2
+from django.db.models import Value
+from django.db.models.functions import Lower
 from geoip2.errors import AddressNotFoundError
 
+from tunnistamo.metrics import GEOIP_LOOKUP_SECONDS, timed
+
 
 def get_geo_location_data_for_ip(ip_address):
     if not hasattr(settings, 'GEOIP_PATH'):
         return None
 
-    g = GeoIP2()
-    try:
-        location = g.city(ip_address)
-    except AddressNotFoundError:
-        location = None
+    with timed(GEOIP_LOOKUP_SECONDS):
+        g = GeoIP2()
+        try:
+            location = g.city(ip_address)
+        except AddressNotFoundError:
+            location = None
 
     return location
+
+
+def filter_by_email(queryset, email):
+    """Filter the queryset by email address, ignoring case.
+
+    Unlike email__iexact, which compares UPPER(email), the comparison is
+    done on LOWER(email) so that the lower(email) indexes can be used.
+    """
+    return queryset.annotate(email_lower=Lower('email')).filter(email_lower=Lower(Value(email)))
@@ -3,18 +3,25 @@ from urllib.parse import parse_qs, urlparse
 
 from django.conf import settings
 from django.contrib.auth import logout as auth_logout
+from django.http import HttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils import translation
 from django.utils.http import quote
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic.base import TemplateView
 from oauth2_provider.models import get_application_model
-from oidc_provider.models import Client
+from oidc_provider.lib.utils.common import cors_allow_any
+from oidc_provider.lib.utils.oauth2 import extract_access_token
+from oidc_provider.models import Client, Token
 from oidc_provider.views import AuthorizeView
+from oidc_provider.views import userinfo as oidc_userinfo
 
 from oidc_apis.models import ApiScope
+from tunnistamo.tracing import span
 
 from .models import LoginMethod, OidcClientOptions
+from .userinfo import cache_userinfo, get_cached_userinfo, get_user_version, get_userinfo_cache_timeout
 
 
 class LoginView(TemplateView):
@@ -118,20 +125,57 @@ class AuthenticationErrorView(TemplateView):
 
 class TunnistamoOidcAuthorizeView(AuthorizeView):
     def get(self, request, *args, **kwargs):
-        request.GET = _extend_scope_in_query_params(request.GET)
+        with span('authorize.extend_scope'):
+            request.GET = _extend_scope_in_query_params(request.GET)
         request_locales = [l.strip() for l in request.GET.get('ui_locales', '').split(' ') if l]
         available_locales = [l[0] for l in settings.LANGUAGES]
 
         for locale in request_locales:
             if locale in available_locales:
-                with translation.override(locale):
+                with translation.override(locale), span('authorize.authorize'):
                     return super().get(request, *args, **kwargs)
 
-        return super().get(request, *args, **kwargs)
+        with span('authorize.authorize'):
+            return super().get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        request.POST = _extend_scope_in_query_params(request.POST)
-        return super().post(request, *args, **kwargs)
+        with span('authorize.extend_scope'):
+            request.POST = _extend_scope_in_query_params(request.POST)
+        with span('authorize.authorize'):
+            return super().post(request, *args, **kwargs)
+
+
+@csrf_exempt
+def userinfo(request, *args, **kwargs):
+    """
+    OIDC userinfo endpoint which caches the responses.
+
+    On a cache miss the response is generated by the userinfo view of
+    django-oidc-provider. Repeated requests with the same access token
+    are then served from the cache until the token expires or the data
+    of the user changes.
+    """
+    access_token = extract_access_token(request)
+    if request.method not in ('GET', 'POST') or not access_token or not get_userinfo_cache_timeout():
+        return oidc_userinfo(request, *args, **kwargs)
+
+    content = get_cached_userinfo(access_token)
+    if content is not None:
+        response = HttpResponse(content, content_type='application/json')
+        response['Cache-Control'] = 'no-store'
+        response['Pragma'] = 'no-cache'
+        return cors_allow_any(request, response)
+
+    token = Token.objects.filter(access_token=access_token).only('user', 'expires_at').first()
+    if token:
+        # Read the version before generating the response, so that
+        # changes made in the meantime invalidate the cached response
+        user_version = get_user_version(token.user_id)
+
+    response = oidc_userinfo(request, *args, **kwargs)
+    if token and response.status_code == 200:
+        cache_userinfo(access_token, token, user_version, response.content)
+    return response
 
 
 def _extend_scope_in_query_params(query_params):